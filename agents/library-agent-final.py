@@ -1,51 +1,104 @@
 from agents import Agent, Tool, Runner
 from pydantic import BaseModel
+import datetime
 from typing import List, Dict, Any
 from utils.computer_use import ucalgary_library_search
-
-
-class SearchResult(BaseModel):
-    """Model for library search results"""
-    title: str
-    authors: str
-    publication: str
-    year: int
-    abstract: str
-    url: str
-    pdf_url: str = None
-    downloaded: bool = False
+from utils.library_extractor import SearchResult, DEFAULT_MAX_RESULTS
+from utils.site_adapters import UCALGARY_RECENT_YEARS
+from utils.boolean_query import normalize_queries
+from utils.search_cache import get_search_cache
+from utils.dedup import DuplicateMerge, deduplicate_results
+from utils.catalog import get_catalog
+from utils.paper_table import PaperTable
+from utils.progress import emit, PartialOutput
 
 
 class LibrarySearchResults(BaseModel):
     """Model for library search output"""
     query: str
-    results: List[SearchResult]
+    # Filled only at the agent boundary; workflow stages share ctx.context["paper_table"] instead
+    results: List[SearchResult] = []
     total_found: int
+    merged_duplicates: List[DuplicateMerge] = []  # Near-duplicates folded into the kept results
 
 
-async def search_ucalgary_library(ctx: Any, queries: List[str]):
-    """Function to search UCalgary library using Computer Use"""
+def search_filters(max_results: int = DEFAULT_MAX_RESULTS) -> Dict[str, Any]:
+    """Filters every library search runs with, as part of its cache key"""
+    current_year = datetime.date.today().year
+    return {
+        "peer_reviewed": True,
+        "years": [current_year - UCALGARY_RECENT_YEARS, current_year],
+        "max_results": max_results
+    }
+
+
+def uncached_queries(queries: List[str]) -> List[str]:
+    """Canonical queries that would still need a browser search"""
+    filters = search_filters()
+    cache = get_search_cache()
+    return [query for query in normalize_queries(queries) if not cache.is_fresh(query, filters)]
+
+
+async def search_library(ctx: Any, queries: List[str]) -> LibrarySearchResults:
+    """Search the library, leaving the deduplicated papers in ctx.context["paper_table"] and returning a summary"""
     credentials = ctx.context["credentials"]
     browser_session = ctx.context["browser_session"]
     
-    # Combine the queries for search (in a real implementation, each would be searched separately)
-    combined_query = " AND ".join([f"({q})" for q in queries])
+    # Search each distinct query once; duplicates and queries covered by a broader one are dropped
+    canonical_queries = normalize_queries(queries)
+    filters = search_filters()
+    cache = get_search_cache()
     
-    # Use Computer Use to perform the search
-    search_results = await ucalgary_library_search(
-        browser_session,
-        credentials.ucalgary_username,
-        credentials.ucalgary_password,
-        combined_query
-    )
+    search_results = []
+    for query in canonical_queries:
+        cached = cache.get(query, filters)
+        if cached is not None:
+            print(f"Library search cache hit: {query}")
+            search_results.extend(LibrarySearchResults(**cached).results)
+            emit(PartialOutput(output_type="LibrarySearchResults", data=cached))
+            continue
+        
+        # Use Computer Use to perform the search
+        query_results = await ucalgary_library_search(
+            browser_session,
+            credentials.ucalgary_username,
+            credentials.ucalgary_password,
+            query,
+            max_results=filters["max_results"]
+        )
+        query_output = LibrarySearchResults(
+            query=query,
+            results=query_results,
+            total_found=len(query_results)
+        ).model_dump()
+        cache.put(query, filters, query_output)
+        search_results.extend(query_results)
+        emit(PartialOutput(output_type="LibrarySearchResults", data=query_output))
+    
+    # Merge near-duplicate copies (preprint vs. published, title variants) before indexing
+    unique_results, merges = deduplicate_results(search_results)
+    
+    # Later stages share one compact table instead of copying the results around
+    table = PaperTable.from_records(unique_results)
+    ctx.context["paper_table"] = table
+    
+    # Keep the papers in the local catalog so later runs can reuse them
+    get_catalog().upsert_papers(table)
     
     return LibrarySearchResults(
-        query=combined_query,
-        results=search_results,
-        total_found=len(search_results)
+        query=" OR ".join(f"({q})" for q in canonical_queries),
+        total_found=len(search_results),
+        merged_duplicates=merges
     )
 
 
+async def search_ucalgary_library(ctx: Any, queries: List[str]):
+    """Function to search UCalgary library using Computer Use"""
+    summary = await search_library(ctx, queries)
+    # The agent reads the papers from its tool output, so convert them to models here
+    return summary.model_copy(update={"results": ctx.context["paper_table"].to_models(SearchResult)})
+
+
 def create_library_agent():
     """Create a library search agent"""
     
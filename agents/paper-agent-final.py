@@ -2,6 +2,14 @@ from agents import Agent, Tool, Runner
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from utils.vector_store import create_paper_vector_store, search_papers
+from utils.catalog import get_catalog
+from utils.resource_registry import DEFAULT_OWNER
+from utils.bibliography import format_reference
+from utils.paper_evaluator import evaluate_papers_batched
+from utils.clustering import cluster_papers
+from utils.paper_table import PaperTable
+from utils.lexical_index import LexicalIndex, LEXICAL_RESULTS, fuse_results
+from utils.screening import RejectedPaper, SCREEN_SHORTLIST, MIN_SELECTED_RELEVANCE, shortlist_papers
 
 
 class PaperEvaluation(BaseModel):
@@ -15,21 +23,29 @@ class PaperEvaluation(BaseModel):
     limitations: Optional[str]
     citation: str  # Formatted citation
     pdf_url: Optional[str]
+    year: Optional[int] = None
+    publication: Optional[str] = None
+    doi: Optional[str] = None
 
 
 class ScreenedPapers(BaseModel):
     """Model for paper screening output"""
     selected_papers: List[PaperEvaluation]
-    rejected_papers: List[str]  # Titles of rejected papers
+    rejected_papers: List[RejectedPaper]  # Rejected titles, with the stage and reason
     thematic_categories: Dict[str, List[str]]  # Theme -> List of paper titles
 
 
-async def create_paper_index(ctx: Any, papers: List[Dict]):
-    """Create a vector store index of papers for semantic search"""
-    # Create a vector store for the papers
-    vector_store_id = await create_paper_vector_store(papers)
+async def create_paper_index(ctx: Any, papers: PaperTable):
+    """Create a vector store index of papers for semantic search, and a local BM25 index for exact terms"""
+    # Create a vector store for the papers; the lexical index is filled from the same extracted text
+    lexical_index = LexicalIndex()
+    vector_store_id = await create_paper_vector_store(
+        papers, owner=ctx.context.get("resource_owner", DEFAULT_OWNER), lexical_index=lexical_index
+    )
     ctx.context["vector_store_id"] = vector_store_id
-    return {"status": "created", "vector_store_id": vector_store_id}
+    ctx.context["lexical_index"] = lexical_index
+    ctx.context["screening_candidates"] = papers
+    return {"status": "created", "vector_store_id": vector_store_id, "lexical_documents": len(lexical_index)}
 
 
 async def evaluate_papers(ctx: Any, research_question: str):
@@ -38,38 +54,89 @@ async def evaluate_papers(ctx: Any, research_question: str):
     if not vector_store_id:
         raise ValueError("Paper index not created. Run create_paper_index first.")
     
-    # Search for relevant papers
-    relevant_papers = await search_papers(vector_store_id, research_question)
+    # Search for relevant papers; BM25 catches exact terms (acronyms, gene and instrument names) dense search misses
+    vector_papers = await search_papers(vector_store_id, research_question)
+    lexical_index = ctx.context.get("lexical_index")
+    lexical_papers = lexical_index.search_papers(research_question, LEXICAL_RESULTS) if lexical_index else []
+    
+    # Fuse the rankings; several chunks of one paper are merged so each paper is evaluated once with all its matched text
+    retrieved = {paper["title"]: paper for paper in fuse_results([vector_papers, lexical_papers])}
+    
+    # Every indexed paper is a candidate; only those with retrieved passages are copied out of the table
+    pool = ctx.context.get("screening_candidates")
+    pool = pool if pool is not None else PaperTable()
+    candidates = [{**row, **retrieved[row["title"]]} if row["title"] in retrieved else row for row in pool]
+    pooled = set(pool.column("title"))
+    candidates.extend(paper for title, paper in retrieved.items() if title not in pooled)
+    
+    # Cheap first stage: metadata rules, embeddings and BM25 pick a fixed-size shortlist for the model
+    relevant_papers, rejected = await shortlist_papers(
+        candidates,
+        research_question,
+        lexical_index,
+        {title: paper["fusion_score"] for title, paper in retrieved.items()},
+        shortlist_size=ctx.context.get("screen_shortlist", SCREEN_SHORTLIST)
+    )
+    
+    # Evaluate the shortlist in cached, concurrent batches
+    assessments = await evaluate_papers_batched(relevant_papers, research_question)
     
-    # For demonstration, create evaluations (in a real implementation, this would use the model)
     evaluations = []
-    for paper in relevant_papers:
+    selected_papers = []
+    for paper, assessment in zip(relevant_papers, assessments):
+        if assessment is None:
+            # The model gave no assessment; keep the paper with its retrieval score only
+            assessment = {
+                "relevance_score": (paper.get("relevance_score") or 0.5) * 10,  # Convert to 0-10 scale
+                "quality_score": 0.0,
+                "key_findings": [],
+                "methodology": None,
+                "limitations": None
+            }
         eval = PaperEvaluation(
             title=paper["title"],
             authors=paper["authors"],
-            relevance_score=paper.get("relevance_score", 5) * 2,  # Convert to 0-10 scale
-            quality_score=7.5,  # Placeholder
-            key_findings=["Key finding 1", "Key finding 2"],
-            methodology="Qualitative analysis",
-            limitations="Small sample size",
-            citation=f"{paper['authors']} ({paper.get('year', '2023')}). {paper['title']}.",
-            pdf_url=paper.get("pdf_url")
+            relevance_score=assessment["relevance_score"],
+            quality_score=assessment["quality_score"],
+            key_findings=assessment["key_findings"],
+            methodology=assessment["methodology"],
+            limitations=assessment["limitations"],
+            citation=format_reference(paper, "APA"),
+            pdf_url=paper.get("pdf_url"),
+            year=paper.get("year"),
+            publication=paper.get("publication"),
+            doi=paper.get("doi")
         )
+        get_catalog().record_evaluation(paper, research_question, eval)
+        if eval.relevance_score < MIN_SELECTED_RELEVANCE:
+            rejected.append(RejectedPaper(
+                title=eval.title,
+                stage="model",
+                reason=f"Rated {eval.relevance_score:.1f}/10 for relevance",
+                score=eval.relevance_score
+            ))
+            continue
         evaluations.append(eval)
+        selected_papers.append(paper)
     
-    # Group papers by themes (placeholder implementation)
-    themes = {"Methodology": [], "Theoretical": [], "Application": []}
-    for i, eval in enumerate(evaluations):
-        if i % 3 == 0:
-            themes["Methodology"].append(eval.title)
-        elif i % 3 == 1:
-            themes["Theoretical"].append(eval.title)
-        else:
-            themes["Application"].append(eval.title)
+    # Most relevant papers first; the sort is stable, so ties keep their shortlist order
+    ranked = sorted(zip(evaluations, selected_papers), key=lambda pair: -pair[0].relevance_score)
+    evaluations = [eval for eval, _ in ranked]
+    relevant_papers = [paper for _, paper in ranked]
+    
+    # Group papers into themes by clustering title and abstract, the same text for every paper
+    # whatever passages retrieval returned; the key findings stand in when there is no abstract
+    themes = await cluster_papers(
+        [
+            f"{eval.title}. {paper.get('abstract') or ' '.join(eval.key_findings)}"
+            for eval, paper in zip(evaluations, relevant_papers)
+        ],
+        [eval.title for eval in evaluations]
+    )
     
     return ScreenedPapers(
         selected_papers=evaluations,
-        rejected_papers=["Irrelevant paper 1", "Low quality paper 2"],
+        rejected_papers=rejected,
         thematic_categories=themes
     )
 
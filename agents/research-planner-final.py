@@ -1,6 +1,15 @@
-from agents import Agent, Tool
+import time
+from agents import Agent, Tool, Runner
+from openai.types.responses import ResponseTextDeltaEvent
 from pydantic import BaseModel
-from typing import List
+from pydantic_core import from_json
+from typing import List, Any, Optional
+from utils.semantic_cache import get_semantic_cache
+from utils.progress import emit, streaming, PartialOutput
+from utils.budget import get_budget
+
+# Namespace of cached plans; bump when the planner's instructions or output change
+PLAN_CACHE_NAMESPACE = "research_planner:v1"
 
 
 class ResearchPlan(BaseModel):
@@ -38,3 +47,54 @@ def create_research_planner():
     )
     
     return agent
+
+
+async def plan_research(planner: Agent, research_question: str, context: Optional[Any] = None) -> ResearchPlan:
+    """Create a research plan, reusing the plan of an earlier question with the same meaning and key terms"""
+    cache = get_semantic_cache(PLAN_CACHE_NAMESPACE)
+    try:
+        embedding = await cache.embed(research_question)
+    except Exception as e:
+        # The cache is an optimisation; plan without it if embeddings are unavailable
+        print(f"Plan cache unavailable: {e}")
+        embedding = None
+    
+    hit = cache.lookup(embedding, research_question) if embedding is not None else None
+    if hit is not None:
+        print(f"Plan cache hit ({hit.similarity:.3f}) for: {hit.cached_text}")
+        # Keep the cached search strategy, but answer the question that was actually asked
+        return ResearchPlan(**{**hit.payload, "research_question": research_question})
+    
+    started = time.perf_counter()
+    result = Runner.run_streamed(
+        planner,
+        f"Create a research plan for the following question: {research_question}",
+        context=context
+    )
+    
+    # Parse the plan's JSON as it streams, and report each time a field or list item appears
+    buffer = ""
+    shape = None
+    async for event in result.stream_events():
+        if not streaming() or event.type != "raw_response_event" or not isinstance(event.data, ResponseTextDeltaEvent):
+            continue
+        buffer += event.data.delta
+        try:
+            partial = from_json(buffer, allow_partial=True)
+        except ValueError:
+            continue
+        if not isinstance(partial, dict):
+            continue
+        partial_shape = tuple((key, len(value) if isinstance(value, list) else 1) for key, value in partial.items())
+        if partial_shape != shape:
+            shape = partial_shape
+            emit(PartialOutput(output_type="ResearchPlan", data=partial))
+    plan = result.final_output
+    
+    # The runner calls the model directly, so charge its usage to the run's budget here
+    budget = get_budget()
+    if budget is not None:
+        budget.charge_tokens(result.context_wrapper.usage.total_tokens)
+    if embedding is not None:
+        cache.store(research_question, embedding, plan.model_dump(), time.perf_counter() - started)
+    return plan
@@ -1,7 +1,11 @@
 from agents import Agent, Tool, Runner
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
-from utils.computer_use import write_google_doc, format_according_to_journal_style
+from utils.computer_use import sync_google_doc, format_according_to_journal_style
+from utils.document_sync import load_document, sections_needing_formatting, mark_formatted
+from utils.bibliography import render_bibliography
+from utils.progress import emit, SectionDrafted
+from utils.budget import get_budget, degraded, DEGRADE_SKIP_JOURNAL_FORMATTING
 
 
 class DocumentSection(BaseModel):
@@ -37,6 +41,11 @@ class WrittenDocument(BaseModel):
 
 async def get_journal_guidelines(ctx: Any, journal_name: str) -> JournalStyleGuidelines:
     """Get the style guidelines for a specific journal"""
+    # Guidelines prefetched while the workflow was planning
+    prefetched = ctx.context.get("journal_guidelines", {}).get(journal_name) if ctx and ctx.context else None
+    if prefetched is not None:
+        return prefetched
+    
     # In a real implementation, this would fetch actual journal guidelines
     # from a database or by scraping the journal's website
     
@@ -98,22 +107,25 @@ async def write_document_section(ctx: Any, section: str, papers: List[Dict], cit
     """Write a section of the research document with proper citations"""
     # In a real implementation, this would use the LLM to generate content
     
+    # In-text citations come from the same bibliography as the reference list
+    in_text = render_bibliography(papers, citation_style).in_text
+    
     # Generate placeholder content based on section
     if section.lower() == "introduction":
         content = "This introduction provides context for the research question and outlines the paper structure."
-        citations = [papers[0]["citation"]] if papers else []
+        citations = [in_text[0]] if papers else []
     elif section.lower() == "literature review":
         content = "This literature review synthesizes existing research on the topic, identifying key themes and gaps."
-        citations = [p["citation"] for p in papers[:2]] if papers else []
+        citations = in_text[:2] if papers else []
     elif section.lower() == "methodology":
         content = "This methodology section details the research approach and data collection methods."
-        citations = [papers[1]["citation"]] if len(papers) > 1 else []
+        citations = [in_text[1]] if len(papers) > 1 else []
     elif section.lower() == "results" or section.lower() == "findings":
         content = "This section presents the key findings from the analysis."
         citations = []
     elif section.lower() == "discussion":
         content = "This discussion interprets the findings in light of existing literature and identifies implications."
-        citations = [p["citation"] for p in papers] if papers else []
+        citations = in_text
     elif section.lower() == "conclusion":
         content = "This conclusion summarizes key points and suggests directions for future research."
         citations = []
@@ -135,12 +147,20 @@ async def format_for_journal(ctx: Any, document_url: str, journal_name: str) ->
     # Get journal guidelines
     guidelines = await get_journal_guidelines(ctx, journal_name)
     
+    # Only sections changed since the last formatting pass need formatting
+    document = load_document(document_url)
+    changed_sections = sections_needing_formatting(document, guidelines)
+    if document.sections and not changed_sections:
+        return guidelines
+    
     # Use Computer Use to apply formatting
     await format_according_to_journal_style(
         browser_session,
         document_url,
-        guidelines
+        guidelines,
+        changed_sections if document.sections else None
     )
+    mark_formatted(document, guidelines)
     
     return guidelines
 
@@ -180,27 +200,29 @@ async def write_complete_document(ctx: Any, document_info: Dict, screened_papers
             journal_guidelines
         )
         written_sections.append(section_content)
+        emit(SectionDrafted(section=section_content.title, content=section_content.content))
     
-    # Use Computer Use to write content to the Google Doc
-    for section in written_sections:
-        await write_google_doc(
-            browser_session["page"],
-            document_url,
-            f"# {section.title}\n\n{section.content}\n\n"
-        )
-        
-    # If target journal specified, apply journal-specific formatting
-    if target_journal:
-        await format_for_journal(ctx, document_url, target_journal)
+    # Render the reference list locally in the target citation style
+    bibliography = render_bibliography(papers, citation_style)
+    references = "\n".join([f"- {reference}" for reference in bibliography.references])
     
-    # Generate reference list
-    references = "\n".join([f"- {p.get('citation', '')}" for p in papers])
-    await write_google_doc(
+    # Use Computer Use to write only the sections that changed since the last sync
+    await sync_google_doc(
         browser_session["page"],
         document_url,
-        f"# References\n\n{references}"
+        [(section.title, section.content) for section in written_sections] + [("References", references)]
     )
     
+    # If target journal specified, apply journal-specific formatting, unless the run is over budget
+    if target_journal:
+        budget = get_budget()
+        if budget is not None:
+            budget.check("format_for_journal")
+        if degraded(DEGRADE_SKIP_JOURNAL_FORMATTING):
+            print("Skipping journal formatting to stay within budget")
+        else:
+            await format_for_journal(ctx, document_url, target_journal)
+    
     # Calculate word count
     total_word_count = sum(len(s.content.split()) for s in written_sections)
     
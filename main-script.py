@@ -1,19 +1,30 @@
 import asyncio
 import os
+import uuid
 from dotenv import load_dotenv
 from openai import OpenAI
 from pydantic import BaseModel
 from agents import Agent, Runner, Tool, Handoff, input_guardrail, GuardrailFunctionOutput
 
-from agents.research_planner import create_research_planner
-from agents.library_agent import create_library_agent
-from agents.paper_agent import create_paper_agent
-from agents.document_agent import create_document_agent
-from agents.writing_agent import create_writing_agent
-from agents.journal_agent import create_journal_agent
+from agents.research_planner import create_research_planner, plan_research, ResearchPlan, PLAN_CACHE_NAMESPACE
+from agents.library_agent import create_library_agent, search_library, uncached_queries, LibrarySearchResults
+from agents.paper_agent import create_paper_agent, create_paper_index, evaluate_papers, ScreenedPapers
+from agents.document_agent import create_document_agent, create_research_document, DocumentInfo
+from agents.writing_agent import create_writing_agent, write_complete_document, get_journal_guidelines, WrittenDocument
+from agents.journal_agent import create_journal_agent, recommend_journals, JournalRecommendations
 
 from utils.security import security_guardrail, Credentials
 from utils.computer_use import initialize_browser
+from utils.workflow import Stage, run_workflow, make_context, WorkflowResult
+from utils.warmup import start_research_warmup
+from utils.semantic_cache import get_semantic_cache
+from utils.loop_monitor import start_loop_monitor
+from utils.progress import stream_progress, format_event, WorkflowFinished
+from utils.budget import (
+    WorkflowBudget, use_budget, reset_budget, degraded, BUDGET_SECONDS, BUDGET_TOKENS,
+    DEGRADE_FEWER_QUERIES, DEGRADED_MAX_QUERIES, DEGRADE_SMALLER_SHORTLIST, DEGRADED_SHORTLIST
+)
+from utils.boolean_query import normalize_queries
 
 # Load environment variables
 load_dotenv()
@@ -21,6 +32,9 @@ load_dotenv()
 # Initialize OpenAI client
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Sections of the research document created by the fixed workflow
+DOCUMENT_SECTIONS = ["Abstract", "Introduction", "Literature Review", "Methodology", "Results", "Discussion", "Conclusion"]
+
 
 class ResearchAssistant:
     """Main application class for the research assistant"""
@@ -103,41 +117,189 @@ class ResearchAssistant:
             input_guardrails=[security_guardrail]
         )
     
-    async def run_research_workflow(self, research_question, target_journal=None):
-        """Run the complete research workflow"""
+    async def _plan(self, ctx, inputs):
+        """Stage: turn the research question into a search plan"""
+        context = ctx.context
+        plan = await plan_research(self.research_planner, context["research_question"], context)
+        if not plan.search_queries:
+            ctx.context["warmup"].cancel("library_login", "the plan has no search queries")
+        return plan
+
+    async def _search(self, ctx, inputs):
+        """Stage: search the library with the plan's queries"""
+        context = ctx.context
+        warmup = context["warmup"]
+        context["browser_session"] = await warmup.result("browser")
+        
+        # Over budget, search only the first few distinct queries
+        queries = inputs["plan"].search_queries
+        if degraded(DEGRADE_FEWER_QUERIES):
+            queries = normalize_queries(queries)[:DEGRADED_MAX_QUERIES]
+        
+        # The speculative library login only matters if some query still needs the browser
+        if uncached_queries(queries):
+            await warmup.result_or_none("library_login")
+        else:
+            warmup.cancel("library_login", "every search is cached")
+        return await search_library(ctx, queries)
+
+    async def _screen(self, ctx, inputs):
+        """Stage: index the search results and evaluate them against the question"""
+        papers = ctx.context["paper_table"]
+        if degraded(DEGRADE_SMALLER_SHORTLIST):
+            ctx.context["screen_shortlist"] = DEGRADED_SHORTLIST
+        await create_paper_index(ctx, papers)
+        return await evaluate_papers(ctx, ctx.context["research_question"])
+
+    async def _document(self, ctx, inputs):
+        """Stage: create the Google Doc, in its own tab so it can run alongside the search"""
+        context = ctx.context
+        warmup = context["warmup"]
+        
+        # Use the tab the warm-up signed in to Google, or open one and sign in now
+        browser_session = await warmup.result_or_none("drive_login")
+        if browser_session is not None:
+            document_ctx = make_context({**context, "browser_session": browser_session, "google_logged_in": True})
+        else:
+            browser_session = dict(await warmup.result("browser"))
+            browser_session["page"] = await browser_session["context"].new_page()
+            document_ctx = make_context({**context, "browser_session": browser_session})
+        
+        document_info = await create_research_document(
+            document_ctx,
+            f"Literature Review: {inputs['plan'].research_question}",
+            DOCUMENT_SECTIONS
+        )
+        
+        # Later stages write through the tab that is logged into Google
+        context["google_logged_in"] = True
+        context["document"] = document_ctx.context["document"]
+        context["document_session"] = browser_session
+        return document_info
+
+    async def _write(self, ctx, inputs):
+        """Stage: write the screened papers into the document"""
+        context = ctx.context
+        target_journal = context["target_journal"]
+        if target_journal:
+            guidelines = await context["warmup"].result_or_none("journal_guidelines")
+            if guidelines is not None:
+                context["journal_guidelines"] = {target_journal: guidelines}
+        
+        document_ctx = make_context({**context, "browser_session": context["document_session"]})
+        return await write_complete_document(
+            document_ctx,
+            inputs["document"].model_dump(),
+            inputs["screen"].model_dump(),
+            target_journal=target_journal
+        )
+
+    async def _journal(self, ctx, inputs):
+        """Stage: recommend journals for the planned paper"""
+        plan = inputs["plan"]
+        return await recommend_journals(
+            ctx,
+            ", ".join(plan.key_concepts),
+            plan.research_question,
+            plan.research_approach
+        )
+
+    def research_stages(self):
+        """The fixed research workflow as a DAG of stages
+        
+        plan -> search -> screen -> write, with document creation and journal
+        recommendations running alongside the search as soon as the plan exists.
+        """
+        return [
+            Stage("plan", self._plan, output_type=ResearchPlan),
+            Stage("search", self._search, depends_on=["plan"], output_type=LibrarySearchResults),
+            Stage("screen", self._screen, depends_on=["search"], output_type=ScreenedPapers),
+            Stage("document", self._document, depends_on=["plan"], output_type=DocumentInfo),
+            Stage("write", self._write, depends_on=["screen", "document"], output_type=WrittenDocument),
+            Stage("journal", self._journal, depends_on=["plan"], output_type=JournalRecommendations, optional=True),
+        ]
+
+    async def run_research_workflow(self, research_question, target_journal=None,
+                                    max_seconds=BUDGET_SECONDS, max_tokens=BUDGET_TOKENS) -> WorkflowResult:
+        """Run the complete research workflow as a fixed DAG, without coordinator turns
+        
+        With max_seconds or max_tokens set, the run degrades step by step when it
+        is projected to overrun; every decision is in result.metadata["budget"].
+        """
+        # The fixed workflow has no coordinator turn, so run its guardrail before any login, search or model call
+        request_text = f"{research_question}\n{target_journal}" if target_journal else research_question
+        check = await security_guardrail(make_context({"credentials": self.credentials}), self.research_planner, request_text)
+        if check.tripwire_triggered:
+            raise ValueError(f"Research request rejected: {check.output_info.reason}")
+        
+        # Opt-in diagnostics: report code that blocks the event loop
+        loop_monitor = start_loop_monitor()
+        
+        # Track spend per stage; tasks started from here on charge this budget
+        budget = WorkflowBudget(max_seconds, max_tokens)
+        budget_token = use_budget(budget)
+        
+        # Launch the browser, sign in and fetch journal guidelines while the planner runs
+        warmup = start_research_warmup(
+            self.credentials,
+            target_journal,
+            lambda journal: get_journal_guidelines(make_context({}), journal)
+        )
+        # Vector stores and files created by this run are registered under this owner. They outlive
+        # the run so the catalog can reuse them, and expire after RESOURCE_TTL_DAYS, when the
+        # resource registry's garbage collector deletes them and drops them from the catalog.
+        resource_owner = f"research:{uuid.uuid4().hex[:12]}"
         try:
-            # Initialize browser for Computer Use
-            browser_session = await initialize_browser()
-            
-            # Create context with necessary data
+            # Create context with necessary data; stages take the browser session from the warm-up
             context = {
                 "credentials": self.credentials,
-                "browser_session": browser_session,
+                "browser_session": None,
                 "research_question": research_question,
-                "target_journal": target_journal
+                "target_journal": target_journal,
+                "warmup": warmup,
+                "resource_owner": resource_owner
             }
             
-            # Run the main agent
             print("Starting research workflow...")
+            result = await run_workflow(self.research_stages(), context)
+            result.metadata["warmup"] = warmup.finish()
+            result.metadata["plan_cache"] = get_semantic_cache(PLAN_CACHE_NAMESPACE).report()
+            result.metadata["budget"] = budget.report().model_dump()
+            if loop_monitor is not None:
+                result.metadata["loop_stalls"] = await loop_monitor.stop()
             
-            # If target journal is specified, include it in the prompt
-            if target_journal:
-                prompt = f"Conduct research on the following question: {research_question}. Format the final paper according to the style guidelines of {target_journal}."
-            else:
-                prompt = f"Conduct research on the following question: {research_question}"
-                
-            result = await Runner.run(
-                self.main_agent, 
-                prompt,
-                context=context
-            )
-            
-            print("\nResearch completed successfully!")
-            return result.final_output
+            print(f"\nResearch completed successfully in {result.total_seconds:.1f}s!")
+            return result
             
         except Exception as e:
             print(f"Error in research workflow: {e}")
             raise
+        finally:
+            # Cancel speculative work nobody needed
+            warmup.finish()
+            if loop_monitor is not None and not loop_monitor.stopped.is_set():
+                await loop_monitor.stop()
+            # Later work in this task (another run, an ad-hoc request) must not charge this run's budget
+            reset_budget(budget_token)
+
+
+    async def stream_research_workflow(self, research_question, target_journal=None):
+        """Run the research workflow, yielding typed progress events as they happen
+        
+        The last event is a WorkflowFinished carrying the WorkflowResult.
+        """
+        async for event in stream_progress(lambda: self.run_research_workflow(research_question, target_journal)):
+            yield event
+
+    async def handle_request(self, request, context=None):
+        """Send an ad-hoc request through the coordinator agent, which picks the handoffs itself"""
+        if context is None:
+            context = {
+                "credentials": self.credentials,
+                "browser_session": await initialize_browser()
+            }
+        result = await Runner.run(self.main_agent, request, context=context)
+        return result.final_output
 
 
 async def main():
@@ -152,12 +314,27 @@ async def main():
         target_journal = input("Enter the name of the target journal: ")
         print(f"Will format paper according to {target_journal} guidelines.")
     
-    # Create and run the research assistant
+    # Create and run the research assistant, showing progress as it happens
     assistant = ResearchAssistant()
-    result = await assistant.run_research_workflow(research_question, target_journal)
+    result = None
+    async for event in assistant.stream_research_workflow(research_question, target_journal):
+        line = format_event(event)
+        if line:
+            print(line)
+        if isinstance(event, WorkflowFinished):
+            result = event.result
     
-    print(f"Research Results: {result}")
-    print("Your document has been created in Google Drive.")
+    document = result.outputs["write"]
+    print(f"Research Results: {document.title} ({document.total_word_count} words, {document.citation_count} citations)")
+    for stage, timing in result.timings.items():
+        print(f"  {stage}: {timing.status} in {timing.finished - timing.started:.1f}s")
+    plan_cache = result.metadata["plan_cache"]
+    print(f"Plan cache: {plan_cache['hits']}/{plan_cache['lookups']} hits, {plan_cache['latency_saved_seconds']}s saved")
+    budget = result.metadata["budget"]
+    print(f"Spend: {budget['elapsed']}s, {budget['tokens']} tokens, {budget['screenshots']} screenshots")
+    for decision in budget["decisions"]:
+        print(f"  Degraded ({decision['step']}) at {decision['checkpoint']}: {decision['reason']}")
+    print(f"Your document has been created in Google Drive: {document.url}")
 
 if __name__ == "__main__":
     asyncio.run(main())
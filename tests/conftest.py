@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+import importlib.abc
+import importlib.util
+
+# Modules live in utils/<name>-final.py and are imported as utils.<name>
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UTILS_DIR = os.path.join(ROOT, "utils")
+
+
+class FinalModuleFinder(importlib.abc.MetaPathFinder):
+    """Resolve utils.<name> to utils/<name with hyphens>-final.py"""
+
+    def find_spec(self, fullname, path, target=None):
+        package, _, name = fullname.partition(".")
+        if package != "utils" or not name or "." in name:
+            return None
+        filename = os.path.join(UTILS_DIR, f"{name.replace('_', '-')}-final.py")
+        if not os.path.exists(filename):
+            return None
+        return importlib.util.spec_from_file_location(fullname, filename)
+
+
+# Module-level clients need a key to be constructed, but tests only ever talk to fakes;
+# caches go to a scratch directory, never the user's
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("SYNAPTHEUM_CACHE_DIR", tempfile.mkdtemp(prefix="synaptheum-test-"))
+
+# utils has no __init__.py here, so it imports as a namespace package without pulling in the browser stack
+sys.path.insert(0, ROOT)
+sys.meta_path.insert(0, FinalModuleFinder())
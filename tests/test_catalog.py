@@ -0,0 +1,30 @@
+from utils.catalog import PaperCatalog
+
+
+def test_upsert_fills_unknown_fields_and_keeps_known_ones():
+    catalog = PaperCatalog(":memory:")
+    catalog.upsert_paper({"title": "A Study", "year": 0, "authors": "Unknown Authors", "abstract": "Full abstract"})
+    catalog.upsert_paper({"title": "A Study", "year": 2021, "authors": "Smith", "abstract": "", "publication": "Unknown"})
+    catalog.upsert_paper({"title": "A Study", "year": 2021, "authors": "Jones", "publication": "Nature"})
+
+    entry = catalog.find({"title": "A Study", "year": 2021})
+    assert (entry["year"], entry["authors"], entry["abstract"], entry["publication"]) == (2021, "Smith", "Full abstract", "Nature")
+    assert catalog.connection.execute("SELECT COUNT(*) FROM papers").fetchone()[0] == 1
+
+
+def test_upsert_moves_file_location():
+    catalog = PaperCatalog(":memory:")
+    catalog.upsert_paper({"title": "A Study", "year": 2021, "local_path": "/old.pdf", "content_hash": "aa"})
+    catalog.upsert_paper({"title": "A Study", "year": 2021, "local_path": "/new.pdf", "content_hash": "bb"})
+
+    entry = catalog.find({"title": "A Study", "year": 2021})
+    assert (entry["local_path"], entry["content_hash"]) == ("/new.pdf", "bb")
+
+
+def test_search_treats_query_syntax_literally():
+    catalog = PaperCatalog(":memory:")
+    catalog.upsert_paper({"title": "COVID-19 and near-term outcomes", "year": 2021, "abstract": "Hospital (ICU) data"})
+
+    assert len(catalog.search('covid-19 "near')) == 1
+    assert len(catalog.search("(ICU")) == 1
+    assert catalog.search("NOT") == []
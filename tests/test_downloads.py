@@ -0,0 +1,28 @@
+import asyncio
+from utils.downloads import PdfDownloadManager
+from utils.library_extractor import SearchResult
+
+
+def make_result(title):
+    return SearchResult(title=title, authors="Smith", publication="Nature", year=2021, abstract="",
+                        url=f"https://example.org/{title}", pdf_url=f"https://example.org/{title}.pdf")
+
+
+def test_failed_papers_do_not_fail_the_others(tmp_path):
+    async def download_all():
+        manager = PdfDownloadManager(cache_dir=str(tmp_path))
+
+        async def download_url(url):
+            if url.endswith("full.pdf"):
+                raise OSError(28, "No space left on device")
+            if url.endswith("broken.pdf"):
+                raise ValueError("Unexpected response")
+            return str(tmp_path / "abc123.pdf")
+
+        manager.download_url = download_url
+        async with manager:
+            return await manager.download_all([make_result("full"), make_result("ok"), make_result("broken")])
+
+    full, ok, broken = asyncio.run(download_all())
+    assert not full.downloaded and not broken.downloaded
+    assert ok.downloaded and ok.content_hash == "abc123"
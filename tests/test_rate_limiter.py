@@ -0,0 +1,25 @@
+import asyncio
+import functools
+from utils.rate_limiter import ApiScheduler
+
+
+def test_wrapped_async_call_is_awaited():
+    calls = []
+
+    async def create(name):
+        calls.append(name)
+        return f"created {name}"
+
+    # A plain wrapper hides that the call is async
+    @functools.wraps(create)
+    def wrapped(*args, **kwargs):
+        return create(*args, **kwargs)
+
+    result = asyncio.run(ApiScheduler().call(wrapped, "file"))
+    assert result == "created file"
+    assert calls == ["file"]
+
+
+def test_sync_call_runs_in_a_thread():
+    result = asyncio.run(ApiScheduler().call(lambda value: value * 2, 21))
+    assert result == 42
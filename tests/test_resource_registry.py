@@ -0,0 +1,120 @@
+import time
+import asyncio
+import httpx
+import openai
+import pytest
+from utils.rate_limiter import reset_scheduler
+from utils.resource_registry import ResourceRegistry, collect_garbage, KIND_FILE, KIND_VECTOR_STORE
+
+
+@pytest.fixture(autouse=True)
+def fresh_scheduler():
+    """Each test runs its own event loop, so it needs a scheduler bound to that loop"""
+    reset_scheduler()
+    yield
+    reset_scheduler()
+
+
+class FakeResource:
+    """Fake of one OpenAI resource collection that records deletions"""
+
+    def __init__(self, missing=(), failing=()):
+        self.deleted = []
+        self.missing = set(missing)  # Ids that answer 404
+        self.failing = set(failing)  # Ids whose first deletion fails
+
+    def delete(self, resource_id):
+        if resource_id in self.missing:
+            request = httpx.Request("DELETE", f"https://api.openai.com/v1/{resource_id}")
+            raise openai.NotFoundError("Not found", response=httpx.Response(404, request=request), body=None)
+        if resource_id in self.failing:
+            self.failing.discard(resource_id)
+            raise RuntimeError(f"Could not delete {resource_id}")
+        self.deleted.append(resource_id)
+
+
+class FakeApi:
+    """Fake of the parts of the OpenAI client the garbage collector uses"""
+
+    def __init__(self, missing=(), failing=()):
+        self.files = FakeResource(missing, failing)
+        self.vector_stores = FakeResource(missing, failing)
+
+
+def make_registry():
+    """In-memory registry with one expired store and file, and one live store and file"""
+    registry = ResourceRegistry(":memory:")
+    registry.register(KIND_VECTOR_STORE, "vs_old", ttl_days=0)
+    registry.register(KIND_FILE, "file_old", parent_id="vs_old")
+    registry.register(KIND_VECTOR_STORE, "vs_new", ttl_days=7)
+    registry.register(KIND_FILE, "file_new", parent_id="vs_new")
+    time.sleep(0.01)
+    return registry
+
+
+def live_ids(registry):
+    return {resource["resource_id"] for resource in registry.live()}
+
+
+def test_dry_run_lists_expired_resources_without_deleting():
+    registry = make_registry()
+    api = FakeApi()
+    report = asyncio.run(collect_garbage(api, registry, dry_run=True))
+    assert report.dry_run
+    assert report.files == ["file_old"]
+    assert report.vector_stores == ["vs_old"]
+    assert api.files.deleted == [] and api.vector_stores.deleted == []
+    assert live_ids(registry) == {"vs_old", "file_old", "vs_new", "file_new"}
+
+
+def test_collection_deletes_files_of_expired_stores_first():
+    registry = make_registry()
+    api = FakeApi()
+    removed = []
+    report = asyncio.run(collect_garbage(api, registry, on_files_deleted=removed.extend))
+    assert api.files.deleted == ["file_old"]
+    assert api.vector_stores.deleted == ["vs_old"]
+    assert removed == ["file_old"]
+    assert report.failed == {}
+    assert live_ids(registry) == {"vs_new", "file_new"}
+
+
+def test_not_found_counts_as_deleted():
+    registry = make_registry()
+    api = FakeApi(missing={"file_old"})
+    report = asyncio.run(collect_garbage(api, registry))
+    assert report.files == ["file_old"]
+    assert report.failed == {}
+    assert "file_old" not in live_ids(registry)
+
+
+def test_failed_deletion_is_retried_by_the_next_collection():
+    registry = make_registry()
+    api = FakeApi(failing={"vs_old"})
+
+    async def collect_twice():
+        first = await collect_garbage(api, registry)
+        assert "vs_old" in live_ids(registry)
+        return first, await collect_garbage(api, registry)
+
+    first, second = asyncio.run(collect_twice())
+    assert set(first.failed) == {"vs_old"}
+    assert first.vector_stores == []
+    assert second.vector_stores == ["vs_old"]
+    assert second.failed == {}
+    assert live_ids(registry) == {"vs_new", "file_new"}
+
+
+def test_release_expires_only_that_owners_resources():
+    registry = ResourceRegistry(":memory:")
+    registry.register(KIND_VECTOR_STORE, "vs_run", owner="research:run")
+    registry.register(KIND_FILE, "file_run", owner="research:run", parent_id="vs_run")
+    registry.register(KIND_VECTOR_STORE, "vs_other", owner="research:other")
+    registry.release("research:run")
+    time.sleep(0.01)
+
+    api = FakeApi()
+    asyncio.run(collect_garbage(api, registry, owner="research:run"))
+    assert api.files.deleted == ["file_run"]
+    assert api.vector_stores.deleted == ["vs_run"]
+    assert live_ids(registry) == {"vs_other"}
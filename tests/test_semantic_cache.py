@@ -0,0 +1,35 @@
+import numpy as np
+from utils.semantic_cache import SemanticCache, key_terms, terms_match
+
+# Every entry gets the same unit embedding, so only the key-term rules decide a hit
+EMBEDDING = np.full(4, 0.5, dtype=np.float32)
+
+
+def make_cache(question):
+    cache = SemanticCache("test", path=":memory:")
+    cache.store(question, EMBEDDING, {"search_queries": ["exercise AND depression"]}, latency=2.0)
+    return cache
+
+
+def test_rephrased_question_hits():
+    cache = make_cache("What is the effect of exercise on depression in adults?")
+    hit = cache.lookup(EMBEDDING, "Effects of exercise on depression among adults")
+    assert hit is not None
+    assert hit.payload == {"search_queries": ["exercise AND depression"]}
+
+
+def test_swapped_key_term_misses():
+    cache = make_cache("Effects of exercise on depression in adults")
+    assert cache.lookup(EMBEDDING, "Effects of exercise on depression in children") is None
+
+
+def test_flipped_direction_misses():
+    cache = make_cache("Effect of exercise on sleep quality")
+    assert cache.lookup(EMBEDDING, "Effect of sleep quality on exercise") is None
+
+
+def test_terms_match_needs_overlap_and_order():
+    terms = key_terms("impact of social media use on adolescent anxiety")
+    assert terms_match(terms, key_terms("the impact of social media use on anxiety in adolescents"))
+    assert not terms_match(terms, key_terms("impact of adolescent anxiety on social media use"))
+    assert not terms_match(terms, key_terms("impact of video games on adolescent anxiety"))
@@ -0,0 +1,266 @@
+import re
+from functools import lru_cache
+from collections import defaultdict
+from pydantic import BaseModel
+from typing import List, Dict, Any, Callable, Tuple, Optional
+
+DEFAULT_STYLE = "APA"
+
+# Reference templates: {field} is substituted, [...] is dropped when a field inside it is empty.
+# Square brackets are reserved for optional segments, so numeric labels use {bracketed_number}.
+REFERENCE_TEMPLATES = {
+    "APA": "{authors} ({year}). {title}.[ *{publication}*.][ https://doi.org/{doi}]",
+    "Harvard": "{authors} ({year}) '{title}'[, *{publication}*].[ doi:{doi}.]",
+    "Chicago": "{authors}. {year}. \"{title}.\"[ *{publication}*.][ https://doi.org/{doi}.]",
+    "MLA": "{authors}. \"{title}.\"[ *{publication}*,] {year}.[ https://doi.org/{doi}.]",
+    "IEEE": "{bracketed_number} {authors}, \"{title},\"[ *{publication}*,] {year}.[ doi: {doi}.]",
+    "Vancouver": "{number}. {authors}. {title}.[ {publication}.] {year}.[ doi:{doi}]",
+}
+
+# In-text citation templates
+IN_TEXT_TEMPLATES = {
+    "APA": "({names}, {year})",
+    "Harvard": "({names} {year})",
+    "Chicago": "({names} {year})",
+    "MLA": "({names})",
+    "IEEE": "{bracketed_number}",
+    "Vancouver": "({number})",
+}
+
+# Styles that number references in order of first citation instead of sorting by author
+NUMERIC_STYLES = {"IEEE", "Vancouver"}
+
+STYLE_ALIASES = {
+    "apa": "APA", "harvard": "Harvard", "chicago": "Chicago", "turabian": "Chicago",
+    "mla": "MLA", "ieee": "IEEE", "vancouver": "Vancouver", "ama": "Vancouver", "nlm": "Vancouver",
+}
+
+FIELD_PATTERN = re.compile(r"\{(\w+)\}")
+OPTIONAL_PATTERN = re.compile(r"\[([^\[\]]*\{\w+\}[^\[\]]*)\]")
+
+
+class RenderedBibliography(BaseModel):
+    """Model for a rendered bibliography"""
+    style: str
+    in_text: List[str]  # In-text citation for each input paper, in input order
+    references: List[str]  # Reference list in the order the style prescribes
+
+
+def resolve_style(citation_style: Optional[str]) -> str:
+    """Map a free-form citation style name (e.g. "APA 7th edition") to a supported style"""
+    lowered = (citation_style or "").lower()
+    for alias, style in STYLE_ALIASES.items():
+        if alias in lowered:
+            return style
+    return DEFAULT_STYLE
+
+
+def compile_template(template: str) -> Callable[[Dict[str, str]], str]:
+    """Compile a template into a function that renders a dict of fields"""
+    parts: List[Tuple[bool, List[Any]]] = []
+    position = 0
+    for match in OPTIONAL_PATTERN.finditer(template):
+        parts.append((False, _compile_text(template[position:match.start()])))
+        parts.append((True, _compile_text(match.group(1))))
+        position = match.end()
+    parts.append((False, _compile_text(template[position:])))
+
+    def render(fields: Dict[str, str]) -> str:
+        out = []
+        for optional, pieces in parts:
+            if optional and any(is_field and not fields.get(value) for is_field, value in pieces):
+                continue
+            out.extend(fields.get(value, "") if is_field else value for is_field, value in pieces)
+        text = re.sub(r"\s+", " ", "".join(out)).strip()
+        # Fields that end in a period ("n.d.", "J.") must not double up with the template's
+        return re.sub(r"(?<!\.)\.\.(?!\.)", ".", text)
+
+    return render
+
+
+def _compile_text(text: str) -> List[Tuple[bool, str]]:
+    """Split template text into literal and field pieces"""
+    pieces = []
+    position = 0
+    for match in FIELD_PATTERN.finditer(text):
+        if match.start() > position:
+            pieces.append((False, text[position:match.start()]))
+        pieces.append((True, match.group(1)))
+        position = match.end()
+    if position < len(text):
+        pieces.append((False, text[position:]))
+    return pieces
+
+
+# Templates are compiled once at import
+COMPILED_REFERENCES = {style: compile_template(t) for style, t in REFERENCE_TEMPLATES.items()}
+COMPILED_IN_TEXT = {style: compile_template(t) for style, t in IN_TEXT_TEMPLATES.items()}
+
+
+def parse_authors(authors: str) -> Tuple[List[Tuple[str, str]], bool]:
+    """Split an author string into (family, given) pairs and an "et al." flag"""
+    authors = authors or ""
+    et_al = bool(re.search(r"\bet al\.?", authors, re.IGNORECASE))
+    authors = re.sub(r",?\s*\bet al\.?", "", authors, flags=re.IGNORECASE)
+
+    names = []
+    for raw in re.split(r";|&|\band\b", authors):
+        raw = raw.strip(" ,.")
+        if not raw or raw.lower() in ("unknown authors", "unknown"):
+            continue
+        if "," in raw:
+            family, given = [part.strip() for part in raw.split(",", 1)]
+        else:
+            tokens = raw.split()
+            family, given = tokens[-1], " ".join(tokens[:-1])
+        # Bare initials ("J", "J A") get their periods back
+        given = " ".join(f"{token}." if len(token) == 1 else token for token in given.split())
+        names.append((family, given))
+    return names, et_al
+
+
+def _initials(given: str, spaced: bool = True) -> str:
+    """Abbreviate given names to initials ("John Paul" -> "J. P.")"""
+    letters = [part[0] for part in re.split(r"[\s.\-]+", given) if part]
+    if spaced:
+        return " ".join(f"{letter}." for letter in letters)
+    return "".join(letters)
+
+
+def _join(items: List[str], final: str, serial_comma: bool = True) -> str:
+    """Join names with commas and a final conjunction"""
+    if len(items) <= 1:
+        return "".join(items)
+    if len(items) == 2:
+        return f"{items[0]}{',' if serial_comma and final == '&' else ''} {final} {items[1]}"
+    return ", ".join(items[:-1]) + f"{',' if serial_comma else ''} {final} {items[-1]}"
+
+
+def format_reference_authors(names: List[Tuple[str, str]], et_al: bool, style: str) -> str:
+    """Format the author list of a reference in a citation style"""
+    if not names:
+        return "Anonymous"
+    if style == "APA":
+        formatted = [f"{family}, {_initials(given)}".strip(", ") for family, given in names[:20]]
+        text = _join(formatted, "&")
+    elif style == "Harvard":
+        formatted = [f"{family}, {_initials(given)}".strip(", ") for family, given in names]
+        text = _join(formatted, "and", serial_comma=False)
+    elif style == "Chicago":
+        family, given = names[0]
+        formatted = [f"{family}, {given}".strip(", ")] + [f"{g} {f}".strip() for f, g in names[1:10]]
+        text = _join(formatted, "and")
+    elif style == "MLA":
+        family, given = names[0]
+        first = f"{family}, {given}".strip(", ")
+        if len(names) > 2 or et_al:
+            return f"{first}, et al."
+        text = _join([first] + [f"{g} {f}".strip() for f, g in names[1:]], "and")
+    elif style == "IEEE":
+        formatted = [f"{_initials(given)} {family}".strip() for family, given in names]
+        if len(formatted) > 6:
+            return f"{formatted[0]} et al."
+        text = _join(formatted, "and")
+    else:  # Vancouver
+        formatted = [f"{family} {_initials(given, spaced=False)}".strip() for family, given in names[:6]]
+        text = ", ".join(formatted)
+        if len(names) > 6:
+            text += ", et al."
+    if et_al and style == "IEEE":
+        text += " et al."
+    elif et_al and style != "MLA":
+        text += ", et al."
+    return text
+
+
+def format_in_text_names(names: List[Tuple[str, str]], et_al: bool, style: str) -> str:
+    """Format the author part of an author-date in-text citation"""
+    if not names:
+        return "Anonymous"
+    families = [family for family, _ in names]
+    if len(families) >= 3 or et_al:
+        return f"{families[0]} et al."
+    if len(families) == 2:
+        return f"{families[0]} {'&' if style == 'APA' else 'and'} {families[1]}"
+    return families[0]
+
+
+def paper_key(paper) -> Tuple[str, str, str, str, str]:
+    """Return the hashable identity used to memoize rendering"""
+    if hasattr(paper, "model_dump"):
+        paper = paper.model_dump()
+    return (
+        paper.get("title") or "Untitled",
+        paper.get("authors") or "",
+        str(paper.get("year") or "n.d."),
+        paper.get("publication") or "",
+        paper.get("doi") or "",
+    )
+
+
+@lru_cache(maxsize=65536)
+def _reference_fields(key: Tuple[str, str, str, str, str], style: str) -> Tuple[Tuple[str, str], ...]:
+    """Compute the style-specific fields of a paper once per (paper, style)"""
+    title, authors, year, publication, doi = key
+    names, et_al = parse_authors(authors)
+    return (
+        ("title", title.rstrip(".")),
+        ("authors", format_reference_authors(names, et_al, style)),
+        ("names", format_in_text_names(names, et_al, style)),
+        ("family", names[0][0].lower() if names else "anonymous"),
+        ("year", year if year != "0" else "n.d."),
+        ("publication", publication if publication != "Unknown" else ""),
+        ("doi", doi),
+    )
+
+
+def format_reference(paper, citation_style: str = DEFAULT_STYLE, number: int = 1) -> str:
+    """Render a single reference entry"""
+    style = resolve_style(citation_style)
+    fields = dict(_reference_fields(paper_key(paper), style))
+    fields["number"] = str(number)
+    fields["bracketed_number"] = f"[{number}]"
+    return COMPILED_REFERENCES[style](fields)
+
+
+def render_bibliography(papers: List[Any], citation_style: str = DEFAULT_STYLE) -> RenderedBibliography:
+    """Render matching in-text citations and a reference list for many papers at once"""
+    style = resolve_style(citation_style)
+
+    # Deduplicate papers while keeping first-citation order
+    keys: List[Tuple[str, str, str, str, str]] = []
+    positions: Dict[Tuple[str, str, str, str, str], int] = {}
+    paper_positions = []
+    for paper in papers:
+        key = paper_key(paper)
+        if key not in positions:
+            positions[key] = len(keys)
+            keys.append(key)
+        paper_positions.append(positions[key])
+    fields = [dict(_reference_fields(key, style)) for key in keys]
+
+    if style in NUMERIC_STYLES:
+        order = list(range(len(keys)))
+        for number, f in enumerate(fields, start=1):
+            f["number"] = str(number)
+            f["bracketed_number"] = f"[{number}]"
+    else:
+        order = sorted(range(len(keys)), key=lambda i: (fields[i]["family"], fields[i]["year"], fields[i]["title"].lower()))
+        # Disambiguate identical author-year citations with a, b, c suffixes
+        groups = defaultdict(list)
+        for i in order:
+            groups[(fields[i]["names"], fields[i]["year"])].append(i)
+        for members in groups.values():
+            if len(members) > 1:
+                for suffix, i in zip("abcdefghijklmnopqrstuvwxyz", members):
+                    fields[i]["year"] = f"{fields[i]['year']}{suffix}"
+
+    render_reference = COMPILED_REFERENCES[style]
+    render_in_text = COMPILED_IN_TEXT[style]
+    in_text_by_key = [render_in_text(f) for f in fields]
+
+    return RenderedBibliography(
+        style=style,
+        in_text=[in_text_by_key[position] for position in paper_positions],
+        references=[render_reference(fields[i]) for i in order]
+    )
@@ -0,0 +1,215 @@
+import re
+from typing import List, Tuple, FrozenSet, Optional
+
+# Conjunctions larger than this are not expanded for subsumption checks
+MAX_DNF_TERMS = 256
+
+OPERATORS = {"AND", "OR", "NOT"}
+TOKEN_PATTERN = re.compile(r'"([^"]*)"|(\()|(\))|([^\s()"]+)')
+
+# Parsed queries are nested tuples: ("term", text), ("not", node), ("and", children), ("or", children)
+Node = Tuple
+Literal = Tuple[str, bool]  # (term, positive)
+Dnf = FrozenSet[FrozenSet[Literal]]
+
+
+class QueryParseError(ValueError):
+    """Raised for queries with unbalanced parentheses or dangling operators"""
+
+
+def tokenize_query(text: str) -> List[Tuple[str, str]]:
+    """Split a query into (kind, value) tokens: term, op, lparen, rparen"""
+    tokens = []
+    for phrase, lparen, rparen, word in TOKEN_PATTERN.findall(text or ""):
+        if lparen:
+            tokens.append(("lparen", "("))
+        elif rparen:
+            tokens.append(("rparen", ")"))
+        elif word in OPERATORS:
+            # Operators must be upper case, as in the library's own search syntax
+            tokens.append(("op", word))
+        else:
+            term = " ".join((phrase if phrase or not word else word).lower().split())
+            if term:
+                tokens.append(("term", term))
+    return tokens
+
+
+def parse_query(text: str) -> Node:
+    """Parse a Boolean query; adjacent terms without an operator are ANDed"""
+    tokens = tokenize_query(text)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else (None, None)
+
+    def parse_or():
+        nonlocal position
+        children = [parse_and()]
+        while peek() == ("op", "OR"):
+            position += 1
+            children.append(parse_and())
+        return ("or", tuple(children)) if len(children) > 1 else children[0]
+
+    def parse_and():
+        nonlocal position
+        children = [parse_unary()]
+        while True:
+            kind, value = peek()
+            if (kind, value) == ("op", "AND"):
+                position += 1
+                children.append(parse_unary())
+            elif (kind, value) == ("op", "NOT") or kind in ("term", "lparen"):
+                # "a NOT b" and "a b" both mean a AND ...
+                children.append(parse_unary())
+            else:
+                break
+        return ("and", tuple(children)) if len(children) > 1 else children[0]
+
+    def parse_unary():
+        nonlocal position
+        kind, value = peek()
+        if (kind, value) == ("op", "NOT"):
+            position += 1
+            return ("not", parse_unary())
+        if kind == "lparen":
+            position += 1
+            node = parse_or()
+            if peek()[0] != "rparen":
+                raise QueryParseError(f"Unbalanced parentheses in query: {text}")
+            position += 1
+            return node
+        if kind == "term":
+            position += 1
+            return ("term", value)
+        raise QueryParseError(f"Unexpected {value or 'end of query'} in query: {text}")
+
+    if not tokens:
+        raise QueryParseError("Empty query")
+    node = parse_or()
+    if position != len(tokens):
+        raise QueryParseError(f"Unexpected {tokens[position][1]} in query: {text}")
+    return node
+
+
+def canonicalize(node: Node) -> Node:
+    """Flatten nested AND/OR, drop double negation and duplicates, and sort operands"""
+    kind = node[0]
+    if kind == "term":
+        return node
+    if kind == "not":
+        inner = canonicalize(node[1])
+        return inner[1] if inner[0] == "not" else ("not", inner)
+
+    children = set()
+    for child in (canonicalize(c) for c in node[1]):
+        if child[0] == kind:
+            children.update(child[1])
+        else:
+            children.add(child)
+    if len(children) == 1:
+        return children.pop()
+    return (kind, tuple(sorted(children, key=render_query)))
+
+
+def render_query(node: Node) -> str:
+    """Render a parsed query back into library search syntax"""
+    kind = node[0]
+    if kind == "term":
+        return f'"{node[1]}"' if " " in node[1] else node[1]
+    if kind == "not":
+        return f"NOT {_render_operand(node[1])}"
+    if kind == "or":
+        return " OR ".join(_render_operand(child) for child in node[1])
+    # Negated operands go last so they read as "a AND b NOT c"
+    positive = [child for child in node[1] if child[0] != "not"]
+    negative = [child for child in node[1] if child[0] == "not"]
+    text = " AND ".join(_render_operand(child) for child in positive)
+    for child in negative:
+        text = f"{text} NOT {_render_operand(child[1])}" if text else render_query(child)
+    return text
+
+
+def _render_operand(node: Node) -> str:
+    """Render a sub-query, parenthesised when it has operators of its own"""
+    text = render_query(node)
+    return f"({text})" if node[0] in ("and", "or") else text
+
+
+def canonical_query(text: str) -> str:
+    """Return the canonical form of a query, so equivalent spellings compare equal"""
+    return render_query(canonicalize(parse_query(text)))
+
+
+def to_dnf(node: Node) -> Optional[Dnf]:
+    """Expand a query into disjunctive normal form, or None when it would be too large"""
+    kind = node[0]
+    if kind == "term":
+        return frozenset([frozenset([(node[1], True)])])
+    if kind == "not":
+        inner = node[1]
+        if inner[0] == "term":
+            return frozenset([frozenset([(inner[1], False)])])
+        if inner[0] == "not":
+            return to_dnf(inner[1])
+        # De Morgan
+        flipped = "or" if inner[0] == "and" else "and"
+        return to_dnf((flipped, tuple(("not", child) for child in inner[1])))
+
+    parts = [to_dnf(child) for child in node[1]]
+    if any(part is None for part in parts):
+        return None
+    if kind == "or":
+        return _absorb(frozenset().union(*parts))
+
+    conjunctions = {frozenset()}
+    for part in parts:
+        conjunctions = {a | b for a in conjunctions for b in part}
+        # Drop contradictions (x AND NOT x)
+        conjunctions = {c for c in conjunctions if not any((term, not positive) in c for term, positive in c)}
+        if len(conjunctions) > MAX_DNF_TERMS:
+            return None
+    return _absorb(frozenset(conjunctions))
+
+
+def _absorb(dnf: Dnf) -> Dnf:
+    """Remove conjunctions implied by a smaller one (a OR (a AND b) == a)"""
+    return frozenset(c for c in dnf if not any(other < c for other in dnf))
+
+
+def implies(narrower: Dnf, broader: Dnf) -> bool:
+    """Whether every match of narrower also matches broader (sound, checked clause by clause)"""
+    return all(any(clause >= other for other in broader) for clause in narrower)
+
+
+def normalize_queries(queries: List[str]) -> List[str]:
+    """Canonicalize queries and drop duplicates and queries subsumed by a broader one
+
+    A query is subsumed when everything it matches is also matched by another
+    query in the list, so searching the broader query alone retrieves its results.
+    Queries that fail to parse are kept with their whitespace normalized.
+    """
+    parsed: List[Tuple[str, Optional[Dnf]]] = []
+    seen = set()
+    for query in queries:
+        try:
+            node = canonicalize(parse_query(query))
+            text, dnf = render_query(node), to_dnf(node)
+        except QueryParseError as e:
+            print(f"Keeping unparsed query as is: {e}")
+            text, dnf = " ".join(query.split()), None
+        if text and text not in seen:
+            seen.add(text)
+            parsed.append((text, dnf))
+
+    kept = []
+    for i, (text, dnf) in enumerate(parsed):
+        subsumed = dnf is not None and any(
+            other is not None and implies(dnf, other) and not (implies(other, dnf) and j > i)
+            for j, (_, other) in enumerate(parsed) if j != i
+        )
+        if subsumed:
+            print(f"Dropping query subsumed by a broader one: {text}")
+        else:
+            kept.append(text)
+    return kept
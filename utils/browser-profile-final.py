@@ -0,0 +1,294 @@
+import os
+import json
+import shutil
+import tempfile
+from urllib.parse import urlparse
+from pydantic import BaseModel
+from typing import Callable, List, Dict, Optional, Tuple
+from playwright.async_api import Playwright, BrowserContext, Page, Route
+
+# Browser state shared across runs
+CACHE_DIR = os.getenv("SYNAPTHEUM_CACHE_DIR", os.path.expanduser("~/.synaptheum"))
+BROWSER_STATE_PATH = os.path.join(CACHE_DIR, "browser-state.json")
+BROWSER_CACHE_DIR = os.path.join(CACHE_DIR, "browser-cache")
+
+# SYNAPTHEUM_HEADLESS=0 shows the browser window for debugging
+HEADLESS = os.getenv("SYNAPTHEUM_HEADLESS", "1").lower() not in ("0", "false", "no")
+
+# Resource types that are never needed to read or drive a page
+BLOCKED_RESOURCE_TYPES = ["image", "media", "font"]
+
+# Analytics, ads and tracking hosts blocked on every site
+BLOCKED_DOMAINS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "hotjar.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "newrelic.com",
+    "nr-data.net",
+    "segment.io",
+    "segment.com",
+    "optimizely.com",
+    "mouseflow.com",
+    "crazyegg.com",
+    "clarity.ms",
+    "siteimproveanalytics.com",
+    "qualtrics.com",
+    "altmetric.com",
+]
+
+# Third-party hosts a site may load; anything else off-site is blocked. Keys match the page's host.
+SITE_ALLOWLISTS = {
+    "ucalgary.ca": ["ucalgary.ca", "exlibrisgroup.com", "exlibris.com", "libkey.io", "thirdiron.com"],
+    "exlibrisgroup.com": ["ucalgary.ca", "exlibrisgroup.com", "exlibris.com", "libkey.io", "thirdiron.com"],
+    "accounts.google.com": ["google.com", "gstatic.com", "googleapis.com", "googleusercontent.com"],
+    "drive.google.com": ["google.com", "gstatic.com", "googleapis.com", "googleusercontent.com"],
+    "docs.google.com": ["google.com", "gstatic.com", "googleapis.com", "googleusercontent.com"],
+}
+
+# Resource types a site needs despite the global block. Google Docs draws its canvas with web fonts,
+# and Google's sign-in and Drive pages draw their buttons with Material icon fonts.
+RESOURCE_TYPE_EXCEPTIONS = {
+    "google.com": ["font"],
+}
+
+# URL patterns per resource type, used when request interception is off (Chrome's own blocklist, keeps the HTTP cache)
+RESOURCE_TYPE_PATTERNS = {
+    "image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico"],
+    "media": ["*.mp4", "*.webm", "*.mp3"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf"],
+}
+
+# Chromium features a scripted session has no use for
+CHROMIUM_ARGS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-domain-reliability",
+    "--disable-client-side-phishing-detection",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication,InterestFeedContentSuggestions",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-default-browser-check",
+    "--no-first-run",
+    "--password-store=basic",
+]
+
+
+class BrowserProfile(BaseModel):
+    """Model for how the automation browser is launched and what it is allowed to load"""
+    headless: bool = HEADLESS
+    viewport_width: int = 1280
+    viewport_height: int = 800
+    blocked_resource_types: List[str] = BLOCKED_RESOURCE_TYPES
+    blocked_domains: List[str] = BLOCKED_DOMAINS
+    site_allowlists: Dict[str, List[str]] = SITE_ALLOWLISTS
+    resource_type_exceptions: Dict[str, List[str]] = RESOURCE_TYPE_EXCEPTIONS
+    # Playwright turns off the HTTP cache while routes are active, so by default pages are filtered with
+    # Chrome's URL blocklist, which keeps the disk cache but cannot enforce site_allowlists.
+    # True routes every request through should_block for exact per-request decisions.
+    intercept_requests: bool = False
+    # Cookies and local storage carried between runs; None starts every run signed out
+    storage_state_path: Optional[str] = BROWSER_STATE_PATH
+    disk_cache_dir: Optional[str] = BROWSER_CACHE_DIR
+    disk_cache_size_mb: int = 256
+    chromium_args: List[str] = CHROMIUM_ARGS
+
+
+# Lean default, and a full-fidelity headed profile for debugging
+LEAN_PROFILE = BrowserProfile()
+DEBUG_PROFILE = BrowserProfile(
+    headless=False,
+    blocked_resource_types=[],
+    blocked_domains=[],
+    site_allowlists={},
+    intercept_requests=False,
+    storage_state_path=None,
+)
+
+
+def _host_matches(host: str, domain: str) -> bool:
+    """Whether host is domain or one of its subdomains"""
+    return host == domain or host.endswith("." + domain)
+
+
+def _site_setting(settings: Dict[str, List[str]], site: str) -> Optional[List[str]]:
+    """Return the setting for the most specific key matching a site host"""
+    matches = [key for key in settings if _host_matches(site, key)]
+    return settings[max(matches, key=len)] if matches else None
+
+
+def should_block(profile: BrowserProfile, site: str, url: str, resource_type: str) -> bool:
+    """Decide whether a request made from a page on site should be blocked"""
+    host = (urlparse(url).hostname or "").lower()
+    if not host:
+        # data:, blob: and similar never touch the network
+        return False
+
+    if resource_type in profile.blocked_resource_types:
+        if resource_type not in (_site_setting(profile.resource_type_exceptions, site) or []):
+            return True
+
+    if any(_host_matches(host, domain) for domain in profile.blocked_domains):
+        return True
+
+    allowlist = _site_setting(profile.site_allowlists, site)
+    if allowlist is not None and not _host_matches(host, site):
+        return not any(_host_matches(host, domain) for domain in allowlist)
+    return False
+
+
+def blocked_url_patterns(profile: BrowserProfile, site: str) -> List[str]:
+    """Chrome blocklist patterns for pages on a site: blocked resource types less its exceptions, and blocked domains"""
+    exceptions = _site_setting(profile.resource_type_exceptions, site) or []
+    patterns = [
+        pattern
+        for resource_type in profile.blocked_resource_types if resource_type not in exceptions
+        for pattern in RESOURCE_TYPE_PATTERNS.get(resource_type, [])
+    ]
+    patterns += [f"*://*.{domain}/*" for domain in profile.blocked_domains]
+    patterns += [f"*://{domain}/*" for domain in profile.blocked_domains]
+    return patterns
+
+
+def _request_site(route: Route) -> str:
+    """Return the host of the page that made a request"""
+    request = route.request
+    try:
+        page_url = request.frame.page.url
+    except Exception:
+        # Service worker requests have no frame
+        page_url = ""
+    if not page_url or page_url == "about:blank":
+        page_url = request.url
+    return (urlparse(page_url).hostname or "").lower()
+
+
+async def apply_request_blocking(context: BrowserContext, profile: BrowserProfile) -> Dict[str, int]:
+    """Block heavy and off-site resources in every page of a context, returning live request counts"""
+    stats = {"allowed": 0, "blocked": 0}
+
+    if profile.intercept_requests:
+        async def handle(route: Route):
+            request = route.request
+            # Top-level navigations are always allowed; they decide which site's rules apply
+            if request.is_navigation_request() and request.frame.parent_frame is None:
+                stats["allowed"] += 1
+                await route.continue_()
+                return
+            if should_block(profile, _request_site(route), request.url, request.resource_type):
+                stats["blocked"] += 1
+                await route.abort("blockedbyclient")
+            else:
+                stats["allowed"] += 1
+                await route.continue_()
+
+        await context.route("**/*", handle)
+        return stats
+
+    # Without interception, hand Chrome a blocklist so its HTTP cache stays on; it is swapped
+    # whenever a page starts loading another site, so site exceptions still apply
+    async def block_urls(page: Page):
+        session = await context.new_cdp_session(page)
+        await session.send("Network.enable")
+        current = {"site": None}
+
+        async def use_site(url: str):
+            site = (urlparse(url).hostname or "").lower()
+            if site == current["site"]:
+                return
+            current["site"] = site
+            await session.send("Network.setBlockedURLs", {"urls": blocked_url_patterns(profile, site)})
+
+        async def on_request(request):
+            if request.is_navigation_request() and request.frame == page.main_frame:
+                await use_site(request.url)
+
+        await use_site(page.url)
+        page.on("request", on_request)
+
+    for page in context.pages:
+        await block_urls(page)
+    context.on("page", block_urls)
+    return stats
+
+
+def _disk_cache_dir(profile: BrowserProfile) -> Tuple[Optional[str], Callable[[], None]]:
+    """Shared disk cache for one browser at a time; concurrent browsers get a private one
+
+    Returns the directory and a function to call once the browser has closed,
+    which releases the shared cache or deletes the private one.
+    """
+    if not profile.disk_cache_dir:
+        return None, lambda: None
+    os.makedirs(profile.disk_cache_dir, exist_ok=True)
+    lock = None
+    try:
+        import fcntl
+        # Chromium's cache cannot be shared between browsers, so the shared one is locked while in use
+        lock = open(os.path.join(profile.disk_cache_dir, ".lock"), "w")
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return profile.disk_cache_dir, lock.close
+    except (ImportError, OSError):
+        if lock is not None:
+            lock.close()
+        private_dir = tempfile.mkdtemp(prefix="synaptheum-cache-")
+        return private_dir, lambda: shutil.rmtree(private_dir, ignore_errors=True)
+
+
+async def launch_browser_context(playwright: Playwright, profile: BrowserProfile = LEAN_PROFILE):
+    """Launch Chromium with a profile and return (browser, context, request stats)
+
+    Every run gets its own browser and context, so concurrent runs never
+    contend for a profile lock. Sign-ins carry over through the saved
+    storage state instead of a shared user data directory.
+    """
+    args = list(profile.chromium_args)
+    cache_dir, release_cache = _disk_cache_dir(profile)
+    if cache_dir:
+        args += [f"--disk-cache-dir={cache_dir}", f"--disk-cache-size={profile.disk_cache_size_mb * 1024 * 1024}"]
+    viewport = {"width": profile.viewport_width, "height": profile.viewport_height}
+
+    try:
+        browser = await playwright.chromium.launch(headless=profile.headless, args=args)
+    except Exception:
+        release_cache()
+        raise
+    browser.on("disconnected", lambda _: release_cache())
+    storage_state = None
+    if profile.storage_state_path and os.path.exists(profile.storage_state_path):
+        storage_state = profile.storage_state_path
+    try:
+        context = await browser.new_context(viewport=viewport, storage_state=storage_state)
+    except Exception as e:
+        # A corrupt state file only costs a fresh sign-in
+        print(f"Ignoring saved browser state: {e}")
+        context = await browser.new_context(viewport=viewport)
+
+    stats = await apply_request_blocking(context, profile)
+    return browser, context, stats
+
+
+async def save_browser_state(context: BrowserContext, profile: BrowserProfile = LEAN_PROFILE):
+    """Save a context's cookies and local storage so the next run starts signed in"""
+    if not profile.storage_state_path:
+        return
+    state = await context.storage_state()
+    os.makedirs(os.path.dirname(profile.storage_state_path), exist_ok=True)
+    # Write and rename, so a concurrent launch never reads a half-written file. The state holds
+    # sign-in cookies, so only the owner may read it.
+    temp_path = f"{profile.storage_state_path}.{os.getpid()}.tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(state, f)
+    os.replace(temp_path, profile.storage_state_path)
@@ -0,0 +1,269 @@
+import os
+import time
+import contextvars
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Tuple
+from utils.progress import current_stage
+
+# Default limits for a research run; unset means unlimited
+BUDGET_SECONDS = float(os.getenv("SYNAPTHEUM_BUDGET_SECONDS", "0")) or None
+BUDGET_TOKENS = int(os.getenv("SYNAPTHEUM_BUDGET_TOKENS", "0")) or None
+
+# Degradation steps, applied one per checkpoint in this order while a run is projected to overrun
+DEGRADE_FEWER_QUERIES = "fewer_queries"
+DEGRADE_SCREENSHOTS = "lower_resolution_screenshots"
+DEGRADE_SMALLER_SHORTLIST = "smaller_shortlist"
+DEGRADE_SKIP_JOURNAL_FORMATTING = "skip_journal_formatting"
+DEGRADATION_ORDER = [
+    DEGRADE_FEWER_QUERIES,
+    DEGRADE_SCREENSHOTS,
+    DEGRADE_SMALLER_SHORTLIST,
+    DEGRADE_SKIP_JOURNAL_FORMATTING,
+]
+
+# Where each step takes effect. A step is skipped once its targets have started (or, for steps
+# that act while a stage runs, finished), since it can no longer change anything.
+STEP_TARGETS = {
+    DEGRADE_FEWER_QUERIES: ["search"],
+    DEGRADE_SCREENSHOTS: ["search", "document", "write"],
+    DEGRADE_SMALLER_SHORTLIST: ["screen"],
+    DEGRADE_SKIP_JOURNAL_FORMATTING: ["format_for_journal"],
+}
+STEPS_WHILE_RUNNING = {DEGRADE_SCREENSHOTS}
+
+# Settings once a step is applied
+DEGRADED_MAX_QUERIES = 2
+DEGRADED_SCREENSHOT_QUALITY = 50  # JPEG instead of PNG
+DEGRADED_SHORTLIST = 6
+
+# Spend outside any stage (e.g. the warm-up) is charged here
+UNSTAGED = "other"
+
+
+class StageEstimate(BaseModel):
+    """Model for the expected cost of one stage"""
+    seconds: float
+    tokens: int
+    critical: bool = True  # On the plan -> search -> screen -> write path, so it adds to the run time
+
+
+# Expected cost of each research stage; projections scale these by how finished stages compared
+STAGE_ESTIMATES = {
+    "plan": StageEstimate(seconds=20, tokens=3000),
+    "search": StageEstimate(seconds=180, tokens=30000),
+    "screen": StageEstimate(seconds=90, tokens=40000),
+    "document": StageEstimate(seconds=60, tokens=15000, critical=False),
+    "journal": StageEstimate(seconds=20, tokens=3000, critical=False),
+    "write": StageEstimate(seconds=240, tokens=40000),
+}
+
+# Bounds on how far observed speed can scale the remaining estimates
+MIN_SCALE = 0.25
+MAX_SCALE = 4.0
+
+
+class StageSpend(BaseModel):
+    """Model for what one stage has used so far"""
+    seconds: float = 0.0
+    tokens: int = 0
+    screenshots: int = 0
+    screenshot_bytes: int = 0
+    started: Optional[float] = None
+    finished: bool = False
+
+
+class BudgetDecision(BaseModel):
+    """Model for one degradation step and why it was taken"""
+    step: str
+    checkpoint: str
+    reason: str
+    elapsed: float
+    tokens: int
+    projected_seconds: float
+    projected_tokens: int
+
+
+class BudgetReport(BaseModel):
+    """Model for a run's spend against its budget"""
+    max_seconds: Optional[float]
+    max_tokens: Optional[int]
+    elapsed: float
+    tokens: int
+    screenshots: int
+    stages: Dict[str, StageSpend]
+    decisions: List[BudgetDecision]
+
+
+class WorkflowBudget:
+    """Time and token budget for one workflow run, with ordered graceful degradation
+
+    Spend is charged to the stage of the task that incurred it. At each
+    checkpoint (every stage start, and before journal formatting) that has
+    new information (a stage finished or more tokens spent), the run is
+    projected to completion: elapsed time plus the remaining critical-path
+    estimates, and tokens spent plus the remaining estimates, both scaled by
+    how the finished stages compared to their estimates. While the projection
+    overruns a limit, the first step of DEGRADATION_ORDER that can still take
+    effect is applied.
+    """
+
+    def __init__(self, max_seconds: Optional[float] = BUDGET_SECONDS, max_tokens: Optional[int] = BUDGET_TOKENS,
+                 estimates: Optional[Dict[str, StageEstimate]] = None):
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.estimates = estimates or STAGE_ESTIMATES
+        self.started = time.monotonic()
+        self.stages: Dict[str, StageSpend] = {}
+        self.applied: List[str] = []
+        self.passed: set = set()  # Checkpoints already reached
+        self.last_checked: Optional[Tuple] = None
+        self.decisions: List[BudgetDecision] = []
+
+    def _stage(self, name: Optional[str]) -> StageSpend:
+        return self.stages.setdefault(name or UNSTAGED, StageSpend())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def tokens(self) -> int:
+        return sum(spend.tokens for spend in self.stages.values())
+
+    def charge_tokens(self, tokens: int, stage: Optional[str] = None):
+        """Record model tokens used by the current (or given) stage"""
+        self._stage(stage or current_stage()).tokens += tokens
+
+    def charge_screenshot(self, size: int, stage: Optional[str] = None):
+        """Record a screenshot of size bytes taken by the current (or given) stage"""
+        spend = self._stage(stage or current_stage())
+        spend.screenshots += 1
+        spend.screenshot_bytes += size
+
+    def start_stage(self, name: str):
+        """Mark a stage as running and check the budget before it does any work"""
+        self._stage(name).started = time.monotonic()
+        self.check(name)
+
+    def finish_stage(self, name: str):
+        """Mark a stage as done, fixing its duration"""
+        spend = self._stage(name)
+        if spend.started is not None:
+            spend.seconds = time.monotonic() - spend.started
+        spend.finished = True
+
+    def degraded(self, step: str) -> bool:
+        """Whether a degradation step is in effect"""
+        return step in self.applied
+
+    def _scales(self) -> Tuple[float, float]:
+        """How much slower and costlier finished stages were than estimated"""
+        done = [name for name, spend in self.stages.items() if spend.finished and name in self.estimates]
+        estimated_seconds = sum(self.estimates[name].seconds for name in done)
+        estimated_tokens = sum(self.estimates[name].tokens for name in done)
+        time_scale = sum(self.stages[name].seconds for name in done) / estimated_seconds if estimated_seconds else 1.0
+        token_scale = sum(self.stages[name].tokens for name in done) / estimated_tokens if estimated_tokens else 1.0
+        clamp = lambda value: min(MAX_SCALE, max(MIN_SCALE, value))
+        return clamp(time_scale), clamp(token_scale)
+
+    def projection(self) -> Tuple[float, int]:
+        """Projected total seconds and tokens for the whole run"""
+        time_scale, token_scale = self._scales()
+        now = time.monotonic()
+        seconds = self.elapsed()
+        tokens = self.tokens()
+        for name, estimate in self.estimates.items():
+            spend = self.stages.get(name) or StageSpend()
+            if spend.finished:
+                continue
+            running = now - spend.started if spend.started is not None else 0.0
+            if estimate.critical:
+                seconds += max(estimate.seconds * time_scale - running, 0.0)
+            tokens += max(int(estimate.tokens * token_scale) - spend.tokens, 0)
+        return seconds, tokens
+
+    def _can_help(self, step: str, checkpoint: str) -> bool:
+        """Whether a step can still take effect at this checkpoint"""
+        for target in STEP_TARGETS[step]:
+            if step in STEPS_WHILE_RUNNING:
+                spend = self.stages.get(target)
+                if spend is None or not spend.finished:
+                    return True
+            elif target == checkpoint or target not in self.passed:
+                return True
+        return False
+
+    def check(self, checkpoint: str) -> Optional[BudgetDecision]:
+        """Apply the next useful degradation step if the run is projected to overrun"""
+        try:
+            return self._check(checkpoint)
+        finally:
+            self.passed.add(checkpoint)
+
+    def _check(self, checkpoint: str) -> Optional[BudgetDecision]:
+        # Stages starting together (e.g. document and journal right after plan) share one projection
+        state = (frozenset(name for name, spend in self.stages.items() if spend.finished), self.tokens())
+        if state == self.last_checked:
+            return None
+        self.last_checked = state
+        
+        steps = [step for step in DEGRADATION_ORDER if step not in self.applied and self._can_help(step, checkpoint)]
+        if not steps:
+            return None
+        projected_seconds, projected_tokens = self.projection()
+        reasons = []
+        if self.max_seconds is not None and projected_seconds > self.max_seconds:
+            reasons.append(f"projected {projected_seconds:.0f}s > {self.max_seconds:.0f}s")
+        if self.max_tokens is not None and projected_tokens > self.max_tokens:
+            reasons.append(f"projected {projected_tokens} tokens > {self.max_tokens}")
+        if not reasons:
+            return None
+
+        decision = BudgetDecision(
+            step=steps[0],
+            checkpoint=checkpoint,
+            reason="; ".join(reasons),
+            elapsed=round(self.elapsed(), 1),
+            tokens=self.tokens(),
+            projected_seconds=round(projected_seconds, 1),
+            projected_tokens=projected_tokens
+        )
+        self.applied.append(decision.step)
+        self.decisions.append(decision)
+        print(f"Budget: {decision.step} at {checkpoint} ({decision.reason})")
+        return decision
+
+    def report(self) -> BudgetReport:
+        """Spend per stage and every degradation decision"""
+        return BudgetReport(
+            max_seconds=self.max_seconds,
+            max_tokens=self.max_tokens,
+            elapsed=round(self.elapsed(), 1),
+            tokens=self.tokens(),
+            screenshots=sum(spend.screenshots for spend in self.stages.values()),
+            stages={name: spend.model_copy() for name, spend in self.stages.items()},
+            decisions=list(self.decisions)
+        )
+
+
+# Like progress events, the budget follows the tasks of the run it was set for
+_budget: contextvars.ContextVar[Optional[WorkflowBudget]] = contextvars.ContextVar("workflow_budget", default=None)
+
+
+def use_budget(budget: Optional[WorkflowBudget]) -> contextvars.Token:
+    """Attach a budget to the current task and the tasks it starts, returning a token for reset_budget"""
+    return _budget.set(budget)
+
+
+def reset_budget(token: contextvars.Token):
+    """Detach a budget attached by use_budget, restoring whatever was there before"""
+    _budget.reset(token)
+
+
+def get_budget() -> Optional[WorkflowBudget]:
+    """The budget of the running workflow, if any"""
+    return _budget.get()
+
+
+def degraded(step: str) -> bool:
+    """Whether the running workflow has applied a degradation step"""
+    budget = _budget.get()
+    return budget is not None and budget.degraded(step)
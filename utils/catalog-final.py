@@ -0,0 +1,307 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+from utils.dedup import normalize_text
+from utils.lexical_index import tokenize
+
+# Location of the persistent paper catalog
+CACHE_DIR = os.getenv("SYNAPTHEUM_CACHE_DIR", os.path.expanduser("~/.synaptheum"))
+CATALOG_PATH = os.path.join(CACHE_DIR, "catalog.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    doi TEXT,
+    normalized_title TEXT NOT NULL,
+    title TEXT NOT NULL,
+    authors TEXT,
+    publication TEXT,
+    year INTEGER,
+    abstract TEXT,
+    url TEXT,
+    pdf_url TEXT,
+    local_path TEXT,
+    content_hash TEXT,
+    extraction_status TEXT NOT NULL DEFAULT 'pending',
+    chunk_count INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_papers_doi ON papers(doi) WHERE doi IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_papers_title ON papers(normalized_title);
+CREATE INDEX IF NOT EXISTS idx_papers_year ON papers(year);
+CREATE INDEX IF NOT EXISTS idx_papers_publication ON papers(publication);
+CREATE INDEX IF NOT EXISTS idx_papers_content_hash ON papers(content_hash);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, abstract, content='papers', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts(rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_fts_update AFTER UPDATE OF title, abstract ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+    INSERT INTO papers_fts(rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+END;
+
+CREATE TABLE IF NOT EXISTS vector_files (
+    file_id TEXT PRIMARY KEY,
+    paper_id INTEGER NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    vector_store_id TEXT NOT NULL,
+    section TEXT,
+    chunk INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vector_files_paper ON vector_files(paper_id);
+CREATE INDEX IF NOT EXISTS idx_vector_files_store ON vector_files(vector_store_id);
+
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY,
+    paper_id INTEGER NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    research_question TEXT NOT NULL,
+    relevance_score REAL,
+    quality_score REAL,
+    evaluation_json TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_evaluations_paper ON evaluations(paper_id);
+"""
+
+# Paper fields copied into the catalog when present
+PAPER_FIELDS = ("title", "authors", "publication", "year", "abstract", "url", "pdf_url", "local_path", "content_hash")
+
+# Where the paper's file is now; a newer record always wins, since the file may have moved or been downloaded again
+FILE_FIELDS = ("local_path", "content_hash")
+
+# Placeholders search results use for unknown values; they never overwrite, and are always filled in
+UNKNOWN_VALUES = ("", "unknown", "unknown title", "unknown authors", "n/a")
+
+
+def _is_unknown(field: str, value: Any) -> bool:
+    """Whether a field value carries no information (missing, a placeholder, or year 0)"""
+    if value is None:
+        return True
+    if field == "year":
+        return not value
+    return isinstance(value, str) and value.strip().lower() in UNKNOWN_VALUES
+
+
+def _fill_clause(column: str) -> str:
+    """SQL assignment that only replaces a column while it is unknown"""
+    if column in FILE_FIELDS:
+        return f"{column} = ?"
+    if column == "year":
+        return f"{column} = CASE WHEN {column} IS NULL OR {column} = 0 THEN ? ELSE {column} END"
+    unknown = ", ".join(f"'{value}'" for value in UNKNOWN_VALUES)
+    return f"{column} = CASE WHEN {column} IS NULL OR lower(trim({column})) IN ({unknown}) THEN ? ELSE {column} END"
+
+
+def _as_dict(paper) -> Dict[str, Any]:
+    """Accept a pydantic model or a plain dict"""
+    return paper.model_dump() if hasattr(paper, "model_dump") else dict(paper)
+
+
+class PaperCatalog:
+    """Persistent SQLite catalog of papers, their files, vector-store entries and evaluations"""
+
+    def __init__(self, path: str = CATALOG_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The process-wide catalog allows use from any thread (check_same_thread=False), so every
+        # read and write takes the lock; reentrant because lookups such as vector_files call find and get
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        self.connection.close()
+
+    def _find_id(self, paper: Dict[str, Any]) -> Optional[int]:
+        """Find a paper by DOI, then by normalized title and year"""
+        if paper.get("doi"):
+            row = self.connection.execute("SELECT id FROM papers WHERE doi = ?", (paper["doi"].lower(),)).fetchone()
+            if row:
+                return row["id"]
+        row = self.connection.execute(
+            "SELECT id FROM papers WHERE normalized_title = ? AND (year = ? OR ? = 0 OR COALESCE(year, 0) = 0) "
+            "ORDER BY id LIMIT 1",
+            (normalize_text(paper.get("title", "")), paper.get("year") or 0, paper.get("year") or 0)
+        ).fetchone()
+        return row["id"] if row else None
+
+    def _upsert(self, paper: Dict[str, Any]) -> int:
+        """Insert a paper, or fill in the fields its entry does not know yet without overwriting known ones"""
+        now = time.time()
+        values = {field: paper.get(field) for field in PAPER_FIELDS if not _is_unknown(field, paper.get(field))}
+        doi = paper["doi"].lower() if paper.get("doi") else None
+        paper_id = self._find_id(paper)
+
+        if paper_id is None:
+            # The title is required even when it is only a placeholder
+            values.setdefault("title", paper.get("title") or "Unknown Title")
+            columns = ["doi", "normalized_title", "created_at", "updated_at"] + list(values)
+            cursor = self.connection.execute(
+                f"INSERT INTO papers ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                [doi, normalize_text(paper.get("title", "")), now, now] + list(values.values())
+            )
+            return cursor.lastrowid
+
+        if doi and not self.connection.execute("SELECT 1 FROM papers WHERE doi = ?", (doi,)).fetchone():
+            values["doi"] = doi
+        # A later, sparser record of the same paper (e.g. a search result without an abstract) keeps what is known
+        assignments = ", ".join(_fill_clause(column) for column in values)
+        self.connection.execute(
+            f"UPDATE papers SET {assignments}{', ' if assignments else ''}updated_at = ? WHERE id = ?",
+            list(values.values()) + [now, paper_id]
+        )
+        return paper_id
+
+    def upsert_paper(self, paper) -> int:
+        """Add or update one paper and return its catalog id"""
+        return self.upsert_papers([paper])[0]
+
+    def upsert_papers(self, papers) -> List[int]:
+        """Add or update many papers in one transaction"""
+        with self.lock, self.connection:
+            return [self._upsert(_as_dict(paper)) for paper in papers]
+
+    def get(self, paper_id: int) -> Optional[Dict[str, Any]]:
+        """Return a paper by id"""
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM papers WHERE id = ?", (paper_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find(self, paper) -> Optional[Dict[str, Any]]:
+        """Return the catalog entry matching a paper's DOI or title"""
+        with self.lock:
+            paper_id = self._find_id(_as_dict(paper))
+            return self.get(paper_id) if paper_id is not None else None
+
+    def find_by_doi(self, doi: str) -> Optional[Dict[str, Any]]:
+        """Return the paper with a DOI"""
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM papers WHERE doi = ?", (doi.lower(),)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over titles and abstracts, best matches first
+
+        The query is split into terms and each is quoted, so punctuation and
+        words such as AND, NOT or NEAR are matched literally rather than
+        parsed as FTS5 syntax.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        match = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT papers.* FROM papers_fts JOIN papers ON papers.id = papers_fts.rowid "
+                "WHERE papers_fts MATCH ? ORDER BY bm25(papers_fts) LIMIT ?",
+                (match, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def query(self, year_from: int = None, year_to: int = None, publication: str = None,
+              downloaded: bool = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Filter papers by year range, publication and download state"""
+        clauses, params = [], []
+        if year_from is not None:
+            clauses.append("year >= ?")
+            params.append(year_from)
+        if year_to is not None:
+            clauses.append("year <= ?")
+            params.append(year_to)
+        if publication is not None:
+            clauses.append("publication = ?")
+            params.append(publication)
+        if downloaded is not None:
+            clauses.append("local_path IS NOT NULL" if downloaded else "local_path IS NULL")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT * FROM papers {where} ORDER BY year DESC, id LIMIT ?", params + [limit]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def record_extraction(self, paper, status: str, chunk_count: int = None):
+        """Record the text extraction status of a paper's PDF"""
+        with self.lock, self.connection:
+            paper_id = self._upsert(_as_dict(paper))
+            self.connection.execute(
+                "UPDATE papers SET extraction_status = ?, chunk_count = ?, updated_at = ? WHERE id = ?",
+                (status, chunk_count, time.time(), paper_id)
+            )
+
+    def record_vector_file(self, paper, vector_store_id: str, file_id: str, section: str = None, chunk: int = None):
+        """Record a file uploaded to a vector store for a paper"""
+        with self.lock, self.connection:
+            paper_id = self._upsert(_as_dict(paper))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO vector_files (file_id, paper_id, vector_store_id, section, chunk, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (file_id, paper_id, vector_store_id, section, chunk, time.time())
+            )
+
+    def remove_vector_files(self, file_ids: List[str]):
+        """Forget vector-store files that have been deleted"""
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM vector_files WHERE file_id = ?", [(file_id,) for file_id in file_ids])
+
+    def vector_files(self, paper) -> List[Dict[str, Any]]:
+        """Return the vector-store files recorded for a paper"""
+        with self.lock:
+            entry = self.find(paper)
+            if entry is None:
+                return []
+            rows = self.connection.execute(
+                "SELECT * FROM vector_files WHERE paper_id = ? ORDER BY vector_store_id, chunk", (entry["id"],)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def record_evaluation(self, paper, research_question: str, evaluation):
+        """Store an evaluation of a paper against a research question"""
+        evaluation = _as_dict(evaluation)
+        with self.lock, self.connection:
+            paper_id = self._upsert(_as_dict(paper))
+            self.connection.execute(
+                "INSERT INTO evaluations (paper_id, research_question, relevance_score, quality_score, evaluation_json, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (paper_id, research_question, evaluation.get("relevance_score"), evaluation.get("quality_score"),
+                 json.dumps(evaluation), time.time())
+            )
+
+    def evaluations(self, paper, research_question: str = None) -> List[Dict[str, Any]]:
+        """Return past evaluations of a paper, newest first"""
+        with self.lock:
+            entry = self.find(paper)
+            if entry is None:
+                return []
+            sql = "SELECT * FROM evaluations WHERE paper_id = ?"
+            params: List[Any] = [entry["id"]]
+            if research_question is not None:
+                sql += " AND research_question = ?"
+                params.append(research_question)
+            rows = self.connection.execute(sql + " ORDER BY created_at DESC", params).fetchall()
+        return [dict(row, evaluation=json.loads(row["evaluation_json"])) for row in rows]
+
+
+_catalog: Optional[PaperCatalog] = None
+
+
+def get_catalog() -> PaperCatalog:
+    """Return the process-wide paper catalog"""
+    global _catalog
+    if _catalog is None:
+        _catalog = PaperCatalog()
+    return _catalog
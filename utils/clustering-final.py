@@ -0,0 +1,157 @@
+import numpy as np
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
+from utils.embeddings import embed_texts
+from utils.lexical_index import STOPWORDS, tokenize
+
+# Mini-batch k-means settings
+KMEANS_BATCH_SIZE = 256
+KMEANS_ITERATIONS = 100
+KMEANS_SEED = 0
+
+# Automatic cluster count search
+MIN_CLUSTERS = 2
+MAX_CLUSTERS = 12
+SILHOUETTE_SAMPLE_SIZE = 1000
+
+# Words shown in each theme label
+LABEL_TERMS = 3
+
+# Words that make poor theme labels: the lexical index's stopwords, plus common words and
+# words every paper summary uses
+LABEL_STOPWORDS = STOPWORDS | frozenset("""
+about above after again against all also among any because before during each few further having here
+however i itself no nor only other out own same should so some too until up very whom without
+paper papers research results show shows studies study use used using finding findings key based
+""".split())
+
+
+def kmeans_plus_plus(X: np.ndarray, k: int, rng: np.random.RandomState) -> np.ndarray:
+    """Pick k initial centers spread out by k-means++ seeding"""
+    centers = [X[rng.randint(len(X))]]
+    closest = np.sum((X - centers[0]) ** 2, axis=1)
+    for _ in range(1, k):
+        total = closest.sum()
+        index = rng.choice(len(X), p=closest / total) if total > 0 else rng.randint(len(X))
+        centers.append(X[index])
+        closest = np.minimum(closest, np.sum((X - X[index]) ** 2, axis=1))
+    return np.array(centers)
+
+
+def assign_clusters(X: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """Assign each row to its nearest center"""
+    distances = (X ** 2).sum(axis=1)[:, None] - 2 * X @ centers.T + (centers ** 2).sum(axis=1)[None, :]
+    return distances.argmin(axis=1)
+
+
+def minibatch_kmeans(X: np.ndarray, k: int, batch_size: int = KMEANS_BATCH_SIZE,
+                     iterations: int = KMEANS_ITERATIONS, seed: int = KMEANS_SEED) -> Tuple[np.ndarray, np.ndarray]:
+    """Cluster rows with mini-batch k-means, returning (labels, centers)"""
+    rng = np.random.RandomState(seed)
+    centers = kmeans_plus_plus(X, k, rng)
+    counts = np.zeros(k)
+
+    for _ in range(iterations):
+        batch = X[rng.choice(len(X), size=min(batch_size, len(X)), replace=False)]
+        labels = assign_clusters(batch, centers)
+        # Per-center learning rate 1/count, applied to the whole batch at once
+        for cluster in np.unique(labels):
+            members = batch[labels == cluster]
+            counts[cluster] += len(members)
+            rate = len(members) / counts[cluster]
+            centers[cluster] = (1 - rate) * centers[cluster] + rate * members.mean(axis=0)
+
+    return assign_clusters(X, centers), centers
+
+
+def silhouette_score(X: np.ndarray, labels: np.ndarray) -> float:
+    """Mean silhouette of a clustering, computed on the full pairwise distance matrix"""
+    distances = np.sqrt(np.maximum((X ** 2).sum(axis=1)[:, None] - 2 * X @ X.T + (X ** 2).sum(axis=1)[None, :], 0))
+    clusters = np.unique(labels)
+    if len(clusters) < 2:
+        return -1.0
+    # Mean distance from each point to every cluster
+    one_hot = (labels[:, None] == clusters[None, :]).astype(X.dtype)
+    sizes = one_hot.sum(axis=0)
+    mean_to_cluster = distances @ one_hot
+    own = np.searchsorted(clusters, labels)
+    own_sizes = sizes[own]
+    a = mean_to_cluster[np.arange(len(X)), own] / np.maximum(own_sizes - 1, 1)
+    mean_to_cluster = mean_to_cluster / sizes[None, :]
+    mean_to_cluster[np.arange(len(X)), own] = np.inf
+    b = mean_to_cluster.min(axis=1)
+    s = (b - a) / np.maximum(np.maximum(a, b), 1e-12)
+    s[own_sizes <= 1] = 0.0
+    return float(s.mean())
+
+
+def choose_cluster_count(X: np.ndarray, seed: int = KMEANS_SEED) -> int:
+    """Pick the cluster count with the best silhouette on a sample"""
+    rng = np.random.RandomState(seed)
+    sample = X if len(X) <= SILHOUETTE_SAMPLE_SIZE else X[rng.choice(len(X), SILHOUETTE_SAMPLE_SIZE, replace=False)]
+    max_k = min(MAX_CLUSTERS, int(np.sqrt(len(sample) / 2)) + 1, len(sample) - 1)
+    best_k, best_score = MIN_CLUSTERS, -np.inf
+    for k in range(MIN_CLUSTERS, max(max_k, MIN_CLUSTERS) + 1):
+        labels, _ = minibatch_kmeans(sample, k, seed=seed)
+        score = silhouette_score(sample, labels)
+        if score > best_score:
+            best_k, best_score = k, score
+    return best_k
+
+
+def label_terms(text: str) -> List[str]:
+    """Content words of a text that could name a theme: alphabetic, three letters or more"""
+    return [term for term in tokenize(text)
+            if len(term) >= 3 and term[0].isalpha() and term not in LABEL_STOPWORDS]
+
+
+def label_clusters(texts: List[str], labels: np.ndarray) -> Dict[int, str]:
+    """Name each cluster after the terms most distinctive of it (TF-IDF over clusters)"""
+    cluster_terms: Dict[int, Counter] = {}
+    for text, label in zip(texts, labels):
+        cluster_terms.setdefault(int(label), Counter()).update(set(label_terms(text)))
+
+    document_frequency = Counter()
+    for terms in cluster_terms.values():
+        document_frequency.update(terms.keys())
+
+    names = {}
+    used = set()
+    n_clusters = len(cluster_terms)
+    for label, terms in cluster_terms.items():
+        scored = sorted(
+            terms.items(),
+            key=lambda item: (-item[1] * np.log((1 + n_clusters) / (1 + document_frequency[item[0]])), item[0])
+        )
+        name = " / ".join(term.title() for term, _ in scored[:LABEL_TERMS]) or f"Theme {label + 1}"
+        # Keep theme names unique
+        while name in used:
+            name += f" ({label + 1})"
+        used.add(name)
+        names[label] = name
+    return names
+
+
+def cluster_embeddings(embeddings: np.ndarray, texts: List[str], titles: List[str],
+                       n_clusters: Optional[int] = None) -> Dict[str, List[str]]:
+    """Cluster precomputed embeddings and return theme name -> paper titles"""
+    if len(titles) < MIN_CLUSTERS * 2:
+        return {"General": list(titles)} if titles else {}
+
+    k = n_clusters or choose_cluster_count(embeddings)
+    labels, _ = minibatch_kmeans(embeddings, k)
+    names = label_clusters(texts, labels)
+
+    themes: Dict[str, List[str]] = {}
+    for title, label in zip(titles, labels):
+        themes.setdefault(names[int(label)], []).append(title)
+    # Largest themes first
+    return dict(sorted(themes.items(), key=lambda item: -len(item[1])))
+
+
+async def cluster_papers(texts: List[str], titles: List[str], n_clusters: Optional[int] = None) -> Dict[str, List[str]]:
+    """Embed paper texts and group the titles into automatically labelled themes"""
+    if len(titles) < MIN_CLUSTERS * 2:
+        return {"General": list(titles)} if titles else {}
+    embeddings = await embed_texts(texts)
+    return cluster_embeddings(embeddings, texts, titles, n_clusters)
@@ -3,22 +3,129 @@ import time
 import asyncio
 from openai import OpenAI
 import os
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from utils.site_adapters import run_site_adapter
+from utils.browser_profile import BrowserProfile, LEAN_PROFILE, launch_browser_context, save_browser_state
+from utils.library_extractor import extract_search_results, DEFAULT_MAX_RESULTS
+from utils.downloads import PdfDownloadManager
+from utils.document_sync import load_document, save_document, build_sections, compute_edit_script
+from utils.rate_limiter import schedule, Priority
+from utils.progress import emit, ScreenshotTaken
+from utils.budget import get_budget, degraded, DEGRADE_SCREENSHOTS, DEGRADED_SCREENSHOT_QUALITY
+import json
 from typing import Dict, List, Any
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Initialize OpenAI client (retries are handled by the shared scheduler)
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
 
+# Rough token cost of one computer-use step, for rate limiting
+COMPUTER_USE_STEP_TOKENS = 1500
 
-async def initialize_browser():
+# Observation modes for the computer use loop
+OBSERVATION_SCREENSHOT = "screenshot"
+OBSERVATION_TEXT = "text"
+OBSERVATION_AUTO = "auto"
+
+# Pages whose structure is fully described by their accessibility tree. Google Docs
+# renders the document body on a canvas, so it always needs a real screenshot.
+TEXT_OBSERVATION_URL_PATTERNS = [
+    "library.ucalgary.ca",
+    "primo.exlibrisgroup.com",
+    "accounts.google.com",
+    "login",
+    "signin",
+    "drive.google.com",
+]
+SCREENSHOT_OBSERVATION_URL_PATTERNS = [
+    "docs.google.com/document",
+]
+
+# Limits for the pruned accessibility outline
+MAX_OUTLINE_NODES = 150
+MAX_OUTLINE_NAME_LENGTH = 80
+MIN_OUTLINE_NODES = 5
+THUMBNAIL_JPEG_QUALITY = 30
+
+# Action execution: text at least this long is inserted in one event rather than typed key by key
+INSERT_TEXT_MIN_CHARS = 16
+DRAG_STEPS = 5
+WAIT_ACTION_SECONDS = 2
+SETTLE_TIMEOUT_MS = 5000
+
+# Actions that do not aim at a point chosen from the last screenshot, so they can follow another action unobserved
+BATCHABLE_ACTIONS = {"type", "keypress", "wait", "scroll", "screenshot"}
+
+# Computer-use key names that differ from Playwright's
+CUA_KEYS = {
+    "CTRL": "Control", "CONTROL": "Control", "ALT": "Alt", "OPTION": "Alt", "SHIFT": "Shift",
+    "CMD": "Meta", "COMMAND": "Meta", "META": "Meta", "SUPER": "Meta", "WIN": "Meta",
+    "ENTER": "Enter", "RETURN": "Enter", "ESC": "Escape", "ESCAPE": "Escape", "TAB": "Tab",
+    "SPACE": "Space", "BACKSPACE": "Backspace", "DELETE": "Delete", "DEL": "Delete", "INSERT": "Insert",
+    "HOME": "Home", "END": "End", "PAGEUP": "PageUp", "PAGEDOWN": "PageDown", "CAPSLOCK": "CapsLock",
+    "UP": "ArrowUp", "DOWN": "ArrowDown", "LEFT": "ArrowLeft", "RIGHT": "ArrowRight",
+    "ARROWUP": "ArrowUp", "ARROWDOWN": "ArrowDown", "ARROWLEFT": "ArrowLeft", "ARROWRIGHT": "ArrowRight",
+    **{f"F{n}": f"F{n}" for n in range(1, 13)},
+}
+
+# Collects visible, named, interactive or structural elements with their bounding boxes
+ACCESSIBILITY_SNAPSHOT_SCRIPT = """
+(maxNodes) => {
+    const implicitRoles = {
+        A: "link", BUTTON: "button", SELECT: "combobox", TEXTAREA: "textbox",
+        H1: "heading", H2: "heading", H3: "heading", H4: "heading",
+        LI: "listitem", IMG: "img", OPTION: "option", LABEL: "label"
+    };
+    const inputRoles = {
+        checkbox: "checkbox", radio: "radio", submit: "button", button: "button",
+        search: "searchbox"
+    };
+    const nodes = [];
+    const elements = document.querySelectorAll(
+        "a, button, input, select, textarea, h1, h2, h3, h4, li, img[alt], option, label, [role], [aria-label]"
+    );
+    for (const el of elements) {
+        if (nodes.length >= maxNodes) break;
+        const rect = el.getBoundingClientRect();
+        if (rect.width === 0 || rect.height === 0) continue;
+        if (rect.bottom < 0 || rect.top > window.innerHeight) continue;
+        const style = window.getComputedStyle(el);
+        if (style.visibility === "hidden" || style.display === "none") continue;
+        let role = el.getAttribute("role") || implicitRoles[el.tagName];
+        if (el.tagName === "INPUT") {
+            role = inputRoles[el.type] || "textbox";
+        }
+        if (!role) continue;
+        const name = (
+            el.getAttribute("aria-label") || el.getAttribute("alt") ||
+            el.getAttribute("placeholder") || el.getAttribute("title") ||
+            el.innerText || el.value || ""
+        ).trim().replace(/\\s+/g, " ");
+        if (!name && role !== "textbox" && role !== "searchbox") continue;
+        nodes.push({
+            role: role,
+            name: name,
+            value: el.tagName === "INPUT" && el.type !== "password" ? el.value : undefined,
+            box: [Math.round(rect.x), Math.round(rect.y), Math.round(rect.width), Math.round(rect.height)]
+        });
+    }
+    return {url: location.href, title: document.title, nodes: nodes};
+}
+"""
+
+
+async def initialize_browser(profile: BrowserProfile = LEAN_PROFILE):
     """Initialize a browser for computer use"""
     playwright = await async_playwright().start()
-    browser = await playwright.chromium.launch(headless=False)  # Set to True in production
-    context = await browser.new_context(
-        viewport={"width": 1280, "height": 800}
-    )
+    browser, context, request_stats = await launch_browser_context(playwright, profile)
     page = await context.new_page()
-    return {"playwright": playwright, "browser": browser, "context": context, "page": page}
+    return {
+        "playwright": playwright,
+        "browser": browser,
+        "context": context,
+        "page": page,
+        "profile": profile,
+        "request_stats": request_stats
+    }
 
 
 async def take_screenshot(page):
@@ -28,36 +135,198 @@ async def take_screenshot(page):
     return screenshot_base64
 
 
-async def execute_computer_action(page, action):
-    """Execute a computer action on the page"""
-    action_type = action.get("type")
+async def take_thumbnail(page, quality=THUMBNAIL_JPEG_QUALITY):
+    """Take a low-quality JPEG screenshot to accompany a text observation"""
+    thumbnail_bytes = await page.screenshot(type="jpeg", quality=quality, scale="css")
+    thumbnail_base64 = base64.b64encode(thumbnail_bytes).decode("utf-8")
+    return thumbnail_base64
+
+
+async def take_accessibility_snapshot(page, max_nodes=MAX_OUTLINE_NODES):
+    """Take a pruned accessibility snapshot of the visible part of the page"""
+    return await page.evaluate(ACCESSIBILITY_SNAPSHOT_SCRIPT, max_nodes)
+
+
+def format_accessibility_outline(snapshot):
+    """Render an accessibility snapshot as a compact text outline for the model"""
+    lines = [f"Page: {snapshot.get('title', '')} ({snapshot.get('url', '')})"]
+    for node in snapshot.get("nodes", []):
+        name = node["name"][:MAX_OUTLINE_NAME_LENGTH]
+        x, y, width, height = node["box"]
+        line = f"- {node['role']} \"{name}\" at ({x + width // 2}, {y + height // 2}) size {width}x{height}"
+        if node.get("value"):
+            line += f" value={json.dumps(node['value'][:MAX_OUTLINE_NAME_LENGTH])}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def choose_observation_mode(url):
+    """Pick the cheapest observation mode that still describes the page"""
+    url = (url or "").lower()
+    if any(pattern in url for pattern in SCREENSHOT_OBSERVATION_URL_PATTERNS):
+        return OBSERVATION_SCREENSHOT
+    if any(pattern in url for pattern in TEXT_OBSERVATION_URL_PATTERNS):
+        return OBSERVATION_TEXT
+    return OBSERVATION_SCREENSHOT
+
+
+async def take_observation(page, mode=OBSERVATION_AUTO):
+    """Observe the page as a full screenshot or as an accessibility outline plus thumbnail"""
+    observation = await _observe(page, mode)
+    budget = get_budget()
+    if budget is not None:
+        budget.charge_screenshot(len(observation["image_url"]) * 3 // 4)
+    return observation
+
+
+async def _observe(page, mode):
+    """Take the observation for take_observation"""
+    if mode == OBSERVATION_AUTO:
+        mode = choose_observation_mode(page.url)
+    
+    if mode == OBSERVATION_TEXT:
+        snapshot = await take_accessibility_snapshot(page)
+        # Fall back to a screenshot when the page exposes too little structure
+        if len(snapshot.get("nodes", [])) >= MIN_OUTLINE_NODES:
+            thumbnail = await take_thumbnail(page)
+            return {
+                "mode": OBSERVATION_TEXT,
+                "image_url": f"data:image/jpeg;base64,{thumbnail}",
+                "outline": format_accessibility_outline(snapshot)
+            }
+    
+    # Over budget, full screenshots drop to CSS-pixel JPEGs
+    if degraded(DEGRADE_SCREENSHOTS):
+        screenshot = await take_thumbnail(page, DEGRADED_SCREENSHOT_QUALITY)
+        return {
+            "mode": OBSERVATION_SCREENSHOT,
+            "image_url": f"data:image/jpeg;base64,{screenshot}",
+            "outline": None
+        }
+    
+    screenshot = await take_screenshot(page)
+    return {
+        "mode": OBSERVATION_SCREENSHOT,
+        "image_url": f"data:image/png;base64,{screenshot}",
+        "outline": None
+    }
+
+
+def observation_outline_input(observation):
+    """Build the extra input item carrying the accessibility outline, if any"""
+    if not observation["outline"]:
+        return []
+    return [{
+        "role": "user",
+        "content": (
+            "Accessible elements on the current page (center coordinates in pixels):\n"
+            + observation["outline"]
+        )
+    }]
+
+
+def _action_field(action, name, default=None):
+    """Read a field from an action given as an SDK object or a dict"""
+    if isinstance(action, dict):
+        return action.get(name, default)
+    value = getattr(action, name, default)
+    return default if value is None else value
+
+
+def _playwright_key(key):
+    """Translate a computer-use key name (e.g. "CTRL", "ENTER") to Playwright's"""
+    return CUA_KEYS.get(key.upper(), key if len(key) == 1 else key.capitalize())
+
+
+async def _type_text(page, text):
+    """Type text, inserting long runs in one input event instead of one key event per character"""
+    if len(text) < INSERT_TEXT_MIN_CHARS:
+        await page.keyboard.type(text)
+        return
+    # insert_text does not send Enter, so new lines are pressed between the inserted runs
+    for number, line in enumerate(text.split("\n")):
+        if number:
+            await page.keyboard.press("Enter")
+        if line:
+            await page.keyboard.insert_text(line)
+
+
+async def perform_action(page, action):
+    """Perform one computer-use action without observing the result"""
+    action_type = _action_field(action, "type")
+    x, y = _action_field(action, "x"), _action_field(action, "y")
     
     if action_type == "click":
-        await page.mouse.click(action.get("x"), action.get("y"))
+        button = _action_field(action, "button", "left")
+        if button == "back":
+            await page.go_back()
+        elif button == "forward":
+            await page.go_forward()
+        else:
+            await page.mouse.click(x, y, button="middle" if button == "wheel" else button)
+    elif action_type == "double_click":
+        await page.mouse.dblclick(x, y)
+    elif action_type == "move":
+        await page.mouse.move(x, y)
+    elif action_type == "drag":
+        path = [(_action_field(point, "x"), _action_field(point, "y")) for point in _action_field(action, "path", [])]
+        if path:
+            await page.mouse.move(*path[0])
+            await page.mouse.down()
+            for point in path[1:]:
+                await page.mouse.move(*point, steps=DRAG_STEPS)
+            await page.mouse.up()
     elif action_type == "type":
-        await page.keyboard.type(action.get("text"))
+        await _type_text(page, _action_field(action, "text", ""))
     elif action_type == "keypress":
-        for key in action.get("keys", []):
-            await page.keyboard.press(key)
+        # Keys in one keypress are held together, e.g. ["CTRL", "A"]
+        keys = [_playwright_key(key) for key in _action_field(action, "keys", [])]
+        if keys:
+            await page.keyboard.press("+".join(keys))
     elif action_type == "scroll":
-        await page.mouse.move(action.get("x"), action.get("y"))
-        await page.evaluate(f"window.scrollBy({action.get('scroll_x', 0)}, {action.get('scroll_y', 0)})")
+        await page.mouse.move(x, y)
+        await page.mouse.wheel(_action_field(action, "scroll_x", 0), _action_field(action, "scroll_y", 0))
     elif action_type == "wait":
-        await asyncio.sleep(2)  # Default wait time
+        await asyncio.sleep(WAIT_ACTION_SECONDS)
+    elif action_type != "screenshot":
+        print(f"Unsupported computer action: {action_type}")
+
+
+async def _settle(page):
+    """Wait briefly for page changes; pages that never go idle (e.g. Google Docs) just time out"""
+    try:
+        await page.wait_for_load_state("networkidle", timeout=SETTLE_TIMEOUT_MS)
+    except PlaywrightTimeoutError:
+        pass
+
+
+async def execute_computer_action(page, action, observation_mode=OBSERVATION_AUTO):
+    """Execute a computer action on the page"""
+    return await execute_computer_actions(page, [action], observation_mode)
+
+
+async def execute_computer_actions(page, actions, observation_mode=OBSERVATION_AUTO):
+    """Execute several computer actions in order and observe the page once at the end"""
+    for action in actions:
+        await perform_action(page, action)
     
     # Wait for any potential page changes to complete
-    await page.wait_for_load_state("networkidle", timeout=5000)
+    await _settle(page)
     
-    return await take_screenshot(page)
+    return await take_observation(page, observation_mode)
 
 
-async def computer_use_loop(page, goal):
+async def computer_use_loop(page, goal, observation_mode=OBSERVATION_AUTO):
     """Run the computer use loop for a specific goal"""
-    # Take initial screenshot
-    screenshot = await take_screenshot(page)
+    # Take initial observation
+    observation = await take_observation(page, observation_mode)
+    emit(ScreenshotTaken(image_url=observation["image_url"], page_url=page.url))
     
     # Create initial response with computer use tool
-    response = client.responses.create(
+    response = await schedule(
+        client.responses.create,
+        priority=Priority.INTERACTIVE,
+        estimated_tokens=COMPUTER_USE_STEP_TOKENS,
         model="computer-use-preview",
         tools=[{
             "type": "computer_use_preview",
@@ -72,9 +341,9 @@ async def computer_use_loop(page, goal):
             },
             {
                 "type": "input_image",
-                "image_url": f"data:image/png;base64,{screenshot}"
+                "image_url": observation["image_url"]
             }
-        ],
+        ] + observation_outline_input(observation),
         truncation="auto"
     )
     
@@ -91,17 +360,33 @@ async def computer_use_loop(page, goal):
             else:
                 return {"status": "completed", "message": "Task completed successfully"}
         
-        # Get the computer call
-        computer_call = computer_calls[0]
-        call_id = computer_call.call_id
-        action = computer_call.action
+        # Every call needs an output in the next request, so stop before running anything if one needs acknowledging
+        pending = [check for call in computer_calls for check in (getattr(call, "pending_safety_checks", None) or [])]
+        if pending:
+            return {"status": "needs_confirmation", "message": "; ".join(check.message for check in pending)}
+        
+        # Coordinate-free actions run together with the action before them; anything aimed at a point
+        # starts a new group, so it acts on the page the previous group left behind
+        groups = []
+        for call in computer_calls:
+            if groups and call.action.type in BATCHABLE_ACTIONS:
+                groups[-1].append(call)
+            else:
+                groups.append([call])
         
-        # Execute the action
-        print(f"Executing action: {action.type}")
-        screenshot = await execute_computer_action(page, action)
+        # Observe once per group; each call is answered with the observation taken after its group
+        outputs = []
+        for group in groups:
+            print(f"Executing actions: {', '.join(call.action.type for call in group)}")
+            observation = await execute_computer_actions(page, [call.action for call in group], observation_mode)
+            emit(ScreenshotTaken(image_url=observation["image_url"], actions=[call.action.type for call in group], page_url=page.url))
+            outputs.extend((call, observation) for call in group)
         
-        # Send the updated screenshot back
-        response = client.responses.create(
+        # Send the updated observation back
+        response = await schedule(
+            client.responses.create,
+            priority=Priority.INTERACTIVE,
+            estimated_tokens=COMPUTER_USE_STEP_TOKENS,
             model="computer-use-preview",
             previous_response_id=response.id,
             tools=[{
@@ -112,19 +397,48 @@ async def computer_use_loop(page, goal):
             }],
             input=[
                 {
-                    "call_id": call_id,
+                    "call_id": call.call_id,
                     "type": "computer_call_output",
                     "output": {
                         "type": "input_image",
-                        "image_url": f"data:image/png;base64,{screenshot}"
+                        "image_url": call_observation["image_url"]
                     }
                 }
-            ],
+                for call, call_observation in outputs
+            ] + observation_outline_input(observation),
             truncation="auto"
         )
 
 
-async def ucalgary_library_search(browser_session, username, password, search_query):
+async def ucalgary_library_login(browser_session, username, password):
+    """Log in to the UCalgary library using computer use"""
+    page = browser_session["page"]
+    
+    # Form the login goal
+    goal = f"""
+    Please help me log in to the UCalgary library.
+    Follow these steps:
+    1. Navigate to https://library.ucalgary.ca/
+    2. Log in with username '{username}' and password '{password}'
+    3. Stop once the library search page shows you as signed in
+    """
+    
+    # Run the scripted adapter, falling back to the computer use loop
+    await run_site_adapter(
+        "ucalgary_library_login",
+        page,
+        lambda: computer_use_loop(page, goal),
+        username=username,
+        password=password
+    )
+    
+    # Keep the sign-in for later runs
+    await save_browser_state(browser_session["context"], browser_session.get("profile", LEAN_PROFILE))
+    
+    return {"status": "logged_in", "page": page}
+
+
+async def ucalgary_library_search(browser_session, username, password, search_query, max_results=DEFAULT_MAX_RESULTS, download_pdfs=True):
     """Search UCalgary library using computer use"""
     page = browser_session["page"]
     
@@ -137,47 +451,29 @@ async def ucalgary_library_search(browser_session, username, password, search_qu
     3. Navigate to the advanced search page
     4. Search for papers using the following query: {search_query}
     5. Use advanced filters to limit to peer-reviewed articles from the last 5 years
-    6. Download at least 3 relevant papers
-    7. Report the titles and authors of the papers you found
+    6. Finish on the search results list so the results can be read from the page
     """
     
-    # Run the computer use loop
-    result = await computer_use_loop(page, goal)
+    # Run the scripted adapter, falling back to the computer use loop
+    result = await run_site_adapter(
+        "ucalgary_library_search",
+        page,
+        lambda: computer_use_loop(page, goal),
+        username=username,
+        password=password,
+        search_query=search_query
+    )
     
-    # For demonstration, return mock data
-    # In a real implementation, we would parse the results from the computer use
-    return [
-        {
-            "title": "The Impact of AI on Research Methodologies",
-            "authors": "Smith, J. & Johnson, A.",
-            "publication": "Journal of AI Research",
-            "year": 2023,
-            "abstract": "This paper examines how artificial intelligence is transforming research methodologies across disciplines.",
-            "url": "https://example.com/paper1",
-            "pdf_url": "https://example.com/paper1.pdf",
-            "downloaded": True
-        },
-        {
-            "title": "A Comparative Analysis of Machine Learning Techniques",
-            "authors": "Chen, L. & Patel, V.",
-            "publication": "Computational Research",
-            "year": 2022,
-            "abstract": "This study compares various machine learning techniques for data analysis.",
-            "url": "https://example.com/paper2",
-            "pdf_url": "https://example.com/paper2.pdf",
-            "downloaded": True
-        },
-        {
-            "title": "Ethical Considerations in Automated Research",
-            "authors": "Garcia, M. et al.",
-            "publication": "Ethics in Technology",
-            "year": 2021,
-            "abstract": "This paper discusses ethical considerations when deploying automated research systems.",
-            "url": "https://example.com/paper3",
-            "pdf_url": "https://example.com/paper3.pdf",
-            "downloaded": True
-        }
-    ]
+    # Read the results straight from the result list instead of from screenshots
+    results = await extract_search_results(page, max_results)
+    
+    # Fetch the PDFs over HTTP with the browser's authenticated session
+    if download_pdfs:
+        downloads = await PdfDownloadManager.from_browser_context(browser_session["context"])
+        async with downloads:
+            results = await downloads.download_all(results)
+    
+    return results
 
 
 async def google_drive_login(browser_session, username, password):
@@ -193,8 +489,17 @@ async def google_drive_login(browser_session, username, password):
     3. Navigate to the main Google Drive interface
     """
     
-    # Run the computer use loop
-    result = await computer_use_loop(page, goal)
+    # Run the scripted adapter, falling back to the computer use loop
+    result = await run_site_adapter(
+        "google_drive_login",
+        page,
+        lambda: computer_use_loop(page, goal),
+        username=username,
+        password=password
+    )
+    
+    # Keep the sign-in for later runs
+    await save_browser_state(browser_session["context"], browser_session.get("profile", LEAN_PROFILE))
     
     return {"status": "logged_in", "page": page}
 
@@ -224,8 +529,18 @@ async def create_google_doc(browser_session, title, sections=None):
     6. Format each section as a heading and add some space below each one
     """
     
-    # Run the computer use loop
-    result = await computer_use_loop(page, goal)
+    # Run the scripted adapter, falling back to the computer use loop
+    result = await run_site_adapter(
+        "create_google_doc",
+        page,
+        lambda: computer_use_loop(page, goal),
+        title=title,
+        sections=sections
+    )
+    
+    # The scripted adapter reads the real document URL from the page
+    if result["via"] == "adapter":
+        return result["result"]
     
     # In a real implementation, we would extract the URL from the page
     # For now, return mock data
@@ -259,7 +574,69 @@ async def write_google_doc(page, document_url, content):
     return {"status": "content_written"}
 
 
-async def format_according_to_journal_style(browser_session, document_url, guidelines):
+async def edit_google_doc_section(page, document_url, operation):
+    """Insert, replace or delete one section of a Google Doc using computer use"""
+    if operation.op == "insert":
+        position = f'directly after the "{operation.after}" section' if operation.after else "at the very start of the document"
+        instructions = f"""
+    3. Place the cursor {position}
+    4. Add a heading "{operation.title}" and type out the following content below it:
+    
+    {operation.content}
+    """
+    elif operation.op == "replace":
+        instructions = f"""
+    3. Find the section with the heading "{operation.title}"
+    4. Select all of the text under that heading, up to the next heading, and replace it with:
+    
+    {operation.content}
+    
+    5. Do not change any other section
+    """
+    else:
+        instructions = f"""
+    3. Find the section with the heading "{operation.title}"
+    4. Delete the heading and all of the text under it, up to the next heading
+    5. Do not change any other section
+    """
+    
+    # Form the editing goal
+    goal = f"""
+    Please help me edit one section of a Google Doc. 
+    Follow these steps:
+    1. Navigate to {document_url}
+    2. Wait for the document to load completely
+    {instructions}
+    """
+    
+    # Run the computer use loop
+    result = await computer_use_loop(page, goal)
+    
+    return {"status": "section_edited", "op": operation.op, "title": operation.title}
+
+
+async def sync_google_doc(page, document_url, sections):
+    """Bring a Google Doc up to date with (title, content) sections, rewriting only what changed"""
+    document = load_document(document_url)
+    new_sections = build_sections(sections)
+    
+    if not document.sections:
+        # Nothing synced yet, so write the whole document in one pass
+        content = "\n\n".join(f"# {s.title}\n\n{s.content}" for s in new_sections)
+        await write_google_doc(page, document_url, content)
+        operations = []
+    else:
+        operations = compute_edit_script(document.sections, new_sections)
+        for operation in operations:
+            print(f"Syncing document: {operation.op} '{operation.title}'")
+            await edit_google_doc_section(page, document_url, operation)
+    
+    document.sections = new_sections
+    save_document(document)
+    return {"status": "synced", "operations": operations, "document": document}
+
+
+async def format_according_to_journal_style(browser_session, document_url, guidelines, sections=None):
     """Format a Google Doc according to journal style guidelines"""
     page = browser_session["page"]
     
@@ -287,12 +664,20 @@ async def format_according_to_journal_style(browser_session, document_url, guide
     
     {formatting_instructions}
     
-    4. Make sure all citations follow the {guidelines.citation_style} style
+    4. Leave in-text citations and the reference list as they are; they are already in {guidelines.citation_style} style
     5. Ensure the document complies with all section-specific requirements
     6. Check that figures and tables (if any) follow the journal's requirements
     7. Make sure the document doesn't exceed {guidelines.max_word_count} words
     """
     
+    # Limit the pass to the sections that changed since they were last formatted
+    if sections is not None:
+        goal += f"""
+    Only the following sections have changed since the document was last formatted.
+    Apply the formatting to these sections only and leave the others untouched:
+    {chr(10).join([f"- {section}" for section in sections])}
+    """
+    
     # Run the computer use loop
     result = await computer_use_loop(page, goal)
     
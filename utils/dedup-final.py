@@ -0,0 +1,163 @@
+import re
+import zlib
+import numpy as np
+from collections import defaultdict
+from pydantic import BaseModel
+from typing import List, Dict, Tuple, Optional
+from utils.library_extractor import SearchResult
+
+# MinHash signature size and LSH banding (32 bands of 4 rows)
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+# Estimated Jaccard similarity above which two candidates are the same paper
+SIMILARITY_THRESHOLD = 0.6
+
+TITLE_SHINGLE_CHARS = 5
+ABSTRACT_SHINGLE_WORDS = 3
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed so signatures are comparable across runs
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+PREPRINT_MARKERS = ("arxiv", "biorxiv", "medrxiv", "ssrn", "preprint", "research square")
+
+
+class DuplicateMerge(BaseModel):
+    """Model recording which near-duplicate results were merged into which"""
+    kept_title: str
+    merged_titles: List[str]
+    similarity: float
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase text and strip punctuation and repeated whitespace"""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", (text or "").lower())).strip()
+
+
+def shingles(result: SearchResult) -> np.ndarray:
+    """Hash the character shingles of the title and word shingles of the abstract"""
+    title = normalize_text(result.title)
+    pieces = {title[i:i + TITLE_SHINGLE_CHARS] for i in range(max(len(title) - TITLE_SHINGLE_CHARS + 1, 1))}
+
+    words = normalize_text(result.abstract).split()
+    pieces.update(
+        " ".join(words[i:i + ABSTRACT_SHINGLE_WORDS])
+        for i in range(len(words) - ABSTRACT_SHINGLE_WORDS + 1)
+    )
+    return np.fromiter((zlib.crc32(p.encode("utf-8")) for p in pieces), dtype=np.uint64, count=len(pieces))
+
+
+def minhash_signature(hashed_shingles: np.ndarray) -> np.ndarray:
+    """Compute the MinHash signature of a set of hashed shingles"""
+    if not len(hashed_shingles):
+        return np.full(NUM_PERMUTATIONS, MAX_HASH, dtype=np.uint64)
+    # Universal hashing of every shingle under every permutation at once
+    permuted = (np.outer(_PERM_A, hashed_shingles) + _PERM_B[:, None]) % MERSENNE_PRIME & MAX_HASH
+    return permuted.min(axis=1)
+
+
+def metadata_score(result: SearchResult) -> float:
+    """Score how complete and authoritative a result's metadata is"""
+    score = 0.0
+    score += 3 if result.doi else 0
+    score += 2 if result.downloaded else (1 if result.pdf_url else 0)
+    score += min(len(result.abstract or "") / 500, 1) * 2
+    score += 1 if result.year else 0
+    score += 1 if result.publication and result.publication != "Unknown" else 0
+    score += 1 if result.authors and result.authors != "Unknown Authors" else 0
+    venue = f"{result.publication} {result.url}".lower()
+    score += 0 if any(marker in venue for marker in PREPRINT_MARKERS) else 2
+    return score
+
+
+def _find(parents: List[int], i: int) -> int:
+    """Find the root of an item in the union-find forest"""
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def find_duplicate_groups(results: List[SearchResult], threshold: float = SIMILARITY_THRESHOLD) -> List[Tuple[List[int], float]]:
+    """Group near-duplicate results with MinHash LSH, returning index groups and their lowest similarity"""
+    if not results:
+        return []
+    signatures = np.vstack([minhash_signature(shingles(r)) for r in results])
+    parents = list(range(len(results)))
+    group_similarity: Dict[int, float] = {}
+
+    def union(i, j, similarity):
+        root_i, root_j = _find(parents, i), _find(parents, j)
+        if root_i == root_j:
+            return
+        parents[root_j] = root_i
+        group_similarity[root_i] = min(
+            similarity, group_similarity.pop(root_i, 1.0), group_similarity.pop(root_j, 1.0)
+        )
+
+    # Identical DOIs are always the same paper
+    by_doi: Dict[str, int] = {}
+    for i, result in enumerate(results):
+        if result.doi:
+            doi = result.doi.lower()
+            if doi in by_doi:
+                union(by_doi[doi], i, 1.0)
+            else:
+                by_doi[doi] = i
+
+    # Only results sharing an LSH bucket are ever compared
+    for band in range(LSH_BANDS):
+        buckets = defaultdict(list)
+        band_rows = signatures[:, band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        for i, row in enumerate(band_rows):
+            buckets[row.tobytes()].append(i)
+        for members in buckets.values():
+            for position, j in enumerate(members[1:], start=1):
+                for i in members[:position]:
+                    if _find(parents, i) == _find(parents, j):
+                        continue
+                    similarity = float(np.mean(signatures[i] == signatures[j]))
+                    if similarity >= threshold:
+                        union(i, j, similarity)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(results)):
+        groups[_find(parents, i)].append(i)
+    return [(members, group_similarity.get(root, 1.0)) for root, members in groups.items()]
+
+
+def deduplicate_results(results: List[SearchResult], threshold: float = SIMILARITY_THRESHOLD) -> Tuple[List[SearchResult], List[DuplicateMerge]]:
+    """Keep the best-metadata copy of each group of near-duplicates and record the merges"""
+    kept = []
+    merges = []
+    for members, similarity in find_duplicate_groups(results, threshold):
+        ranked = sorted(members, key=lambda i: (-metadata_score(results[i]), i))
+        best = results[ranked[0]]
+        if len(ranked) > 1:
+            # Fill gaps in the kept copy from its duplicates
+            updates = {}
+            for i in ranked[1:]:
+                other = results[i]
+                for field in ("doi", "pdf_url", "local_path", "content_hash"):
+                    if not getattr(best, field) and not updates.get(field) and getattr(other, field):
+                        updates[field] = getattr(other, field)
+                if len(other.abstract or "") > len(updates.get("abstract", best.abstract) or ""):
+                    updates["abstract"] = other.abstract
+            if updates.get("local_path"):
+                updates["downloaded"] = True
+            best = best.model_copy(update=updates)
+            merges.append(DuplicateMerge(
+                kept_title=best.title,
+                merged_titles=[results[i].title for i in ranked[1:]],
+                similarity=round(similarity, 3)
+            ))
+        kept.append((min(members), best))
+
+    # Preserve the original result order
+    return [result for _, result in sorted(kept, key=lambda item: item[0])], merges
@@ -0,0 +1,114 @@
+import os
+import json
+import difflib
+import hashlib
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, Tuple, Literal
+
+# Local copies of the last synced version of each document
+CACHE_DIR = os.getenv("SYNAPTHEUM_CACHE_DIR", os.path.expanduser("~/.synaptheum"))
+DOCUMENT_CACHE_DIR = os.path.join(CACHE_DIR, "documents")
+
+
+class SyncedSection(BaseModel):
+    """Model for a section as it was last written to the document"""
+    title: str
+    content: str
+    content_hash: str
+
+
+class DocumentModel(BaseModel):
+    """Model for the local copy of a synced document"""
+    document_url: str
+    sections: List[SyncedSection] = []
+    formatted_sections: Dict[str, str] = {}  # Section title -> content hash at the last formatting pass
+    formatting_hash: Optional[str] = None  # Hash of the guidelines used for the last formatting pass
+
+
+class EditOperation(BaseModel):
+    """Model for one step of a document edit script"""
+    op: Literal["insert", "replace", "delete"]
+    title: str
+    content: Optional[str] = None
+    after: Optional[str] = None  # Title of the section to insert after, None for the start
+
+
+def content_hash(text: str) -> str:
+    """Hash section content, ignoring differences in surrounding whitespace"""
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+def _document_path(document_url: str) -> str:
+    """Return the local file for a document's synced copy"""
+    return os.path.join(DOCUMENT_CACHE_DIR, hashlib.sha1(document_url.encode("utf-8")).hexdigest() + ".json")
+
+
+def load_document(document_url: str) -> DocumentModel:
+    """Load the last synced version of a document, or an empty model"""
+    path = _document_path(document_url)
+    if not os.path.exists(path):
+        return DocumentModel(document_url=document_url)
+    with open(path, "r", encoding="utf-8") as f:
+        return DocumentModel(**json.load(f))
+
+
+def save_document(document: DocumentModel):
+    """Persist the synced version of a document"""
+    os.makedirs(DOCUMENT_CACHE_DIR, exist_ok=True)
+    path = _document_path(document.document_url)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(document.model_dump(), f)
+    os.replace(temp_path, path)
+
+
+def build_sections(sections: List[Tuple[str, str]]) -> List[SyncedSection]:
+    """Hash (title, content) pairs into synced sections"""
+    return [SyncedSection(title=title, content=content, content_hash=content_hash(content)) for title, content in sections]
+
+
+def compute_edit_script(old: List[SyncedSection], new: List[SyncedSection]) -> List[EditOperation]:
+    """Compute the minimal section-level edits that turn the old document into the new one"""
+    old_titles = [s.title for s in old]
+    new_titles = [s.title for s in new]
+    operations = []
+
+    matcher = difflib.SequenceMatcher(a=old_titles, b=new_titles, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            # Same section in the same place; rewrite only if its content changed
+            for old_section, new_section in zip(old[i1:i2], new[j1:j2]):
+                if old_section.content_hash != new_section.content_hash:
+                    operations.append(EditOperation(op="replace", title=new_section.title, content=new_section.content))
+            continue
+        if tag in ("delete", "replace"):
+            operations.extend(EditOperation(op="delete", title=s.title) for s in old[i1:i2])
+        if tag in ("insert", "replace"):
+            for j in range(j1, j2):
+                operations.append(EditOperation(
+                    op="insert",
+                    title=new[j].title,
+                    content=new[j].content,
+                    after=new_titles[j - 1] if j > 0 else None
+                ))
+    return operations
+
+
+def guidelines_hash(guidelines: Any) -> str:
+    """Hash formatting guidelines so a change of journal reformats everything"""
+    data = guidelines.model_dump() if hasattr(guidelines, "model_dump") else guidelines
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def sections_needing_formatting(document: DocumentModel, guidelines: Any) -> List[str]:
+    """Return the titles of sections changed since the last formatting pass with these guidelines"""
+    if document.formatting_hash != guidelines_hash(guidelines):
+        return [s.title for s in document.sections]
+    return [s.title for s in document.sections if document.formatted_sections.get(s.title) != s.content_hash]
+
+
+def mark_formatted(document: DocumentModel, guidelines: Any):
+    """Record that every current section has been formatted with these guidelines"""
+    document.formatting_hash = guidelines_hash(guidelines)
+    document.formatted_sections = {s.title: s.content_hash for s in document.sections}
+    save_document(document)
@@ -0,0 +1,237 @@
+import os
+import json
+import asyncio
+import hashlib
+import httpx
+from urllib.parse import urlparse
+from typing import List, Dict, Any, Optional
+from utils.library_extractor import SearchResult
+
+# Local content-addressed cache for downloaded PDFs
+CACHE_DIR = os.getenv("SYNAPTHEUM_CACHE_DIR", os.path.expanduser("~/.synaptheum"))
+PDF_CACHE_DIR = os.path.join(CACHE_DIR, "pdfs")
+
+# Connection and concurrency limits for the pooled client
+MAX_CONCURRENT_DOWNLOADS = 8
+MAX_DOWNLOADS_PER_HOST = 2
+DOWNLOAD_TIMEOUT_SECONDS = 60
+CHUNK_SIZE = 64 * 1024
+
+PDF_MAGIC = b"%PDF"
+
+
+class DownloadError(Exception):
+    """Raised when a PDF cannot be downloaded or fails verification"""
+
+
+def cookies_from_browser(browser_cookies: List[Dict[str, Any]]) -> httpx.Cookies:
+    """Convert Playwright context cookies into an httpx cookie jar"""
+    jar = httpx.Cookies()
+    for cookie in browser_cookies:
+        jar.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"))
+    return jar
+
+
+class PdfDownloadManager:
+    """Download PDFs concurrently with the browser's session into a content-addressed cache"""
+
+    def __init__(self, cookies=None, user_agent=None, cache_dir=PDF_CACHE_DIR,
+                 max_concurrency=MAX_CONCURRENT_DOWNLOADS, per_host_limit=MAX_DOWNLOADS_PER_HOST):
+        self.cache_dir = cache_dir
+        self.partial_dir = os.path.join(cache_dir, "partial")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        os.makedirs(self.partial_dir, exist_ok=True)
+
+        self.per_host_limit = per_host_limit
+        self.host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.url_index = self._load_index()
+        self.index_lock = asyncio.Lock()
+
+        headers = {"User-Agent": user_agent} if user_agent else {}
+        self.client = httpx.AsyncClient(
+            cookies=cookies,
+            headers=headers,
+            follow_redirects=True,
+            timeout=DOWNLOAD_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        )
+
+    @classmethod
+    async def from_browser_context(cls, context, **kwargs):
+        """Create a manager that reuses the authenticated cookies of a browser context"""
+        cookies = cookies_from_browser(await context.cookies())
+        user_agent = None
+        if context.pages:
+            user_agent = await context.pages[0].evaluate("navigator.userAgent")
+        return cls(cookies=cookies, user_agent=user_agent, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close the pooled HTTP client"""
+        await self.client.aclose()
+
+    def _load_index(self) -> Dict[str, str]:
+        """Load the URL to content hash index"""
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_index(self, url_index: Dict[str, str]):
+        """Write a snapshot of the URL to content hash index atomically"""
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(url_index, f)
+        os.replace(temp_path, self.index_path)
+
+    async def _save_index(self):
+        """Persist the URL to content hash index without blocking the event loop"""
+        # Snapshots are taken and written in order, so a newer index is never overwritten by an older one
+        async with self.index_lock:
+            await asyncio.to_thread(self._write_index, dict(self.url_index))
+
+    def cached_path(self, content_hash: str) -> str:
+        """Return the cache path for a content hash"""
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}.pdf")
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Return the cached file for a URL, if it has been downloaded before"""
+        content_hash = self.url_index.get(url)
+        if content_hash and os.path.exists(self.cached_path(content_hash)):
+            return self.cached_path(content_hash)
+        return None
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Return the semaphore limiting concurrent downloads from one host"""
+        host = urlparse(url).netloc
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self.host_semaphores[host]
+
+    @staticmethod
+    def _hash_partial(partial_path: str):
+        """Hash an existing partial download, returning (digest, size)"""
+        digest = hashlib.sha256()
+        offset = 0
+        if os.path.exists(partial_path):
+            with open(partial_path, "rb") as f:
+                for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(block)
+                    offset += len(block)
+        return digest, offset
+
+    @staticmethod
+    def _write_block(f, digest, block: bytes):
+        """Append a downloaded block to the partial file and the running hash"""
+        f.write(block)
+        digest.update(block)
+
+    def _store(self, partial_path: str, content_hash: str, url: str) -> str:
+        """Verify a finished download and move it into the cache"""
+        with open(partial_path, "rb") as f:
+            if f.read(len(PDF_MAGIC)) != PDF_MAGIC:
+                os.remove(partial_path)
+                raise DownloadError(f"{url} did not return a PDF")
+
+        final_path = self.cached_path(content_hash)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        if os.path.exists(final_path):
+            # Same content under another URL
+            os.remove(partial_path)
+        else:
+            os.replace(partial_path, final_path)
+        return final_path
+
+    async def _fetch(self, url: str) -> str:
+        """Fetch a URL into the cache, resuming a partial download if one exists"""
+        partial_path = os.path.join(self.partial_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".part")
+
+        # File I/O and hashing run in worker threads so they never stall the event loop
+        async with self._host_semaphore(url):
+            digest, offset = await asyncio.to_thread(self._hash_partial, partial_path)
+
+            # Byte ranges count encoded bytes, so a resumed download must not be compressed
+            headers = {"Range": f"bytes={offset}-", "Accept-Encoding": "identity"} if offset else {}
+            async with self.client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 416:
+                    # The partial file is already complete
+                    pass
+                elif response.status_code == 206:
+                    mode = "ab"
+                else:
+                    response.raise_for_status()
+                    # The server ignored the range request, so start over
+                    digest = hashlib.sha256()
+                    offset = 0
+                    mode = "wb"
+
+                if response.status_code != 416:
+                    # Content-Length is the size on the wire, before any Content-Encoding is decoded
+                    expected_length = response.headers.get("Content-Length")
+                    f = await asyncio.to_thread(open, partial_path, mode)
+                    try:
+                        async for block in response.aiter_bytes(CHUNK_SIZE):
+                            await asyncio.to_thread(self._write_block, f, digest, block)
+                    finally:
+                        await asyncio.to_thread(f.close)
+                    received = response.num_bytes_downloaded
+                    if expected_length is not None and received != int(expected_length):
+                        raise DownloadError(f"Incomplete download of {url}: {received} of {expected_length} bytes")
+
+        content_hash = digest.hexdigest()
+        final_path = await asyncio.to_thread(self._store, partial_path, content_hash, url)
+
+        self.url_index[url] = content_hash
+        await self._save_index()
+        return final_path
+
+    async def download_url(self, url: str) -> str:
+        """Download a PDF URL once, sharing in-flight downloads between callers"""
+        cached = self.lookup(url)
+        if cached:
+            return cached
+        if url not in self.in_flight:
+            self.in_flight[url] = asyncio.ensure_future(self._fetch(url))
+        try:
+            return await asyncio.shield(self.in_flight[url])
+        finally:
+            if self.in_flight.get(url) is not None and self.in_flight[url].done():
+                self.in_flight.pop(url, None)
+
+    async def download(self, result: SearchResult) -> SearchResult:
+        """Download the PDF of a search result and record where it is stored"""
+        if not result.pdf_url:
+            return result
+        try:
+            local_path = await self.download_url(result.pdf_url)
+        except (httpx.HTTPError, DownloadError, OSError) as e:
+            # A failed download or cache write only costs this paper
+            print(f"Could not download '{result.title}': {e}")
+            return result.model_copy(update={"downloaded": False})
+
+        content_hash = os.path.splitext(os.path.basename(local_path))[0]
+        return result.model_copy(update={
+            "downloaded": True,
+            "local_path": local_path,
+            "content_hash": content_hash
+        })
+
+    async def download_all(self, results: List[SearchResult]) -> List[SearchResult]:
+        """Download the PDFs of many search results concurrently"""
+        downloaded = await asyncio.gather(*[self.download(result) for result in results], return_exceptions=True)
+        # An unexpected error marks its own paper as not downloaded instead of failing the whole search
+        outcomes = []
+        for result, outcome in zip(results, downloaded):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            if isinstance(outcome, BaseException):
+                print(f"Could not download '{result.title}': {outcome}")
+                outcome = result.model_copy(update={"downloaded": False})
+            outcomes.append(outcome)
+        return outcomes
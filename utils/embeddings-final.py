@@ -0,0 +1,56 @@
+import os
+import numpy as np
+from openai import AsyncOpenAI
+from typing import List
+from utils.rate_limiter import schedule, Priority
+
+# Initialize async OpenAI client (retries are handled by the shared scheduler)
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+
+# Inputs per embeddings request and characters kept per input
+EMBEDDING_BATCH_SIZE = 512
+MAX_EMBEDDING_CHARS = 8000
+
+# Estimated tokens per request, kept well under the endpoint's 300k-token limit (about 4 characters per token)
+MAX_BATCH_TOKENS = 250000
+CHARS_PER_TOKEN = 4
+
+
+def token_batches(texts: List[str], max_items: int = EMBEDDING_BATCH_SIZE,
+                  max_tokens: int = MAX_BATCH_TOKENS) -> List[List[str]]:
+    """Split texts into consecutive batches bounded by item count and estimated tokens"""
+    batches = []
+    batch: List[str] = []
+    batch_tokens = 0
+    for text in texts:
+        tokens = len(text) // CHARS_PER_TOKEN + 1
+        if batch and (len(batch) >= max_items or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def embed_texts(texts: List[str], model: str = EMBEDDING_MODEL, priority: Priority = Priority.NORMAL) -> np.ndarray:
+    """Embed texts in batched requests, returning an L2-normalised float32 matrix"""
+    vectors = []
+    for batch in token_batches([(text or " ")[:MAX_EMBEDDING_CHARS] for text in texts]):
+        response = await schedule(
+            async_client.embeddings.create,
+            priority=priority,
+            estimated_tokens=sum(len(text) for text in batch) // CHARS_PER_TOKEN,
+            model=model,
+            input=batch
+        )
+        vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
@@ -0,0 +1,190 @@
+import re
+import math
+import heapq
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Title tokens are counted this many times, so a term in the title outweighs one in the body
+TITLE_WEIGHT = 2
+
+# Reciprocal rank fusion constant; larger values flatten the contribution of top ranks
+RRF_K = 60
+LEXICAL_RESULTS = 5
+
+# Words kept together, including hyphenated names such as "il-6" or "covid-19"; no stemming, so exact terms match
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be been being between both but by can could did do does for from had has have how if in into
+is it its may might more most not of on or our over such than that the their them then there these they this
+those through to under was we were what when where whether which while who why will with within would
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text into terms; hyphenated terms are kept whole and also split into their parts"""
+    terms = []
+    for token in TOKEN_PATTERN.findall((text or "").lower()):
+        if token not in STOPWORDS:
+            terms.append(token)
+        if "-" in token or "_" in token or "." in token:
+            terms.extend(part for part in re.split(r"[-_.]", token) if part and part not in STOPWORDS)
+    return terms
+
+
+def _write_varint(value: int, out: bytearray):
+    """Append an unsigned integer as a little-endian base-128 varint"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_postings(data: bytearray) -> Iterator[Tuple[int, int]]:
+    """Decode (doc id, term frequency) pairs from delta-encoded varints"""
+    doc_id = 0
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+        if len(values) == 2:
+            doc_id += values[0]
+            yield doc_id, values[1]
+            values = []
+
+
+class LexicalIndex:
+    """Incremental BM25 inverted index over paper text
+
+    Each document is a paper's metadata or one of its text chunks. Postings
+    are stored per term as a bytearray of varint-encoded (doc id gap, term
+    frequency) pairs; doc ids only grow, so adding a document appends to the
+    postings of its terms and nothing is rewritten. Document statistics for
+    BM25 are kept up to date as documents stream in.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, bytearray] = {}
+        self.last_doc: Dict[str, int] = {}
+        self.doc_freq: Dict[str, int] = {}
+        self.doc_lengths = array("I")
+        self.documents: List[Dict[str, Any]] = []  # Paper fields and text for each doc id
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, paper: Mapping[str, Any], text: str, section: Optional[str] = None) -> int:
+        """Index one document of a paper and return its doc id"""
+        doc_id = len(self.documents)
+        terms = tokenize(text) + tokenize(paper.get("title") or "") * TITLE_WEIGHT
+        for term, frequency in Counter(terms).items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = bytearray()
+                previous = 0
+            else:
+                previous = self.last_doc[term]
+            _write_varint(doc_id - previous, postings)
+            _write_varint(frequency, postings)
+            self.last_doc[term] = doc_id
+            self.doc_freq[term] = self.doc_freq.get(term, 0) + 1
+
+        self.doc_lengths.append(len(terms))
+        self.total_length += len(terms)
+        self.documents.append({
+            "title": paper.get("title") or "Unknown Title",
+            "authors": paper.get("authors") or "Unknown Authors",
+            "year": paper.get("year") or 0,
+            "publication": paper.get("publication") or "Unknown",
+            "doi": paper.get("doi") or None,
+            "section": section,
+            "content": text
+        })
+        return doc_id
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """Return the top (doc id, BM25 score) pairs for a query"""
+        if not self.documents:
+            return []
+        count = len(self.documents)
+        average_length = self.total_length / count or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            df = self.doc_freq[term]
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for doc_id, frequency in _read_postings(postings):
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def search_papers(self, query: str, limit: int = LEXICAL_RESULTS) -> List[Dict[str, Any]]:
+        """Search and return results shaped like vector store results, scored 0-1 against the best hit"""
+        hits = self.search(query, limit)
+        if not hits:
+            return []
+        best = hits[0][1] or 1.0
+        return [
+            {**self.documents[doc_id], "relevance_score": score / best, "lexical_score": score}
+            for doc_id, score in hits
+        ]
+
+    def paper_scores(self, query: str) -> Dict[str, float]:
+        """Best BM25 score of each matching paper, keyed by title"""
+        scores: Dict[str, float] = {}
+        for doc_id, score in self.search(query, len(self.documents)):
+            title = self.documents[doc_id]["title"]
+            scores[title] = max(scores.get(title, 0.0), score)
+        return scores
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the compressed postings"""
+        return sum(len(postings) for postings in self.postings.values())
+
+
+def fuse_results(result_lists: List[List[Dict[str, Any]]], k: int = RRF_K) -> List[Dict[str, Any]]:
+    """Merge ranked result lists into one list of papers by reciprocal rank fusion
+
+    Chunks of the same paper are merged, keeping the highest relevance_score
+    and all distinct matched text. Each paper scores sum(1 / (k + rank)) over
+    the lists it ranks in, and the result is ordered by that fusion_score.
+    """
+    papers: Dict[str, Dict[str, Any]] = {}
+    fusion: Dict[str, float] = {}
+    for results in result_lists:
+        rank = 0
+        seen = set()
+        for result in results:
+            title = result["title"]
+            if title in papers:
+                merged = papers[title]
+                if result["content"] and result["content"] not in merged["content"]:
+                    merged["content"] = f"{merged['content']}\n\n{result['content']}"
+                merged["relevance_score"] = max(merged["relevance_score"], result["relevance_score"])
+            else:
+                papers[title] = dict(result)
+            # A paper's rank in a list is where its first chunk appears
+            if title not in seen:
+                seen.add(title)
+                rank += 1
+                fusion[title] = fusion.get(title, 0.0) + 1 / (k + rank)
+
+    fused = sorted(papers.values(), key=lambda paper: -fusion[paper["title"]])
+    for paper in fused:
+        paper["fusion_score"] = fusion[paper["title"]]
+    return fused
@@ -0,0 +1,142 @@
+import re
+from pydantic import BaseModel
+from playwright.async_api import Error as PlaywrightError
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+# Default cap on the number of results streamed from one search
+DEFAULT_MAX_RESULTS = 200
+
+# Primo VE result list selectors
+RESULT_ITEM_SELECTOR = "prm-brief-result-container"
+NEXT_PAGE_SELECTOR = "button[aria-label='Next page'], a[aria-label='Next page'], .load-more-button"
+RESULTS_TIMEOUT_MS = 15000
+
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+DOI_PATTERN = re.compile(r"\b10\.\d{4,9}/[^\s\"<>]+", re.IGNORECASE)
+
+# Reads the raw fields of every result currently rendered in the list
+EXTRACT_RESULTS_SCRIPT = """
+(itemSelector) => {
+    const text = (root, selector) => {
+        const el = root.querySelector(selector);
+        return el ? el.innerText.trim() : "";
+    };
+    const results = [];
+    for (const item of document.querySelectorAll(itemSelector)) {
+        const links = Array.from(item.querySelectorAll("a[href]")).map(a => ({
+            href: a.href,
+            label: (a.innerText || a.getAttribute("aria-label") || "").trim()
+        }));
+        results.push({
+            title: text(item, ".item-title, h3"),
+            creators: text(item, "[data-field-selector='creator'], .item-detail .creator"),
+            is_part_of: text(item, "[data-field-selector='ispartof'], .item-detail .ispartof"),
+            date: text(item, "[data-field-selector='creationdate'], .item-detail .date"),
+            abstract: text(item, "[data-field-selector='description'], .item-snippet, .abstract"),
+            details: text(item, ".item-detail"),
+            links: links
+        });
+    }
+    return results;
+}
+"""
+
+
+class SearchResult(BaseModel):
+    """Model for library search results"""
+    title: str
+    authors: str
+    publication: str
+    year: int
+    abstract: str
+    url: str
+    pdf_url: str = None
+    doi: Optional[str] = None
+    downloaded: bool = False
+    local_path: Optional[str] = None  # Cached PDF, set by the download manager
+    content_hash: Optional[str] = None  # SHA-256 of the cached PDF
+
+
+def _find_link(links: List[Dict[str, str]], *needles: str) -> Optional[str]:
+    """Return the first link whose URL or label contains one of the needles"""
+    for link in links:
+        haystack = f"{link['href']} {link['label']}".lower()
+        if any(needle in haystack for needle in needles):
+            return link["href"]
+    return None
+
+
+def parse_search_result(raw: Dict[str, Any]) -> SearchResult:
+    """Convert the raw fields of one rendered result into a SearchResult"""
+    links = raw.get("links", [])
+    details = " ".join([raw.get("is_part_of", ""), raw.get("date", ""), raw.get("details", "")])
+
+    year_match = YEAR_PATTERN.search(raw.get("date", "")) or YEAR_PATTERN.search(details)
+    doi_match = DOI_PATTERN.search(" ".join(link["href"] for link in links) + " " + details)
+
+    # The publication is the journal name before the volume/issue details
+    publication = raw.get("is_part_of", "").split(",")[0].strip() or "Unknown"
+
+    return SearchResult(
+        title=raw.get("title") or "Unknown Title",
+        authors="; ".join(a.strip() for a in raw.get("creators", "").split(";") if a.strip()) or "Unknown Authors",
+        publication=publication,
+        year=int(year_match.group(0)) if year_match else 0,
+        abstract=raw.get("abstract", ""),
+        url=_find_link(links, "fulldisplay", "docid") or (links[0]["href"] if links else ""),
+        pdf_url=_find_link(links, ".pdf", "download pdf", "/pdf"),
+        doi=doi_match.group(0).rstrip(".,;") if doi_match else None
+    )
+
+
+async def _go_to_next_page(page) -> bool:
+    """Advance the result list to its next page, returning False on the last page"""
+    next_page = page.locator(NEXT_PAGE_SELECTOR).first
+    if not await next_page.is_visible():
+        return False
+    if await next_page.is_disabled():
+        return False
+    # "Load more" appends to the list while "Next page" replaces it; already seen
+    # results are skipped by the caller either way
+    await next_page.click()
+    await page.wait_for_load_state("networkidle", timeout=RESULTS_TIMEOUT_MS)
+    return True
+
+
+async def iter_search_results(page, max_results: int = DEFAULT_MAX_RESULTS) -> AsyncIterator[SearchResult]:
+    """Stream results from the open result list, following pagination up to max_results"""
+    seen = set()
+    yielded = 0
+
+    while yielded < max_results:
+        try:
+            await page.wait_for_selector(RESULT_ITEM_SELECTOR, timeout=RESULTS_TIMEOUT_MS)
+        except PlaywrightError:
+            return
+
+        new_on_page = 0
+        for raw in await page.evaluate(EXTRACT_RESULTS_SCRIPT, RESULT_ITEM_SELECTOR):
+            result = parse_search_result(raw)
+            key = (result.doi or result.url or result.title).lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            new_on_page += 1
+            yield result
+            yielded += 1
+            if yielded >= max_results:
+                return
+
+        # Stop when a page adds nothing new or there is no next page
+        if not new_on_page:
+            return
+        try:
+            if not await _go_to_next_page(page):
+                return
+        except PlaywrightError:
+            return
+
+
+async def extract_search_results(page, max_results: int = DEFAULT_MAX_RESULTS) -> List[SearchResult]:
+    """Collect the streamed results of the open result list into a list"""
+    return [result async for result in iter_search_results(page, max_results)]
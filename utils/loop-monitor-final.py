@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from typing import Dict, List, Any, Optional, Tuple
+
+# Opt-in: SYNAPTHEUM_LOOP_MONITOR=1 reports event-loop stalls at the end of a workflow
+LOOP_MONITOR_ENABLED = os.getenv("SYNAPTHEUM_LOOP_MONITOR", "0").lower() in ("1", "true", "yes")
+
+# A heartbeat late by more than the threshold counts as a stall
+STALL_THRESHOLD = float(os.getenv("SYNAPTHEUM_LOOP_STALL_MS", "100")) / 1000
+HEARTBEAT_INTERVAL = 0.02
+
+# Frames from these files are this project's code; the innermost one names the call site
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STACK_LIMIT = 12
+
+
+def _call_site(frame) -> Tuple[str, List[str]]:
+    """Return the innermost project frame of a stack as "file:line in function", and the formatted stack"""
+    stack = traceback.extract_stack(frame)
+    site = None
+    for entry in reversed(stack):
+        if entry.filename.startswith(PROJECT_ROOT) and entry.filename != os.path.abspath(__file__):
+            site = f"{os.path.relpath(entry.filename, PROJECT_ROOT)}:{entry.lineno} in {entry.name}"
+            break
+    if site is None and stack:
+        site = f"{stack[-1].filename}:{stack[-1].lineno} in {stack[-1].name}"
+    formatted = [f"{entry.filename}:{entry.lineno} in {entry.name}: {entry.line}" for entry in stack[-STACK_LIMIT:]]
+    return site or "unknown", formatted
+
+
+class LoopLagMonitor:
+    """Detect event-loop stalls with a heartbeat coroutine and a watchdog thread
+
+    The heartbeat wakes every HEARTBEAT_INTERVAL. When it is late by more
+    than the threshold, the watchdog thread samples the loop thread's stack
+    through sys._current_frames(), which shows the code that is blocking the
+    loop. Each stall is attributed to the innermost project frame.
+    """
+
+    def __init__(self, threshold: float = STALL_THRESHOLD, interval: float = HEARTBEAT_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.last_beat = time.monotonic()
+        self.pending: Optional[Tuple[str, List[str]]] = None  # Stack sampled during the current stall
+        self.sites: Dict[str, Dict[str, Any]] = {}
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.loop_thread_id: Optional[int] = None
+        self.heartbeat_task: Optional[asyncio.Task] = None
+        self.watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start monitoring the running event loop"""
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.heartbeat_task = asyncio.create_task(self._heartbeat())
+        self.watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self.watchdog.start()
+        return self
+
+    async def _heartbeat(self):
+        """Wake on a fixed interval and record how late each wake-up was"""
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = now - before - self.interval
+            with self.lock:
+                self.last_beat = now
+                self.max_lag = max(self.max_lag, lag)
+                if lag >= self.threshold:
+                    self.stalls += 1
+                    # Stalls shorter than a watchdog tick can end before their stack is sampled
+                    site, stack = self.pending or ("unknown (ended before it was sampled)", [])
+                    entry = self.sites.setdefault(site, {"count": 0, "total": 0.0, "max": 0.0, "stack": stack})
+                    entry["count"] += 1
+                    entry["total"] += lag
+                    if lag > entry["max"]:
+                        entry["max"] = lag
+                        entry["stack"] = stack or entry["stack"]
+                self.pending = None
+
+    def _watch(self):
+        """Sample the loop thread's stack once per stall"""
+        while not self.stopped.wait(self.interval / 2):
+            with self.lock:
+                late = time.monotonic() - self.last_beat - self.interval
+                if late < self.threshold or self.pending is not None:
+                    continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            sample = _call_site(frame)
+            with self.lock:
+                if self.pending is None:
+                    self.pending = sample
+
+    def report(self, top: int = 10) -> List[Dict[str, Any]]:
+        """Worst call sites by total stalled time"""
+        with self.lock:
+            sites = sorted(self.sites.items(), key=lambda item: -item[1]["total"])[:top]
+        return [
+            {
+                "site": site,
+                "stalls": entry["count"],
+                "total_ms": round(entry["total"] * 1000, 1),
+                "max_ms": round(entry["max"] * 1000, 1),
+                "stack": entry["stack"]
+            }
+            for site, entry in sites
+        ]
+
+    async def stop(self, top: int = 10) -> List[Dict[str, Any]]:
+        """Stop monitoring, print the worst call sites and return them"""
+        self.stopped.set()
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            await asyncio.gather(self.heartbeat_task, return_exceptions=True)
+        report = self.report(top)
+        print(f"Event loop: {self.stalls} stalls over {self.threshold * 1000:.0f}ms, worst lag {self.max_lag * 1000:.0f}ms")
+        for entry in report:
+            print(f"  {entry['total_ms']:>8.1f}ms total, {entry['stalls']:>4} stalls, max {entry['max_ms']:.1f}ms  {entry['site']}")
+        return report
+
+
+def start_loop_monitor() -> Optional[LoopLagMonitor]:
+    """Start a monitor on the running loop if diagnostics are enabled"""
+    if not LOOP_MONITOR_ENABLED:
+        return None
+    return LoopLagMonitor().start()
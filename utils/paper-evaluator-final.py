@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional
+from utils.rate_limiter import schedule
+
+# Initialize async OpenAI client (retries are handled by the shared scheduler)
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+EVALUATION_MODEL = os.getenv("OPENAI_AGENT_MODEL", "gpt-4o")
+
+# Papers per structured-output request and concurrent requests
+EVALUATION_BATCH_SIZE = 8
+EVALUATION_CONCURRENCY = 4
+
+# Characters of paper text sent per paper
+MAX_PAPER_CHARS = 4000
+
+# Persistent cache of evaluations
+CACHE_DIR = os.getenv("SYNAPTHEUM_CACHE_DIR", os.path.expanduser("~/.synaptheum"))
+EVALUATION_CACHE_PATH = os.path.join(CACHE_DIR, "evaluations.sqlite3")
+
+EVALUATION_INSTRUCTIONS = """
+You are screening academic papers for a literature review.
+For each numbered paper, judge it against the research question and return:
+- relevance_score: 0-10, how directly the paper addresses the research question
+- quality_score: 0-10, methodological rigour and strength of evidence
+- key_findings: 2-4 concise findings relevant to the research question
+- methodology: one sentence describing the study design, or null if unclear
+- limitations: one sentence on the main limitations, or null if unclear
+Return exactly one assessment per paper, using the paper's number as paper_id.
+"""
+
+# Cached assessments are only reused with the instructions and paper text length they were made with
+EVALUATION_PROMPT_VERSION = hashlib.sha256(f"{EVALUATION_INSTRUCTIONS}{MAX_PAPER_CHARS}".encode("utf-8")).hexdigest()[:12]
+
+
+class PaperAssessment(BaseModel):
+    """Model for the model's assessment of one paper"""
+    paper_id: int
+    relevance_score: float
+    quality_score: float
+    key_findings: List[str]
+    methodology: Optional[str]
+    limitations: Optional[str]
+
+
+class BatchAssessment(BaseModel):
+    """Model for the assessments of one batch of papers"""
+    assessments: List[PaperAssessment]
+
+
+def _hash(text: str) -> str:
+    """Return the SHA-256 of a string"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def paper_key(paper: Dict[str, Any]) -> str:
+    """Identify a paper independently of which of its passages a search returned
+
+    The PDF's content hash is preferred, then the DOI, then the title and
+    year; a paper with none of these falls back to the hash of its text.
+    """
+    if paper.get("content_hash"):
+        return f"sha256:{paper['content_hash']}"
+    if paper.get("doi"):
+        return f"doi:{paper['doi'].strip().lower()}"
+    title = " ".join((paper.get("title") or "").lower().split())
+    if title and title != "unknown title":
+        return f"title:{title}|{paper.get('year') or 0}"
+    return f"text:{_hash(paper_text(paper))}"
+
+
+def paper_text(paper: Dict[str, Any]) -> str:
+    """Render the part of a paper that is sent for evaluation"""
+    body = paper.get("content") or paper.get("abstract") or ""
+    return (
+        f"Title: {paper.get('title', 'Unknown Title')}\n"
+        f"Authors: {paper.get('authors', 'Unknown Authors')}\n"
+        f"Year: {paper.get('year', 'N/A')}\n"
+        f"Publication: {paper.get('publication', 'Unknown')}\n"
+        f"Text: {body[:MAX_PAPER_CHARS]}"
+    )
+
+
+class EvaluationCache:
+    """Persistent evaluation cache keyed by (paper key, research question hash, model, prompt version)"""
+
+    def __init__(self, path: str = EVALUATION_CACHE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS paper_evaluations ("
+            "paper_key TEXT NOT NULL, question_hash TEXT NOT NULL, model TEXT NOT NULL, "
+            "prompt_version TEXT NOT NULL, assessment_json TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (paper_key, question_hash, model, prompt_version))"
+        )
+
+    def get_many(self, paper_keys: List[str], question_hash: str, model: str,
+                 prompt_version: str = EVALUATION_PROMPT_VERSION) -> Dict[str, Dict[str, Any]]:
+        """Return cached assessments for the given papers"""
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(paper_keys), 500):
+            chunk = paper_keys[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT paper_key, assessment_json FROM paper_evaluations "
+                f"WHERE question_hash = ? AND model = ? AND prompt_version = ? "
+                f"AND paper_key IN ({', '.join('?' for _ in chunk)})",
+                [question_hash, model, prompt_version] + chunk
+            ).fetchall()
+            found.update({paper_key: json.loads(data) for paper_key, data in rows})
+        return found
+
+    def put_many(self, entries: Dict[str, Dict[str, Any]], question_hash: str, model: str,
+                 prompt_version: str = EVALUATION_PROMPT_VERSION):
+        """Store assessments for many papers"""
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO paper_evaluations VALUES (?, ?, ?, ?, ?, ?)",
+                [(paper_key, question_hash, model, prompt_version, json.dumps(data), now)
+                 for paper_key, data in entries.items()]
+            )
+
+
+_cache: Optional[EvaluationCache] = None
+
+
+def get_evaluation_cache() -> EvaluationCache:
+    """Return the process-wide evaluation cache"""
+    global _cache
+    if _cache is None:
+        _cache = EvaluationCache()
+    return _cache
+
+
+async def _evaluate_batch(batch: List[Dict[str, Any]], research_question: str, model: str) -> Dict[int, Dict[str, Any]]:
+    """Evaluate one batch of papers in a single structured-output request"""
+    papers_text = "\n\n".join(f"Paper {number}:\n{paper_text(paper)}" for number, paper in enumerate(batch))
+    response = await schedule(
+        async_client.responses.parse,
+        estimated_tokens=len(papers_text) // 4 + 300 * len(batch),
+        model=model,
+        input=[
+            {"role": "system", "content": EVALUATION_INSTRUCTIONS},
+            {"role": "user", "content": f"Research question: {research_question}\n\n{papers_text}"}
+        ],
+        text_format=BatchAssessment
+    )
+    parsed = response.output_parsed
+    return {
+        a.paper_id: a.model_dump(exclude={"paper_id"})
+        for a in (parsed.assessments if parsed else [])
+        if 0 <= a.paper_id < len(batch)
+    }
+
+
+async def evaluate_papers_batched(papers: List[Dict[str, Any]], research_question: str,
+                                  model: str = EVALUATION_MODEL, batch_size: int = EVALUATION_BATCH_SIZE,
+                                  max_concurrency: int = EVALUATION_CONCURRENCY) -> List[Optional[Dict[str, Any]]]:
+    """Evaluate papers against a research question, returning one assessment (or None) per paper
+
+    Cached assessments of the same paper for the same question are reused,
+    whichever passages the search returned this time; the rest are packed
+    into batches that run concurrently under max_concurrency.
+    """
+    cache = get_evaluation_cache()
+    question_hash = _hash(" ".join(research_question.lower().split()))
+    paper_keys = [paper_key(paper) for paper in papers]
+    cached = cache.get_many(list(set(paper_keys)), question_hash, model)
+
+    # Evaluate each distinct uncached paper once
+    missing: Dict[str, Dict[str, Any]] = {}
+    for key, paper in zip(paper_keys, papers):
+        if key not in cached and key not in missing:
+            missing[key] = paper
+    missing_keys = list(missing)
+    batches = [missing_keys[i:i + batch_size] for i in range(0, len(missing_keys), batch_size)]
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(batch_keys):
+        async with semaphore:
+            try:
+                results = await _evaluate_batch([missing[key] for key in batch_keys], research_question, model)
+            except Exception as e:
+                print(f"Paper evaluation batch failed: {e}")
+                return {}
+        return {batch_keys[i]: assessment for i, assessment in results.items()}
+
+    fresh: Dict[str, Dict[str, Any]] = {}
+    for results in await asyncio.gather(*[run(batch) for batch in batches]):
+        fresh.update(results)
+    if fresh:
+        cache.put_many(fresh, question_hash, model)
+
+    if papers:
+        print(f"Paper evaluation: {len(cached)} cached, {len(fresh)} evaluated in {len(batches)} batches")
+    return [cached.get(key) or fresh.get(key) for key in paper_keys]
@@ -0,0 +1,214 @@
+import numpy as np
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type, Union
+
+# String columns are stored as int32 ids into a shared pool of interned strings; id 0 is None
+STRING_COLUMNS = ("title", "authors", "publication", "abstract", "url", "pdf_url", "doi", "local_path", "content_hash")
+
+# Numeric columns and their dtypes; missing scores are NaN, a missing year is 0
+NUMERIC_COLUMNS = {
+    "year": np.int32,
+    "relevance_score": np.float32,
+    "quality_score": np.float32,
+    "downloaded": np.bool_,
+}
+MISSING_NUMBERS = {"year": 0, "relevance_score": np.nan, "quality_score": np.nan, "downloaded": False}
+
+
+class StringPool:
+    """Intern strings so repeated values (authors, publications) are stored once"""
+
+    def __init__(self):
+        self.strings: List[Optional[str]] = [None]
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: Optional[str]) -> int:
+        """Return the id of a string, adding it to the pool if new"""
+        if value is None:
+            return 0
+        value = str(value)
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self.ids[value] = string_id
+        return string_id
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class PaperRow(Mapping):
+    """Read-only view of one row of a PaperTable; nothing is copied until a field is read"""
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "PaperTable", index: int):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key: str) -> Any:
+        return self.table.value(key, self.index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table.columns)
+
+    def __len__(self) -> int:
+        return len(self.table.columns)
+
+    def __getattr__(self, key: str) -> Any:
+        try:
+            return self.table.value(key, self.index)
+        except KeyError:
+            raise AttributeError(key)
+
+    def __repr__(self):
+        return f"PaperRow({self.index}, title={self['title']!r})"
+
+
+class PaperTable:
+    """Columnar table of papers: interned string ids and NumPy numeric columns
+
+    Tables made by filter, take and sort share the string pool of the table
+    they came from, so only the int32 id arrays are copied. Iterating yields
+    PaperRow views, which behave like read-only paper dicts.
+    """
+
+    def __init__(self, pool: Optional[StringPool] = None, data: Optional[Dict[str, np.ndarray]] = None):
+        self.pool = pool or StringPool()
+        self.data = data or {
+            **{name: np.zeros(0, dtype=np.int32) for name in STRING_COLUMNS},
+            **{name: np.zeros(0, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()},
+        }
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.data)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any], pool: Optional[StringPool] = None) -> "PaperTable":
+        """Build a table from paper dicts, pydantic models or rows of another table"""
+        pool = pool or StringPool()
+        records = [r.model_dump() if hasattr(r, "model_dump") else r for r in records]
+        data = {
+            name: np.fromiter((pool.intern(r.get(name)) for r in records), dtype=np.int32, count=len(records))
+            for name in STRING_COLUMNS
+        }
+        for name, dtype in NUMERIC_COLUMNS.items():
+            missing = MISSING_NUMBERS[name]
+            data[name] = np.array([missing if r.get(name) is None else r.get(name) for r in records], dtype=dtype)
+        return cls(pool, data)
+
+    def __len__(self) -> int:
+        return len(self.data["title"])
+
+    def __iter__(self) -> Iterator[PaperRow]:
+        return (PaperRow(self, i) for i in range(len(self)))
+
+    def __getitem__(self, key: Union[int, slice, np.ndarray, List[int]]) -> Union[PaperRow, "PaperTable"]:
+        if isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError(key)
+            return PaperRow(self, index)
+        return self.take(key)
+
+    def value(self, column: str, index: int) -> Any:
+        """Read one cell, decoding string ids and missing numbers"""
+        values = self.data[column]
+        if column in STRING_COLUMNS:
+            return self.pool.strings[values[index]]
+        value = values[index].item()
+        if isinstance(value, float) and np.isnan(value):
+            return None
+        return value
+
+    def column(self, name: str) -> Union[np.ndarray, List[Optional[str]]]:
+        """Return a numeric column as an array, or a string column as a list of strings"""
+        if name in STRING_COLUMNS:
+            strings = self.pool.strings
+            return [strings[i] for i in self.data[name]]
+        return self.data[name]
+
+    def set_column(self, name: str, values: Iterable[Any]):
+        """Replace a numeric column, e.g. with scores from evaluation"""
+        dtype = NUMERIC_COLUMNS[name]
+        missing = MISSING_NUMBERS[name]
+        column = np.array([missing if v is None else v for v in values], dtype=dtype)
+        if len(column) != len(self):
+            raise ValueError(f"Column '{name}' needs {len(self)} values, got {len(column)}")
+        self.data[name] = column
+
+    def take(self, indices: Union[slice, np.ndarray, List[int]]) -> "PaperTable":
+        """Select rows by index, slice or boolean mask"""
+        return PaperTable(self.pool, {name: values[indices] for name, values in self.data.items()})
+
+    def filter(self, mask: np.ndarray) -> "PaperTable":
+        """Keep the rows where a boolean mask is true"""
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def where(self, year_from: Optional[int] = None, year_to: Optional[int] = None,
+              min_relevance: Optional[float] = None, min_quality: Optional[float] = None,
+              downloaded: Optional[bool] = None) -> np.ndarray:
+        """Build a boolean mask from common conditions"""
+        mask = np.ones(len(self), dtype=bool)
+        if year_from is not None:
+            mask &= self.data["year"] >= year_from
+        if year_to is not None:
+            mask &= self.data["year"] <= year_to
+        # NaN scores compare false, so unscored papers are excluded by score conditions
+        if min_relevance is not None:
+            mask &= self.data["relevance_score"] >= min_relevance
+        if min_quality is not None:
+            mask &= self.data["quality_score"] >= min_quality
+        if downloaded is not None:
+            mask &= self.data["downloaded"] == downloaded
+        return mask
+
+    def argsort(self, column: str, descending: bool = False) -> np.ndarray:
+        """Stable row order by a column; strings sort case-insensitively, missing values last"""
+        if column in STRING_COLUMNS:
+            # Rank the pool once, then sort the ids by rank
+            strings = self.pool.strings
+            ranks = np.empty(len(strings), dtype=np.int64)
+            ranks[sorted(range(len(strings)), key=lambda i: (strings[i] is None, (strings[i] or "").lower()))] = np.arange(len(strings))
+            keys = ranks[self.data[column]]
+            missing = self.data[column] == 0
+        else:
+            keys = self.data[column].astype(np.float64)
+            missing = np.isnan(keys) if column.endswith("_score") else np.zeros(len(self), dtype=bool)
+        keys = -keys if descending else keys
+        keys = np.where(missing, np.inf, keys)
+        return np.argsort(keys, kind="stable")
+
+    def sort_by(self, column: str, descending: bool = False) -> "PaperTable":
+        """Return the table sorted by a column"""
+        return self.take(self.argsort(column, descending))
+
+    def top(self, column: str, n: int) -> "PaperTable":
+        """Return the n rows with the highest values of a numeric column, best first"""
+        if n >= len(self):
+            return self.sort_by(column, descending=True)
+        keys = np.nan_to_num(self.data[column].astype(np.float64), nan=-np.inf)
+        best = np.argpartition(-keys, n)[:n]
+        return self.take(best[np.argsort(-keys[best], kind="stable")])
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialize every row as a dict"""
+        return [dict(row) for row in self]
+
+    def to_models(self, model: Type) -> List[Any]:
+        """Convert rows to pydantic models, at an agent boundary"""
+        fields = [name for name in model.model_fields if name in self.data]
+        models = []
+        for row in self:
+            values = {name: row[name] for name in fields}
+            # Missing values fall back to the model's defaults
+            models.append(model(**{name: value for name, value in values.items()
+                                   if value is not None or model.model_fields[name].is_required()}))
+        return models
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the column arrays, excluding the shared string pool"""
+        return sum(values.nbytes for values in self.data.values())
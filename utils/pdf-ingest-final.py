@@ -0,0 +1,162 @@
+import os
+import re
+import json
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from pypdf import PdfReader
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple, Iterable, Mapping
+
+# Local cache of extracted and chunked text, keyed by PDF content hash
+CACHE_DIR = os.getenv("SYNAPTHEUM_CACHE_DIR", os.path.expanduser("~/.synaptheum"))
+TEXT_CACHE_DIR = os.path.join(CACHE_DIR, "text")
+
+# Chunk sizes in words
+CHUNK_WORDS = 400
+CHUNK_OVERLAP_WORDS = 60
+
+# Bump when extraction or chunking changes so stale cache entries are ignored
+CHUNKER_VERSION = 1
+
+# Standalone lines that start a new section, optionally numbered ("2. Methods", "3.1 Results")
+SECTION_HEADING_PATTERN = re.compile(
+    r"^\s*(?:\d+(?:\.\d+)*\.?\s+)?"
+    r"(abstract|introduction|background|related work|literature review|theoretical framework|"
+    r"materials and methods|methods|methodology|experiments?|results|findings|"
+    r"results and discussion|discussion|limitations|conclusions?|future work|"
+    r"acknowledge?ments|references|bibliography|appendix)\s*:?\s*$",
+    re.IGNORECASE
+)
+
+# Sections that are not worth indexing
+SKIPPED_SECTIONS = {"acknowledgements", "acknowledgments", "references", "bibliography"}
+
+
+def file_content_hash(path: str) -> str:
+    """Compute the SHA-256 of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split paper text into (section name, section text) pairs using heading lines"""
+    sections = []
+    current_name = "Front Matter"
+    current_lines: List[str] = []
+    for line in text.splitlines():
+        match = SECTION_HEADING_PATTERN.match(line)
+        if match:
+            if current_lines:
+                sections.append((current_name, "\n".join(current_lines)))
+            current_name = match.group(1).title()
+            current_lines = []
+        else:
+            current_lines.append(line)
+    if current_lines:
+        sections.append((current_name, "\n".join(current_lines)))
+    return sections
+
+
+def chunk_words(text: str, chunk_words: int = CHUNK_WORDS, overlap_words: int = CHUNK_OVERLAP_WORDS) -> List[str]:
+    """Split text into word windows that overlap by overlap_words"""
+    words = text.split()
+    if not words:
+        return []
+    step = max(chunk_words - overlap_words, 1)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+def extract_and_chunk(pdf_path: str) -> List[Dict[str, Any]]:
+    """Extract a PDF's text and split it into section-aware chunks (runs in a worker process)"""
+    reader = PdfReader(pdf_path)
+    text = "\n".join(page.extract_text() or "" for page in reader.pages)
+
+    # Re-join words hyphenated across line breaks
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+
+    chunks = []
+    for section, section_text in split_sections(text):
+        if section.lower() in SKIPPED_SECTIONS:
+            continue
+        for piece in chunk_words(section_text):
+            chunks.append({"section": section, "index": len(chunks), "text": piece})
+    return chunks
+
+
+def _cache_path(content_hash: str) -> str:
+    """Return the cache file for the chunks of a PDF"""
+    return os.path.join(TEXT_CACHE_DIR, content_hash[:2], f"{content_hash}.json")
+
+
+def load_cached_chunks(content_hash: str) -> Optional[List[Dict[str, Any]]]:
+    """Load previously extracted chunks for a PDF, if any"""
+    path = _cache_path(content_hash)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        cached = json.load(f)
+    if cached.get("version") != CHUNKER_VERSION:
+        return None
+    return cached["chunks"]
+
+
+def save_cached_chunks(content_hash: str, chunks: List[Dict[str, Any]]):
+    """Store the extracted chunks for a PDF"""
+    path = _cache_path(content_hash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": CHUNKER_VERSION, "chunks": chunks}, f)
+    os.replace(temp_path, path)
+
+
+async def stream_paper_chunks(papers: Iterable[Mapping[str, Any]], max_workers: Optional[int] = None) -> AsyncIterator[Tuple[Mapping[str, Any], List[Dict[str, Any]]]]:
+    """Yield (paper, chunks) as each paper's PDF is extracted, using a process pool
+
+    Papers without a downloaded PDF, or whose PDF cannot be read, are yielded
+    with an empty chunk list so the caller can fall back to their metadata.
+    """
+    loop = asyncio.get_running_loop()
+    pending = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for paper in papers:
+            local_path = paper.get("local_path")
+            if not local_path or not os.path.exists(local_path):
+                yield paper, []
+                continue
+
+            content_hash = paper.get("content_hash") or await asyncio.to_thread(file_content_hash, local_path)
+            cached = load_cached_chunks(content_hash)
+            if cached is not None:
+                yield paper, cached
+                continue
+
+            future = loop.run_in_executor(executor, extract_and_chunk, local_path)
+            pending.append(_tag(future, paper, content_hash))
+
+        for next_done in asyncio.as_completed(pending):
+            paper, content_hash, chunks = await next_done
+            if chunks is None:
+                yield paper, []
+                continue
+            save_cached_chunks(content_hash, chunks)
+            yield paper, chunks
+
+
+async def _tag(future, paper, content_hash):
+    """Await an extraction, pairing the result with its paper"""
+    try:
+        chunks = await future
+    except Exception as e:
+        print(f"Could not extract text from '{paper.get('title', 'Unknown Title')}': {e}")
+        chunks = None
+    return paper, content_hash, chunks
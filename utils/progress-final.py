@@ -0,0 +1,153 @@
+import time
+import asyncio
+import contextvars
+from pydantic import BaseModel
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+class ProgressEvent(BaseModel):
+    """Model for one progress update from a running workflow"""
+    kind: str
+    stage: Optional[str] = None
+    elapsed: float = 0.0  # Seconds since the stream started
+
+
+class StageStarted(ProgressEvent):
+    kind: str = "stage_started"
+
+
+class StageFinished(ProgressEvent):
+    kind: str = "stage_finished"
+    status: str  # "completed", "failed" or "skipped"
+    seconds: float
+    error: Optional[str] = None
+
+
+class PartialOutput(ProgressEvent):
+    """Output of a stage as it is produced; complete is set once it is final"""
+    kind: str = "partial_output"
+    output_type: str
+    data: Dict[str, Any]
+    complete: bool = False
+
+
+class ScreenshotTaken(ProgressEvent):
+    kind: str = "screenshot"
+    image_url: str  # Data URL of the observation sent to the model
+    actions: List[str] = []
+    page_url: Optional[str] = None
+
+
+class SectionDrafted(ProgressEvent):
+    kind: str = "section_draft"
+    section: str
+    content: str
+
+
+class WorkflowFinished(ProgressEvent):
+    kind: str = "workflow_finished"
+    result: Any
+
+
+class ProgressSink:
+    """Queue of events for one stream, stamped with the time since it started"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.started = time.monotonic()
+
+    def put(self, event: ProgressEvent):
+        event.elapsed = round(time.monotonic() - self.started, 2)
+        self.queue.put_nowait(event)
+
+
+# Tasks copy the context they are created in, so every task of a streamed run reaches its sink
+_sink: contextvars.ContextVar[Optional[ProgressSink]] = contextvars.ContextVar("progress_sink", default=None)
+_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("progress_stage", default=None)
+
+
+def streaming() -> bool:
+    """Whether anyone is listening for progress events"""
+    return _sink.get() is not None
+
+
+def set_stage(name: Optional[str]):
+    """Name the workflow stage the current task belongs to"""
+    _stage.set(name)
+
+
+def current_stage() -> Optional[str]:
+    """Name of the workflow stage the current task belongs to, if any"""
+    return _stage.get()
+
+
+def emit(event: ProgressEvent):
+    """Send an event to the current progress stream; a no-op when nothing is streaming"""
+    sink = _sink.get()
+    if sink is None:
+        return
+    if event.stage is None:
+        event.stage = _stage.get()
+    sink.put(event)
+
+
+async def stream_progress(run: Callable[[], Awaitable[Any]]) -> AsyncIterator[ProgressEvent]:
+    """Run a coroutine and yield its progress events as they happen, ending with WorkflowFinished
+
+    Errors from the coroutine are raised from the iterator after the events
+    emitted before the failure. Closing the iterator early cancels the run.
+    """
+    sink = ProgressSink()
+    token = _sink.set(sink)
+    try:
+        task = asyncio.create_task(run())
+    finally:
+        _sink.reset(token)
+
+    try:
+        while True:
+            getter = asyncio.ensure_future(sink.queue.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+                continue
+            getter.cancel()
+            break
+        while not sink.queue.empty():
+            yield sink.queue.get_nowait()
+        result = task.result()
+        event = WorkflowFinished(result=result)
+        event.elapsed = round(time.monotonic() - sink.started, 2)
+        yield event
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+def format_event(event: ProgressEvent) -> Optional[str]:
+    """Render an event as one line for a terminal, or None if it is not worth showing"""
+    prefix = f"[{event.elapsed:7.1f}s]"
+    if isinstance(event, StageStarted):
+        return f"{prefix} {event.stage}: started"
+    if isinstance(event, StageFinished):
+        line = f"{prefix} {event.stage}: {event.status} in {event.seconds:.1f}s"
+        return f"{line} ({event.error})" if event.error else line
+    if isinstance(event, PartialOutput):
+        data = event.data
+        if "query" in data and "results" in data:
+            # Stage summaries leave the papers in the shared table and only carry the count
+            count = data.get("total_found", len(data["results"]))
+            return f"{prefix} {event.stage}: {count} results for {data['query']}"
+        if event.complete:
+            return f"{prefix} {event.stage}: {event.output_type} ready"
+        fields = ", ".join(f"{key} ({len(value)})" if isinstance(value, list) else key for key, value in data.items())
+        return f"{prefix} {event.stage}: {event.output_type} so far: {fields}"
+    if isinstance(event, ScreenshotTaken):
+        size_kb = len(event.image_url) * 3 // 4 // 1024
+        actions = f" after {', '.join(event.actions)}" if event.actions else ""
+        return f"{prefix} {event.stage or 'browser'}: screenshot ({size_kb} KB){actions} at {event.page_url}"
+    if isinstance(event, SectionDrafted):
+        preview = " ".join(event.content.split())[:80]
+        return f"{prefix} {event.stage}: drafted {event.section} ({len(event.content.split())} words): {preview}"
+    return None
@@ -0,0 +1,258 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import inspect
+import itertools
+import email.utils
+from enum import IntEnum
+from typing import Any, Callable, Optional
+import openai
+from utils.budget import get_budget
+
+# Process-wide limits, shared by every model and file call
+REQUESTS_PER_MINUTE = int(os.getenv("SYNAPTHEUM_REQUESTS_PER_MINUTE", "500"))
+TOKENS_PER_MINUTE = int(os.getenv("SYNAPTHEUM_TOKENS_PER_MINUTE", "200000"))
+MAX_CONCURRENCY = int(os.getenv("SYNAPTHEUM_MAX_CONCURRENCY", "16"))
+MIN_CONCURRENCY = 1
+
+# Retry policy
+MAX_RETRIES = 6
+BASE_RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+
+DEFAULT_ESTIMATED_TOKENS = 1000
+
+
+class Priority(IntEnum):
+    """Scheduling priority; lower values are admitted first"""
+    INTERACTIVE = 0  # Computer-use steps a user is waiting on
+    NORMAL = 1  # Evaluation and search
+    BACKGROUND = 2  # Indexing and uploads
+
+
+class TokenBucket:
+    """Token bucket refilled continuously up to its capacity"""
+
+    def __init__(self, capacity: float, per_minute: float):
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be consumed"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """Take tokens, possibly going into debt for corrections after the fact"""
+        self._refill()
+        self.tokens -= amount
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the Retry-After delay from an API error, if the server sent one"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(parsed.timestamp() - time.time(), 0.0) if parsed else None
+
+
+def is_retryable(error: Exception, idempotent: bool = True) -> bool:
+    """Whether an error is a rate limit, server error or transient connection failure
+
+    A call that creates something is only retried on a rate limit, the one
+    failure where the server is known not to have acted on the request.
+    """
+    if isinstance(error, openai.RateLimitError):
+        return True
+    if not idempotent:
+        return False
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+class ApiScheduler:
+    """Admit API calls by priority under token-bucket limits with AIMD concurrency and retries"""
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE,
+                 max_concurrency=MAX_CONCURRENCY, min_concurrency=MIN_CONCURRENCY):
+        self.request_bucket = TokenBucket(requests_per_minute, requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.active = 0
+        self.admitted = 0  # Calls admitted so far, numbering each call
+        self.decreased_at = 0  # Admission count when the limit was last halved
+        self.paused_until = 0.0
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.condition: Optional[asyncio.Condition] = None
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "server_errors": 0}
+
+    def _condition(self) -> asyncio.Condition:
+        """Create the condition lazily so it binds to the running event loop"""
+        if self.condition is None:
+            self.condition = asyncio.Condition()
+        return self.condition
+
+    async def _acquire(self, priority: Priority, estimated_tokens: int) -> int:
+        """Wait until this call is first in line and the limits allow it, returning its admission number"""
+        condition = self._condition()
+        entry = (int(priority), next(self.sequence))
+        async with condition:
+            heapq.heappush(self.waiters, entry)
+            try:
+                while True:
+                    wait = 0.0
+                    if self.waiters[0] == entry and self.active < int(self.concurrency_limit):
+                        wait = max(
+                            self.paused_until - time.monotonic(),
+                            self.request_bucket.wait_time(1),
+                            self.token_bucket.wait_time(estimated_tokens)
+                        )
+                        if wait <= 0:
+                            heapq.heappop(self.waiters)
+                            self.request_bucket.consume(1)
+                            self.token_bucket.consume(estimated_tokens)
+                            self.active += 1
+                            self.admitted += 1
+                            # The next waiter may also fit
+                            condition.notify_all()
+                            return self.admitted
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout=wait or None)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                if entry in self.waiters:
+                    self.waiters.remove(entry)
+                    heapq.heapify(self.waiters)
+                    condition.notify_all()
+                raise
+
+    async def _release(self):
+        """Free a concurrency slot"""
+        condition = self._condition()
+        async with condition:
+            self.active -= 1
+            condition.notify_all()
+
+    def _on_success(self):
+        """Additive increase: grow the concurrency limit by about one slot per window"""
+        self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1.0 / self.concurrency_limit)
+
+    def _on_overload(self, delay: Optional[float], admission: int):
+        """Multiplicative decrease, and pause admission for the server's Retry-After
+
+        Calls admitted before the last decrease were sent under the old limit,
+        so their failures say nothing new: the limit halves at most once per
+        window of calls in flight.
+        """
+        if admission > self.decreased_at:
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+            self.decreased_at = self.admitted
+        if delay:
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+    async def call(self, fn: Callable, *args, priority: Priority = Priority.NORMAL,
+                   estimated_tokens: int = DEFAULT_ESTIMATED_TOKENS, idempotent: bool = True, **kwargs) -> Any:
+        """Run a sync or async API call under the shared limits, retrying transient failures
+
+        Pass idempotent=False for calls that create something, so a request the
+        server may already have acted on is not sent twice.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            admission = await self._acquire(priority, estimated_tokens)
+            error = None
+            try:
+                if inspect.iscoroutinefunction(fn):
+                    result = await fn(*args, **kwargs)
+                else:
+                    # Synchronous clients must not block the event loop
+                    result = await asyncio.to_thread(fn, *args, **kwargs)
+                # Decorated or bound async methods can pass for sync ones; in the thread they only
+                # build their coroutine, which runs here
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception as e:
+                if not is_retryable(e, idempotent) or attempt == MAX_RETRIES:
+                    raise
+                error = e
+            finally:
+                await self._release()
+
+            if error is None:
+                self.stats["calls"] += 1
+                self._on_success()
+                # Correct the token estimate with the real usage when the response reports it
+                usage = getattr(result, "usage", None)
+                total_tokens = getattr(usage, "total_tokens", None)
+                if isinstance(total_tokens, int):
+                    self.token_bucket.consume(total_tokens - estimated_tokens)
+                    budget = get_budget()
+                    if budget is not None:
+                        budget.charge_tokens(total_tokens)
+                return result
+
+            delay = retry_after_seconds(error)
+            if isinstance(error, openai.RateLimitError):
+                self.stats["rate_limited"] += 1
+                self._on_overload(delay, admission)
+            elif isinstance(error, openai.APIStatusError):
+                self.stats["server_errors"] += 1
+                self._on_overload(delay, admission)
+            self.stats["retries"] += 1
+            # Full jitter, but never sooner than the server asked for
+            backoff = random.uniform(0, min(MAX_RETRY_DELAY, BASE_RETRY_DELAY * 2 ** attempt))
+            await asyncio.sleep(max(backoff, delay or 0))
+
+
+_scheduler: Optional[ApiScheduler] = None
+
+
+def get_scheduler() -> ApiScheduler:
+    """Return the process-wide API scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ApiScheduler()
+    return _scheduler
+
+
+def reset_scheduler():
+    """Drop the process-wide scheduler, so the next call creates one bound to the running event loop"""
+    global _scheduler
+    _scheduler = None
+
+
+async def schedule(fn: Callable, *args, priority: Priority = Priority.NORMAL,
+                   estimated_tokens: int = DEFAULT_ESTIMATED_TOKENS, idempotent: bool = True, **kwargs) -> Any:
+    """Run an API call through the process-wide scheduler"""
+    return await get_scheduler().call(
+        fn, *args, priority=priority, estimated_tokens=estimated_tokens, idempotent=idempotent, **kwargs
+    )
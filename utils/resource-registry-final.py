@@ -0,0 +1,220 @@
+import os
+import time
+import sqlite3
+import asyncio
+import argparse
+import threading
+import openai
+from openai import OpenAI
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from utils.rate_limiter import schedule, Priority
+from utils.catalog import get_catalog
+
+# Initialize OpenAI client (retries are handled by the shared scheduler)
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+# Local registry of the API resources this project creates
+CACHE_DIR = os.getenv("SYNAPTHEUM_CACHE_DIR", os.path.expanduser("~/.synaptheum"))
+REGISTRY_PATH = os.path.join(CACHE_DIR, "resources.sqlite3")
+
+# How long vector stores and their files live before garbage collection
+RESOURCE_TTL_DAYS = float(os.getenv("SYNAPTHEUM_RESOURCE_TTL_DAYS", "7"))
+DEFAULT_OWNER = "synaptheum"
+
+# Garbage collection batching
+GC_BATCH_SIZE = 200
+GC_CONCURRENCY = 8
+MAX_GC_FAILURES = 500  # Give up on a resource kind after this many failed deletions
+
+KIND_VECTOR_STORE = "vector_store"
+KIND_FILE = "file"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    resource_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    parent_id TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL,
+    deleted_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_resources_expiry ON resources(expires_at) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_resources_parent ON resources(parent_id);
+CREATE INDEX IF NOT EXISTS idx_resources_owner ON resources(owner);
+"""
+
+
+class GarbageCollectionReport(BaseModel):
+    """Model for the outcome of a garbage-collection run"""
+    dry_run: bool
+    files: List[str] = []
+    vector_stores: List[str] = []
+    failed: Dict[str, str] = {}  # Resource id -> error
+
+
+class ResourceRegistry:
+    """Persistent record of created vector stores and files, with owner and expiry"""
+
+    def __init__(self, path: str = REGISTRY_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def register(self, kind: str, resource_id: str, owner: str = DEFAULT_OWNER,
+                 ttl_days: Optional[float] = RESOURCE_TTL_DAYS, parent_id: Optional[str] = None):
+        """Record a created resource; ttl_days=None keeps it until released"""
+        now = time.time()
+        expires_at = now + ttl_days * 86400 if ttl_days is not None else None
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO resources (resource_id, kind, owner, parent_id, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (resource_id, kind, owner, parent_id, now, expires_at)
+            )
+
+    def extend(self, resource_id: str, ttl_days: Optional[float]):
+        """Push back a resource's expiry (and its files'), or pin it with ttl_days=None"""
+        expires_at = time.time() + ttl_days * 86400 if ttl_days is not None else None
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE resources SET expires_at = ? WHERE (resource_id = ? OR parent_id = ?) AND deleted_at IS NULL",
+                (expires_at, resource_id, resource_id)
+            )
+
+    def release(self, owner: str):
+        """Expire everything an owner created, so the next collection deletes it"""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE resources SET expires_at = ? WHERE owner = ? AND deleted_at IS NULL", (time.time(), owner)
+            )
+
+    def expired(self, kind: str, owner: Optional[str] = None, limit: int = GC_BATCH_SIZE, offset: int = 0,
+                exclude: Optional[List[str]] = None) -> List[str]:
+        """Return ids of live resources past their expiry; files also expire with their vector store"""
+        now = time.time()
+        sql = (
+            "SELECT r.resource_id FROM resources r LEFT JOIN resources p ON p.resource_id = r.parent_id "
+            "WHERE r.kind = ? AND r.deleted_at IS NULL "
+            "AND ((r.expires_at IS NOT NULL AND r.expires_at <= ?) OR (p.expires_at IS NOT NULL AND p.expires_at <= ?))"
+        )
+        params: List[Any] = [kind, now, now]
+        if owner is not None:
+            sql += " AND r.owner = ?"
+            params.append(owner)
+        if exclude:
+            sql += f" AND r.resource_id NOT IN ({', '.join('?' for _ in exclude)})"
+            params.extend(exclude)
+        rows = self.connection.execute(
+            sql + " ORDER BY r.expires_at, r.resource_id LIMIT ? OFFSET ?", params + [limit, offset]
+        ).fetchall()
+        return [row["resource_id"] for row in rows]
+
+    def mark_deleted(self, resource_ids: List[str]):
+        """Record that resources no longer exist"""
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "UPDATE resources SET deleted_at = ? WHERE resource_id = ?", [(now, rid) for rid in resource_ids]
+            )
+
+    def live(self, owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return live resources, optionally for one owner"""
+        sql = "SELECT * FROM resources WHERE deleted_at IS NULL"
+        params: List[Any] = []
+        if owner is not None:
+            sql += " AND owner = ?"
+            params.append(owner)
+        return [dict(row) for row in self.connection.execute(sql + " ORDER BY created_at", params).fetchall()]
+
+
+_registry: Optional[ResourceRegistry] = None
+
+
+def get_registry() -> ResourceRegistry:
+    """Return the process-wide resource registry"""
+    global _registry
+    if _registry is None:
+        _registry = ResourceRegistry()
+    return _registry
+
+
+async def _delete_batch(ids: List[str], delete, concurrency: int, report: GarbageCollectionReport) -> List[str]:
+    """Delete resources concurrently, returning the ids that are gone"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def delete_one(resource_id: str) -> Optional[str]:
+        async with semaphore:
+            try:
+                await schedule(delete, resource_id, priority=Priority.BACKGROUND, estimated_tokens=0)
+            except openai.NotFoundError:
+                # Already gone (deleted by hand or expired server-side)
+                pass
+            except Exception as e:
+                report.failed[resource_id] = str(e)
+                return None
+        return resource_id
+
+    return [rid for rid in await asyncio.gather(*[delete_one(rid) for rid in ids]) if rid is not None]
+
+
+async def collect_garbage(api: Any = None, registry: Optional[ResourceRegistry] = None, dry_run: bool = False,
+                          owner: Optional[str] = None, batch_size: int = GC_BATCH_SIZE,
+                          concurrency: int = GC_CONCURRENCY, on_files_deleted=None) -> GarbageCollectionReport:
+    """Delete expired files, then expired vector stores, in concurrent batches
+
+    api is anything with files.delete(file_id) and vector_stores.delete(vector_store_id),
+    so a local fake can stand in for the OpenAI client. In dry-run mode nothing is
+    deleted and the report lists what would be.
+    """
+    api = api or client
+    registry = registry or get_registry()
+    report = GarbageCollectionReport(dry_run=dry_run)
+
+    for kind, delete, deleted in (
+        (KIND_FILE, api.files.delete, report.files),
+        (KIND_VECTOR_STORE, api.vector_stores.delete, report.vector_stores),
+    ):
+        failed: List[str] = []
+        while len(failed) <= MAX_GC_FAILURES:
+            if dry_run:
+                # Nothing is deleted, so page through the expired resources
+                ids = registry.expired(kind, owner, batch_size, offset=len(deleted))
+                deleted.extend(ids)
+                if not ids:
+                    break
+                continue
+
+            # Failed deletions stay registered; skip them so the loop ends
+            ids = registry.expired(kind, owner, batch_size, exclude=failed)
+            if not ids:
+                break
+            gone = await _delete_batch(ids, delete, concurrency, report)
+            failed.extend(rid for rid in ids if rid in report.failed)
+            registry.mark_deleted(gone)
+            deleted.extend(gone)
+            if kind == KIND_FILE and on_files_deleted is not None:
+                on_files_deleted(gone)
+
+    action = "Would delete" if dry_run else "Deleted"
+    print(f"{action} {len(report.files)} files and {len(report.vector_stores)} vector stores"
+          + (f", {len(report.failed)} failed" if report.failed else ""))
+    return report
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Delete expired vector stores and files")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be deleted without deleting it")
+    parser.add_argument("--owner", help="only collect resources created by this owner")
+    args = parser.parse_args()
+
+    # Deleted files no longer belong in the paper catalog
+    await collect_garbage(dry_run=args.dry_run, owner=args.owner, on_files_deleted=get_catalog().remove_vector_files)
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
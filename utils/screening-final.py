@@ -0,0 +1,135 @@
+import os
+import re
+import datetime
+import numpy as np
+from pydantic import BaseModel
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from utils.embeddings import embed_texts
+from utils.lexical_index import LexicalIndex
+from utils.site_adapters import UCALGARY_RECENT_YEARS
+
+# Papers sent to model evaluation however large the candidate pool grows
+SCREEN_SHORTLIST = int(os.getenv("SYNAPTHEUM_SCREEN_SHORTLIST", "12"))
+
+# Candidates just below the shortlist cutoff are close calls and also go to the model
+BOUNDARY_MARGIN = 0.05
+MAX_BOUNDARY_PAPERS = 4
+
+# Weights of the cheap signals, each scaled to 0-1 across the candidate pool
+CHEAP_WEIGHTS = {"embedding": 0.6, "lexical": 0.25, "retrieval": 0.15}
+
+# Model relevance (0-10) a shortlisted paper needs to be selected
+MIN_SELECTED_RELEVANCE = 4.0
+
+# Publications that are not peer reviewed
+PREPRINT_PATTERN = re.compile(r"arxiv|biorxiv|medrxiv|ssrn|preprint|research square|working paper", re.IGNORECASE)
+
+
+class ScreeningRules(BaseModel):
+    """Model for the metadata rules of the cheap screening stage"""
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    peer_reviewed_only: bool = True
+    excluded_publications: List[str] = []  # Case-insensitive substrings
+
+
+class RejectedPaper(BaseModel):
+    """Model for a paper dropped during screening"""
+    title: str
+    stage: str  # "metadata", "cheap" or "model"
+    reason: str
+    score: Optional[float] = None
+
+
+def default_rules() -> ScreeningRules:
+    """Rules matching the library search filters: peer reviewed, recent years"""
+    current_year = datetime.date.today().year
+    return ScreeningRules(year_from=current_year - UCALGARY_RECENT_YEARS, year_to=current_year)
+
+
+def metadata_rejection(paper: Mapping[str, Any], rules: ScreeningRules) -> Optional[str]:
+    """Return why a paper fails the metadata rules, or None if it passes"""
+    # An unknown year (0) is not held against a paper
+    year = paper.get("year") or 0
+    if year and rules.year_from is not None and year < rules.year_from:
+        return f"Published in {year}, before {rules.year_from}"
+    if year and rules.year_to is not None and year > rules.year_to:
+        return f"Published in {year}, after {rules.year_to}"
+    publication = paper.get("publication") or ""
+    if rules.peer_reviewed_only and PREPRINT_PATTERN.search(publication):
+        return f"Not peer reviewed ({publication})"
+    for excluded in rules.excluded_publications:
+        if excluded.lower() in publication.lower():
+            return f"Excluded publication ({publication})"
+    return None
+
+
+def _scale(values: np.ndarray) -> np.ndarray:
+    """Min-max scale to 0-1; a constant signal scales to zero"""
+    spread = values.max() - values.min() if len(values) else 0.0
+    return (values - values.min()) / spread if spread > 0 else np.zeros_like(values)
+
+
+async def cheap_scores(papers: List[Mapping[str, Any]], research_question: str,
+                       lexical_index: Optional[LexicalIndex] = None,
+                       retrieval_scores: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Score every candidate without model calls: embedding similarity, BM25 and retrieval rank"""
+    texts = [f"{paper.get('title') or ''}. {paper.get('abstract') or ''}" for paper in papers]
+    embeddings = await embed_texts([research_question] + texts)
+    signals = {"embedding": _scale(embeddings[1:] @ embeddings[0])}
+
+    lexical = lexical_index.paper_scores(research_question) if lexical_index is not None else {}
+    signals["lexical"] = _scale(np.array([lexical.get(paper.get("title"), 0.0) for paper in papers], dtype=np.float32))
+
+    retrieval_scores = retrieval_scores or {}
+    signals["retrieval"] = _scale(np.array([retrieval_scores.get(paper.get("title"), 0.0) for paper in papers], dtype=np.float32))
+
+    return sum(CHEAP_WEIGHTS[name] * values for name, values in signals.items())
+
+
+async def shortlist_papers(papers: List[Mapping[str, Any]], research_question: str,
+                           lexical_index: Optional[LexicalIndex] = None,
+                           retrieval_scores: Optional[Dict[str, float]] = None,
+                           rules: Optional[ScreeningRules] = None,
+                           shortlist_size: int = SCREEN_SHORTLIST) -> Tuple[List[Mapping[str, Any]], List[RejectedPaper]]:
+    """First screening stage: pick the papers worth a model evaluation
+
+    Papers failing the metadata rules are rejected outright. The rest are
+    ranked by cheap_scores; the top shortlist_size, plus up to
+    MAX_BOUNDARY_PAPERS within BOUNDARY_MARGIN of the cutoff, go on to the
+    model and everything else is rejected with its score.
+    """
+    rules = rules or default_rules()
+    rejected = []
+    candidates = []
+    for paper in papers:
+        reason = metadata_rejection(paper, rules)
+        if reason:
+            rejected.append(RejectedPaper(title=paper.get("title") or "Unknown Title", stage="metadata", reason=reason))
+        else:
+            candidates.append(paper)
+
+    if len(candidates) <= shortlist_size:
+        return candidates, rejected
+
+    scores = await cheap_scores(candidates, research_question, lexical_index, retrieval_scores)
+    order = np.argsort(-scores, kind="stable")
+    cutoff = float(scores[order[shortlist_size - 1]])
+    keep = list(order[:shortlist_size])
+    for index in order[shortlist_size:shortlist_size + MAX_BOUNDARY_PAPERS]:
+        if scores[index] >= cutoff - BOUNDARY_MARGIN:
+            keep.append(index)
+
+    kept = set(int(index) for index in keep)
+    for index in order:
+        if int(index) not in kept:
+            rejected.append(RejectedPaper(
+                title=candidates[index].get("title") or "Unknown Title",
+                stage="cheap",
+                reason=f"Screening score {scores[index]:.2f} below the shortlist cutoff {cutoff:.2f}",
+                score=round(float(scores[index]), 3)
+            ))
+
+    print(f"Screening: {len(keep)} of {len(papers)} papers shortlisted "
+          f"({len(keep) - shortlist_size} boundary), {len(rejected)} rejected")
+    return [candidates[index] for index in keep], rejected
@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+# Persistent cache of library searches
+CACHE_DIR = os.getenv("SYNAPTHEUM_CACHE_DIR", os.path.expanduser("~/.synaptheum"))
+SEARCH_CACHE_PATH = os.path.join(CACHE_DIR, "searches.sqlite3")
+
+# How long a cached search stays fresh (seconds); the library's holdings change slowly
+SEARCH_CACHE_TTL = float(os.getenv("SYNAPTHEUM_SEARCH_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def search_cache_key(canonical_query: str, filters: Dict[str, Any]) -> str:
+    """Key a search by its canonical query and the filters it ran with"""
+    data = json.dumps({"query": canonical_query, "filters": filters}, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """Persistent cache of search results keyed by (canonical query, filters), with a TTL"""
+
+    def __init__(self, path: str = SEARCH_CACHE_PATH, ttl: float = SEARCH_CACHE_TTL):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            "cache_key TEXT PRIMARY KEY, query TEXT NOT NULL, filters_json TEXT NOT NULL, "
+            "results_json TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.stats = {"hits": 0, "misses": 0}
+
+    def is_fresh(self, canonical_query: str, filters: Dict[str, Any]) -> bool:
+        """Whether a search has an unexpired entry, without counting it as a hit or miss"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT created_at FROM search_cache WHERE cache_key = ?",
+                (search_cache_key(canonical_query, filters),)
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def get(self, canonical_query: str, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached results of a search, or None if missing or expired"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT results_json, created_at FROM search_cache WHERE cache_key = ?",
+                (search_cache_key(canonical_query, filters),)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, canonical_query: str, filters: Dict[str, Any], results: Dict[str, Any]):
+        """Store the results of a search"""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?)",
+                (search_cache_key(canonical_query, filters), canonical_query,
+                 json.dumps(filters, sort_keys=True), json.dumps(results), time.time())
+            )
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, returning how many were removed"""
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM search_cache WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+        return cursor.rowcount
+
+
+_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search cache"""
+    global _cache
+    if _cache is None:
+        _cache = SearchCache()
+        _cache.purge_expired()
+    return _cache
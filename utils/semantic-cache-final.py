@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import numpy as np
+from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+from utils.embeddings import embed_texts, EMBEDDING_MODEL
+from utils.lexical_index import tokenize
+from utils.rate_limiter import Priority
+
+# Persistent store of semantically cached responses
+CACHE_DIR = os.getenv("SYNAPTHEUM_CACHE_DIR", os.path.expanduser("~/.synaptheum"))
+SEMANTIC_CACHE_PATH = os.path.join(CACHE_DIR, "semantic-cache.sqlite3")
+
+# Cosine similarity a new input needs to reuse a cached response, and entries kept per namespace
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SYNAPTHEUM_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SYNAPTHEUM_SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+
+# Embeddings barely move when one key term is swapped ("in children" vs "in adults") or the
+# direction flips ("X on Y" vs "Y on X"), so a hit also needs this Jaccard overlap of key terms,
+# and at most this fraction of pairs of shared terms in a different order
+KEY_TERM_OVERLAP = float(os.getenv("SYNAPTHEUM_SEMANTIC_CACHE_TERM_OVERLAP", "0.75"))
+MAX_TERM_DISORDER = 0.2
+
+
+class SemanticCacheHit(BaseModel):
+    """Model for a cached response matched by meaning"""
+    cached_text: str
+    similarity: float
+    payload: Dict[str, Any]
+    latency_saved: float  # Seconds the original call took
+
+
+def normalize_text(text: str) -> str:
+    """Normalize case, whitespace and trailing punctuation before embedding"""
+    return re.sub(r"\s+", " ", (text or "").lower()).strip().rstrip("?.!")
+
+
+def key_terms(text: str) -> List[str]:
+    """Content words of a text in order of first use, with plural endings dropped so "effect" and "effects" agree"""
+    terms = (term[:-1] if len(term) > 3 and term.endswith("s") and not term.endswith("ss") else term
+             for term in tokenize(text))
+    return list(dict.fromkeys(terms))
+
+
+def terms_match(terms: List[str], other: List[str], min_overlap: float = KEY_TERM_OVERLAP,
+                max_disorder: float = MAX_TERM_DISORDER) -> bool:
+    """Whether two key-term sequences overlap enough and mostly agree on the order of their shared terms
+
+    The order check tells "effect of exercise on sleep" from "effect of sleep on
+    exercise", while a moved modifier ("adolescent anxiety" vs "anxiety in
+    adolescents") only reorders one pair.
+    """
+    shared = set(terms) & set(other)
+    union = set(terms) | set(other)
+    if not union:
+        return True
+    if len(shared) / len(union) < min_overlap:
+        return False
+    position = {term: index for index, term in enumerate(term for term in other if term in shared)}
+    order = [position[term] for term in terms if term in shared]
+    pairs = len(order) * (len(order) - 1) // 2
+    inversions = sum(1 for i in range(len(order)) for j in range(i + 1, len(order)) if order[i] > order[j])
+    return not pairs or inversions / pairs <= max_disorder
+
+
+class SemanticCache:
+    """Embedding-keyed response cache with a similarity threshold, LRU eviction and a SQLite store
+
+    Entries are namespaced (e.g. per agent and model) and the embeddings of a
+    namespace are held in memory as one matrix, so a lookup is a single
+    matrix-vector product. With match_terms, a cached entry is only reused
+    when its key terms also match the input's (see terms_match).
+    """
+
+    def __init__(self, namespace: str, path: str = SEMANTIC_CACHE_PATH, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES, model: str = EMBEDDING_MODEL, match_terms: bool = True):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Embeddings from different models are not comparable
+        self.namespace = f"{namespace}:{model}"
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.model = model
+        self.match_terms = match_terms
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS semantic_cache ("
+            "id INTEGER PRIMARY KEY, namespace TEXT NOT NULL, text TEXT NOT NULL, embedding BLOB NOT NULL, "
+            "payload_json TEXT NOT NULL, latency REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0, "
+            "UNIQUE (namespace, text))"
+        )
+        self.stats = {"lookups": 0, "hits": 0, "latency_saved": 0.0}
+        self._load()
+
+    def _load(self):
+        """Load the namespace's embeddings and key terms into memory"""
+        rows = self.connection.execute(
+            "SELECT id, embedding, text FROM semantic_cache WHERE namespace = ? ORDER BY id", (self.namespace,)
+        ).fetchall()
+        self.ids = [row[0] for row in rows]
+        self.terms = [key_terms(row[2]) for row in rows]
+        self.matrix = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed the normalized text as a unit vector"""
+        return (await embed_texts([normalize_text(text)], model=self.model, priority=Priority.INTERACTIVE))[0]
+
+    def lookup(self, embedding: np.ndarray, text: Optional[str] = None) -> Optional[SemanticCacheHit]:
+        """Return the most similar cached response above the threshold (and whose key terms match text), if any"""
+        self.stats["lookups"] += 1
+        terms = key_terms(normalize_text(text)) if self.match_terms and text is not None else None
+        with self.lock:
+            if self.matrix is None or self.matrix.shape[1] != embedding.shape[0]:
+                return None
+            similarities = self.matrix @ embedding
+            candidates = [int(index) for index in np.argsort(-similarities) if similarities[index] >= self.threshold]
+            if terms is not None:
+                candidates = [index for index in candidates if terms_match(terms, self.terms[index])]
+            if not candidates:
+                return None
+            best = candidates[0]
+            similarity = float(similarities[best])
+            entry_id = self.ids[best]
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE semantic_cache SET last_used = ?, hits = hits + 1 WHERE id = ?", (time.time(), entry_id)
+                )
+            text, payload, latency = self.connection.execute(
+                "SELECT text, payload_json, latency FROM semantic_cache WHERE id = ?", (entry_id,)
+            ).fetchone()
+
+        self.stats["hits"] += 1
+        self.stats["latency_saved"] += latency
+        return SemanticCacheHit(cached_text=text, similarity=similarity, payload=json.loads(payload), latency_saved=latency)
+
+    def store(self, text: str, embedding: np.ndarray, payload: Dict[str, Any], latency: float):
+        """Cache a response, evicting the least recently used entries beyond max_entries"""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO semantic_cache (namespace, text, embedding, payload_json, latency, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, normalize_text(text), np.asarray(embedding, dtype=np.float32).tobytes(),
+                 json.dumps(payload), latency, time.time())
+            )
+            self.connection.execute(
+                "DELETE FROM semantic_cache WHERE namespace = ? AND id NOT IN ("
+                "SELECT id FROM semantic_cache WHERE namespace = ? ORDER BY last_used DESC LIMIT ?)",
+                (self.namespace, self.namespace, self.max_entries)
+            )
+            self._load()
+
+    def report(self) -> Dict[str, Any]:
+        """Hit rate and latency saved since the cache was opened"""
+        lookups = self.stats["lookups"]
+        return {
+            "lookups": lookups,
+            "hits": self.stats["hits"],
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "latency_saved_seconds": round(self.stats["latency_saved"], 2),
+            "entries": len(self.ids)
+        }
+
+
+_caches: Dict[str, SemanticCache] = {}
+
+
+def get_semantic_cache(namespace: str) -> SemanticCache:
+    """Return the process-wide semantic cache for a namespace"""
+    if namespace not in _caches:
+        _caches[namespace] = SemanticCache(namespace)
+    return _caches[namespace]
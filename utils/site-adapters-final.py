@@ -0,0 +1,187 @@
+import time
+import datetime
+from urllib.parse import quote, parse_qs, urlparse
+from playwright.async_api import Error as PlaywrightError
+from typing import Dict, List, Any, Callable, Awaitable
+
+# Registry of scripted site adapters, keyed by flow name
+SITE_ADAPTERS: Dict[str, Callable[..., Awaitable[Any]]] = {}
+
+# Default timeout for a single selector-driven step
+STEP_TIMEOUT_MS = 10000
+
+# UCalgary library (Primo VE) endpoints and selectors
+UCALGARY_SEARCH_URL = "https://ucalgary.primo.exlibrisgroup.com/discovery/search"
+UCALGARY_VIEW_ID = "01UCALG_INST:UCALGARY"
+UCALGARY_SIGN_IN_BUTTON = "button[aria-label*='Sign in'], prm-authentication button"
+UCALGARY_USERNAME_INPUT = "input#username, input[name='username']"
+UCALGARY_PASSWORD_INPUT = "input#password, input[name='password']"
+UCALGARY_LOGIN_SUBMIT = "button[type='submit'], input[type='submit']"
+UCALGARY_RESULTS_LIST = "prm-search-result-list, .results-container"
+UCALGARY_RESULT_ITEM = "prm-brief-result-container"
+UCALGARY_RECENT_YEARS = 5
+
+# Google sign-in and Docs endpoints and selectors
+GOOGLE_LOGIN_URL = "https://accounts.google.com/ServiceLogin?service=wise&continue=https://drive.google.com/"
+GOOGLE_EMAIL_INPUT = "input[type='email']"
+GOOGLE_EMAIL_NEXT = "#identifierNext"
+GOOGLE_PASSWORD_INPUT = "input[type='password']"
+GOOGLE_PASSWORD_NEXT = "#passwordNext"
+GOOGLE_DRIVE_URL_PATTERN = "**/drive.google.com/**"
+GOOGLE_DOCS_CREATE_URL = "https://docs.google.com/document/create"
+GOOGLE_DOCS_EDITOR = ".kix-appview-editor"
+GOOGLE_DOCS_TITLE_INPUT = "input.docs-title-input"
+
+
+class AdapterStepFailed(Exception):
+    """Raised when a scripted adapter step cannot drive its selectors"""
+
+    def __init__(self, flow, step, error):
+        super().__init__(f"{flow}: step '{step}' failed: {error}")
+        self.flow = flow
+        self.step = step
+        self.error = error
+
+
+class AdapterRun:
+    """Run and time the steps of a single scripted adapter invocation"""
+
+    def __init__(self, flow, page):
+        self.flow = flow
+        self.page = page
+        self.step_timings: List[Dict[str, Any]] = []
+
+    async def step(self, name, action):
+        """Run one named step, recording its duration and wrapping selector errors"""
+        started = time.perf_counter()
+        try:
+            result = await action()
+        except PlaywrightError as e:
+            self.step_timings.append({"step": name, "seconds": time.perf_counter() - started, "ok": False})
+            raise AdapterStepFailed(self.flow, name, e) from e
+        elapsed = time.perf_counter() - started
+        self.step_timings.append({"step": name, "seconds": elapsed, "ok": True})
+        print(f"[{self.flow}] {name} took {elapsed:.2f}s")
+        return result
+
+
+def site_adapter(flow):
+    """Register a scripted adapter for a named flow"""
+    def decorator(func):
+        SITE_ADAPTERS[flow] = func
+        return func
+    return decorator
+
+
+async def run_site_adapter(flow, page, fallback, **params):
+    """Run the scripted adapter for a flow, falling back to computer use when a step fails"""
+    adapter = SITE_ADAPTERS.get(flow)
+    if adapter is None:
+        return {"via": "computer_use", "result": await fallback(), "steps": []}
+
+    run = AdapterRun(flow, page)
+    try:
+        result = await adapter(run, **params)
+        return {"via": "adapter", "result": result, "steps": run.step_timings}
+    except AdapterStepFailed as e:
+        print(f"Scripted adapter failed, falling back to computer use: {e}")
+        return {"via": "computer_use", "result": await fallback(), "steps": run.step_timings}
+
+
+async def _sign_in_to_ucalgary(run, username, password):
+    """Sign in through the UCalgary CAS form if the library asks for it"""
+    page = run.page
+    sign_in = page.locator(UCALGARY_SIGN_IN_BUTTON).first
+    if not await sign_in.is_visible():
+        return
+
+    await run.step("open sign-in", lambda: sign_in.click(timeout=STEP_TIMEOUT_MS))
+    await run.step("fill username", lambda: page.fill(UCALGARY_USERNAME_INPUT, username, timeout=STEP_TIMEOUT_MS))
+    await run.step("fill password", lambda: page.fill(UCALGARY_PASSWORD_INPUT, password, timeout=STEP_TIMEOUT_MS))
+    await run.step("submit login", lambda: page.click(UCALGARY_LOGIN_SUBMIT, timeout=STEP_TIMEOUT_MS))
+    await run.step("wait for library", lambda: page.wait_for_url("**/discovery/**", timeout=STEP_TIMEOUT_MS * 3))
+
+
+def ucalgary_search_url(search_query, peer_reviewed=True, recent_years=UCALGARY_RECENT_YEARS):
+    """Build a Primo advanced search URL with the filters applied as facets"""
+    params = [
+        ("vid", UCALGARY_VIEW_ID),
+        ("tab", "Everything"),
+        ("search_scope", "MyInst_and_CI"),
+        ("mode", "advanced"),
+        ("query", f"any,contains,{search_query}"),
+        ("mfacet", "rtype,include,articles,1"),
+    ]
+    if peer_reviewed:
+        params.append(("mfacet", "tlevel,include,peer_reviewed,1"))
+    if recent_years:
+        current_year = datetime.date.today().year
+        params.append(("facet", f"searchcreationdate,include,{current_year - recent_years}|,|{current_year}"))
+    return UCALGARY_SEARCH_URL + "?" + "&".join(f"{key}={quote(value, safe=',|')}" for key, value in params)
+
+
+@site_adapter("ucalgary_library_login")
+async def ucalgary_library_login_adapter(run, username, password):
+    """Open the library discovery page and sign in, leaving the session ready for searches"""
+    page = run.page
+    url = f"{UCALGARY_SEARCH_URL}?vid={quote(UCALGARY_VIEW_ID, safe='')}"
+    await run.step("navigate", lambda: page.goto(url, timeout=STEP_TIMEOUT_MS * 3))
+    await _sign_in_to_ucalgary(run, username, password)
+    return {"status": "logged_in"}
+
+
+@site_adapter("ucalgary_library_search")
+async def ucalgary_library_search_adapter(run, username, password, search_query):
+    """Search the UCalgary library with the filters applied through the URL"""
+    page = run.page
+    url = ucalgary_search_url(search_query)
+    await run.step("navigate", lambda: page.goto(url, timeout=STEP_TIMEOUT_MS * 3))
+    await _sign_in_to_ucalgary(run, username, password)
+    await run.step("wait for results", lambda: page.wait_for_selector(UCALGARY_RESULTS_LIST, timeout=STEP_TIMEOUT_MS * 2))
+    count = await run.step("count results", lambda: page.locator(UCALGARY_RESULT_ITEM).count())
+    return {"status": "searched", "visible_results": count}
+
+
+@site_adapter("google_drive_login")
+async def google_drive_login_adapter(run, username, password):
+    """Sign in to Google and land on Drive"""
+    page = run.page
+    await run.step("navigate", lambda: page.goto(GOOGLE_LOGIN_URL, timeout=STEP_TIMEOUT_MS * 3))
+    if "drive.google.com" in page.url:
+        return {"status": "logged_in"}
+
+    await run.step("fill email", lambda: page.fill(GOOGLE_EMAIL_INPUT, username, timeout=STEP_TIMEOUT_MS))
+    await run.step("submit email", lambda: page.click(GOOGLE_EMAIL_NEXT, timeout=STEP_TIMEOUT_MS))
+    await run.step("fill password", lambda: page.fill(GOOGLE_PASSWORD_INPUT, password, timeout=STEP_TIMEOUT_MS))
+    await run.step("submit password", lambda: page.click(GOOGLE_PASSWORD_NEXT, timeout=STEP_TIMEOUT_MS))
+    await run.step("wait for drive", lambda: page.wait_for_url(GOOGLE_DRIVE_URL_PATTERN, timeout=STEP_TIMEOUT_MS * 3))
+    return {"status": "logged_in"}
+
+
+@site_adapter("create_google_doc")
+async def create_google_doc_adapter(run, title, sections):
+    """Create a Google Doc, name it and add one heading per section"""
+    page = run.page
+    await run.step("create document", lambda: page.goto(GOOGLE_DOCS_CREATE_URL, timeout=STEP_TIMEOUT_MS * 3))
+    await run.step("wait for editor", lambda: page.wait_for_selector(GOOGLE_DOCS_EDITOR, timeout=STEP_TIMEOUT_MS * 2))
+    await run.step("set title", lambda: page.fill(GOOGLE_DOCS_TITLE_INPUT, title, timeout=STEP_TIMEOUT_MS))
+    await run.step("confirm title", lambda: page.keyboard.press("Enter"))
+    await run.step("focus body", lambda: page.click(GOOGLE_DOCS_EDITOR, timeout=STEP_TIMEOUT_MS))
+
+    async def write_headings():
+        for section in sections:
+            await page.keyboard.press("Control+Alt+1")  # Heading 1
+            await page.keyboard.insert_text(section)
+            await page.keyboard.press("Enter")
+            await page.keyboard.press("Control+Alt+0")  # Normal text
+            await page.keyboard.press("Enter")
+
+    await run.step("write section headings", write_headings)
+
+    # Document URLs look like https://docs.google.com/document/d/<id>/edit
+    path_parts = urlparse(page.url).path.split("/")
+    doc_id = path_parts[path_parts.index("d") + 1] if "d" in path_parts else parse_qs(urlparse(page.url).query).get("id", [""])[0]
+    if not doc_id:
+        # The document exists by now, so falling back would create a second one
+        print(f"[create_google_doc] Could not read the document id from {page.url}")
+    return {"id": doc_id, "url": page.url, "title": title}
@@ -1,70 +1,146 @@
 import os
+import asyncio
 from openai import OpenAI
 from typing import List, Dict, Any
+from utils.pdf_ingest import stream_paper_chunks, CHUNK_OVERLAP_WORDS
+from utils.catalog import get_catalog
+from utils.rate_limiter import schedule, Priority
+from utils.paper_table import PaperTable
+from utils.lexical_index import LexicalIndex
+from utils.resource_registry import get_registry, KIND_VECTOR_STORE, KIND_FILE, DEFAULT_OWNER, RESOURCE_TTL_DAYS
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Initialize OpenAI client (retries are handled by the shared scheduler)
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
 
+# Papers uploaded at once, and passages returned per search (several can come from one paper)
+UPLOAD_CONCURRENCY = 8
+SEARCH_RESULTS = 20
 
-async def create_paper_vector_store(papers):
-    """Create a vector store from a list of papers"""
-    # Create a new vector store
-    vector_store = client.vector_stores.create(
-        name="Research Papers"
-    )
-    
-    # For each paper, create a file and add to vector store
-    for paper in papers:
-        # In a real implementation, we would process the PDF
-        # For now, we'll create a text representation
-        paper_content = f"""
+
+def paper_metadata_text(paper):
+    """Render a paper's metadata as a text header"""
+    return f"""
         Title: {paper['title']}
         Authors: {paper['authors']}
         Publication: {paper.get('publication', 'Unknown Journal')}
         Year: {paper.get('year', 'N/A')}
-        
-        Abstract: {paper.get('abstract', 'No abstract available.')}
-        
-        This is a placeholder for the full content of the paper.
-        In a real implementation, this would be the extracted text from the PDF.
         """
+
+
+def paper_document_text(chunks):
+    """Join a paper's chunks back into section-annotated text, dropping the words consecutive chunks share"""
+    parts = []
+    previous_section = None
+    for chunk in chunks:
+        if chunk["section"] == previous_section:
+            parts.append(" ".join(chunk["text"].split()[CHUNK_OVERLAP_WORDS:]))
+        else:
+            parts.append(f"\n\nSection: {chunk['section']}\n\n{chunk['text']}")
+        previous_section = chunk["section"]
+    return " ".join(parts).strip()
+
+
+async def upload_paper_file(vector_store_id, paper, content, filename, attributes=None, owner=DEFAULT_OWNER):
+    """Upload one text file for a paper and add it to the vector store"""
+    # Upload to OpenAI as a file
+    file = await schedule(
+        client.files.create,
+        priority=Priority.BACKGROUND,
+        idempotent=False,
+        file=(filename, content.encode("utf-8")),
+        purpose="vector_store"
+    )
+    # Register before attaching, so a failure below still leaves the file collectable
+    get_registry().register(KIND_FILE, file.id, owner, parent_id=vector_store_id)
+    
+    # Add to vector store
+    await schedule(
+        client.vector_stores.files.create_and_poll,
+        priority=Priority.BACKGROUND,
+        idempotent=False,
+        vector_store_id=vector_store_id,
+        file_id=file.id,
+        attributes={
+            "title": paper["title"],
+            "authors": paper["authors"],
+            "year": paper.get("year", 0),
+            "publication": paper.get("publication", "Unknown"),
+            "doi": paper.get("doi") or "",
+            **(attributes or {})
+        }
+    )
+    
+    attributes = attributes or {}
+    get_catalog().record_vector_file(
+        paper, vector_store_id, file.id, attributes.get("section"), attributes.get("chunk")
+    )
+    return file.id
+
+
+async def create_paper_vector_store(papers, owner=DEFAULT_OWNER, lexical_index: LexicalIndex = None):
+    """Create a vector store from a PaperTable or a list of papers, optionally filling a BM25 index too"""
+    papers = papers if isinstance(papers, PaperTable) else PaperTable.from_records(papers)
+    
+    # Create a new vector store; the server-side expiry backs up local garbage collection
+    vector_store = await schedule(
+        client.vector_stores.create,
+        priority=Priority.BACKGROUND,
+        idempotent=False,
+        name="Research Papers",
+        expires_after={"anchor": "last_active_at", "days": max(1, int(RESOURCE_TTL_DAYS))}
+    )
+    get_registry().register(KIND_VECTOR_STORE, vector_store.id, owner)
+    
+    # Upload one file per paper as soon as its PDF has been extracted; the vector store chunks it server-side
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    
+    async def upload(paper, content, filename):
+        async with semaphore:
+            await upload_paper_file(vector_store.id, paper, content, filename, owner=owner)
+    
+    uploads = []
+    async for paper, chunks in stream_paper_chunks(papers):
+        header = paper_metadata_text(paper)
         
-        # Create a temporary file
-        temp_file_path = f"temp_paper_{papers.index(paper)}.txt"
-        with open(temp_file_path, "w", encoding="utf-8") as f:
-            f.write(paper_content)
-        
-        # Upload to OpenAI as a file
-        with open(temp_file_path, "rb") as f:
-            file = client.files.create(
-                file=f,
-                purpose="vector_store"
-            )
+        if chunks:
+            get_catalog().record_extraction(paper, "extracted", len(chunks))
+        else:
+            get_catalog().record_extraction(paper, "unavailable", 0)
         
-        # Add to vector store
-        client.vector_stores.files.create_and_poll(
-            vector_store_id=vector_store.id,
-            file_id=file.id,
-            attributes={
-                "title": paper["title"],
-                "authors": paper["authors"],
-                "year": paper.get("year", 0),
-                "publication": paper.get("publication", "Unknown")
-            }
-        )
+        # The lexical index gets the same text locally, as it streams in
+        if lexical_index is not None:
+            if paper.get("abstract"):
+                lexical_index.add(paper, paper["abstract"], "Abstract")
+            for chunk in chunks:
+                lexical_index.add(paper, chunk["text"], chunk["section"])
         
-        # Clean up temporary file
-        os.remove(temp_file_path)
+        if chunks:
+            # Section headings stay in the text so matched passages still say where they came from
+            content = header + paper_document_text(chunks)
+        else:
+            # No readable PDF, so index the metadata and abstract only
+            content = header + f"""
+        Abstract: {paper.get('abstract', 'No abstract available.')}
+        """
+        uploads.append(asyncio.create_task(upload(paper, content, f"paper_{paper.index}.txt")))
+    
+    try:
+        await asyncio.gather(*uploads)
+    except BaseException:
+        for task in uploads:
+            task.cancel()
+        raise
     
     return vector_store.id
 
 
-async def search_papers(vector_store_id, query):
+async def search_papers(vector_store_id, query, max_results=SEARCH_RESULTS):
     """Search for relevant papers in the vector store"""
-    results = client.vector_stores.search(
+    results = await schedule(
+        client.vector_stores.search,
         vector_store_id=vector_store_id,
         query=query,
-        max_num_results=5
+        max_num_results=max_results
     )
     
     # Process and return the results
@@ -76,6 +152,8 @@ async def search_papers(vector_store_id, query):
             "authors": result.attributes.get("authors", "Unknown Authors"),
             "year": result.attributes.get("year", 0),
             "publication": result.attributes.get("publication", "Unknown"),
+            "doi": result.attributes.get("doi") or None,
+            "section": result.attributes.get("section"),
             "content": "\n".join([c.text for c in result.content]) if result.content else "",
             "relevance_score": result.score,
             "file_id": result.file_id
@@ -0,0 +1,110 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+from utils.computer_use import initialize_browser, ucalgary_library_login, google_drive_login
+
+
+class SpeculativeTasks:
+    """Named background tasks started before anyone knows whether they will be needed
+
+    A stage that needs the work awaits result(); work that turns out to be
+    unneeded is cancelled with cancel(), and finish() cancels whatever is left.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.started: Dict[str, float] = {}
+        self.finished: Dict[str, float] = {}
+        self.outcomes: Dict[str, str] = {}  # "used", "cancelled: <reason>", "failed: <error>" or "unused"
+
+    def start(self, name: str, coroutine: Awaitable[Any]):
+        """Start a speculative task in the background"""
+        self.started[name] = time.monotonic()
+        task = asyncio.create_task(coroutine)
+        task.add_done_callback(lambda _: self.finished.setdefault(name, time.monotonic()))
+        self.tasks[name] = task
+
+    async def dependency(self, name: str) -> Any:
+        """Await another speculative task from inside one, without cancelling it along with the caller"""
+        return await asyncio.shield(self.tasks[name])
+
+    async def result(self, name: str) -> Any:
+        """Wait for a speculative task and return its result, raising if it failed"""
+        waited = time.monotonic()
+        try:
+            result = await asyncio.shield(self.tasks[name])
+        except asyncio.CancelledError:
+            if self.tasks[name].cancelled():
+                raise RuntimeError(f"Speculative task '{name}' was cancelled")
+            raise
+        except Exception as e:
+            self.outcomes[name] = f"failed: {e}"
+            raise
+        # Time the caller did not have to wait because the work had already started
+        self.outcomes[name] = "used"
+        saved = max(min(waited, self.finished.get(name, waited)) - self.started[name], 0.0)
+        print(f"Warm-up '{name}' used, {saved:.1f}s of it ran ahead of the workflow")
+        return result
+
+    async def result_or_none(self, name: str) -> Optional[Any]:
+        """Like result(), but return None when the task is missing, failed or was cancelled"""
+        if name not in self.tasks:
+            return None
+        try:
+            return await self.result(name)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Warm-up '{name}' not available: {e}")
+            return None
+
+    def cancel(self, name: str, reason: str):
+        """Cancel a speculative task that turned out to be unneeded"""
+        task = self.tasks.get(name)
+        if task is None or name in self.outcomes:
+            return
+        if not task.done():
+            task.cancel()
+        self.outcomes[name] = f"cancelled: {reason}"
+        print(f"Warm-up '{name}' cancelled: {reason}")
+
+    def finish(self) -> Dict[str, str]:
+        """Cancel speculative work nobody asked for and return the outcome of every task"""
+        for name, task in self.tasks.items():
+            if name in self.outcomes:
+                continue
+            if task.done():
+                # Retrieve the exception so a failed, unused task is reported here and not at shutdown
+                error = None if task.cancelled() else task.exception()
+                self.outcomes[name] = f"failed: {error}" if error else "unused"
+            else:
+                task.cancel()
+                self.outcomes[name] = "cancelled: workflow finished"
+        return dict(self.outcomes)
+
+
+async def _drive_session(warmup: SpeculativeTasks, credentials) -> Dict[str, Any]:
+    """Open a second tab and sign in to Google Drive in it"""
+    browser_session = dict(await warmup.dependency("browser"))
+    browser_session["page"] = await browser_session["context"].new_page()
+    await google_drive_login(browser_session, credentials.google_username, credentials.google_password)
+    return browser_session
+
+
+async def _library_session(warmup: SpeculativeTasks, credentials) -> Dict[str, Any]:
+    """Sign in to the library in the main tab"""
+    browser_session = await warmup.dependency("browser")
+    await ucalgary_library_login(browser_session, credentials.ucalgary_username, credentials.ucalgary_password)
+    return browser_session
+
+
+def start_research_warmup(credentials, target_journal: Optional[str] = None,
+                          fetch_guidelines: Optional[Callable[[str], Awaitable[Any]]] = None) -> SpeculativeTasks:
+    """Launch the browser, sign in to the library and Drive, and prefetch journal guidelines in the background"""
+    warmup = SpeculativeTasks()
+    warmup.start("browser", initialize_browser())
+    warmup.start("library_login", _library_session(warmup, credentials))
+    warmup.start("drive_login", _drive_session(warmup, credentials))
+    if target_journal and fetch_guidelines is not None:
+        warmup.start("journal_guidelines", fetch_guidelines(target_journal))
+    return warmup
@@ -0,0 +1,155 @@
+import time
+import asyncio
+from types import SimpleNamespace
+from pydantic import BaseModel
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type
+from utils.progress import emit, set_stage, StageStarted, StageFinished, PartialOutput
+from utils.budget import get_budget
+
+
+class StageFailed(Exception):
+    """Raised when a workflow stage fails or returns the wrong type"""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """One node of a workflow DAG
+
+    run receives the shared tool context and the outputs of the stages it
+    depends on, keyed by stage name, and must return an instance of output_type.
+    """
+
+    def __init__(self, name: str, run: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+                 depends_on: Optional[List[str]] = None, output_type: Optional[Type] = None,
+                 optional: bool = False):
+        self.name = name
+        self.run = run
+        self.depends_on = list(depends_on or [])
+        self.output_type = output_type
+        self.optional = optional  # A failed optional stage does not fail the workflow
+
+
+class StageTiming(BaseModel):
+    """Model for when a stage ran, relative to the start of the workflow"""
+    started: float
+    finished: float
+    status: str  # "completed", "failed" or "skipped"
+    error: Optional[str] = None
+
+
+class WorkflowResult(BaseModel):
+    """Model for the outputs of a workflow run"""
+    outputs: Dict[str, Any]
+    timings: Dict[str, StageTiming]
+    total_seconds: float
+    metadata: Dict[str, Any] = {}  # Run-level details added by the caller
+
+
+def make_context(context: Dict[str, Any]) -> SimpleNamespace:
+    """Wrap a context dict the way the agents SDK passes it to tools (ctx.context)"""
+    return SimpleNamespace(context=context)
+
+
+def topological_order(stages: List[Stage]) -> List[Stage]:
+    """Order stages so each comes after its dependencies, rejecting unknown names and cycles"""
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Workflow stage names must be unique")
+    for stage in stages:
+        missing = [d for d in stage.depends_on if d not in by_name]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+    order = []
+    state: Dict[str, str] = {}
+
+    def visit(stage: Stage, path: List[str]):
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "visiting":
+            raise ValueError(f"Workflow has a cycle: {' -> '.join(path + [stage.name])}")
+        state[stage.name] = "visiting"
+        for dependency in stage.depends_on:
+            visit(by_name[dependency], path + [stage.name])
+        state[stage.name] = "done"
+        order.append(stage)
+
+    for stage in stages:
+        visit(stage, [])
+    return order
+
+
+async def run_workflow(stages: List[Stage], context: Dict[str, Any]) -> WorkflowResult:
+    """Run a DAG of stages, starting each one as soon as its dependencies finish
+
+    Independent branches run concurrently. When a required stage fails, the
+    stages that depend on it are skipped and the failure is raised once every
+    running branch has settled.
+    """
+    order = topological_order(stages)
+    ctx = make_context(context)
+    start = time.monotonic()
+    outputs: Dict[str, Any] = {}
+    timings: Dict[str, StageTiming] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_stage(stage: Stage):
+        # Progress events from this task and the tasks it starts belong to this stage
+        set_stage(stage.name)
+        
+        # Wait for dependencies; a failed or skipped dependency skips this stage
+        for dependency in stage.depends_on:
+            await asyncio.gather(tasks[dependency], return_exceptions=True)
+        failed = [d for d in stage.depends_on if timings[d].status != "completed"]
+        if failed:
+            now = time.monotonic() - start
+            timings[stage.name] = StageTiming(started=now, finished=now, status="skipped",
+                                              error=f"Dependencies did not complete: {failed}")
+            emit(StageFinished(status="skipped", seconds=0.0, error=timings[stage.name].error))
+            return
+
+        started = time.monotonic() - start
+        print(f"Workflow stage '{stage.name}' started")
+        emit(StageStarted())
+        # A budget, when the run has one, may degrade the work before the stage starts
+        budget = get_budget()
+        if budget is not None:
+            budget.start_stage(stage.name)
+        try:
+            output = await stage.run(ctx, {d: outputs[d] for d in stage.depends_on})
+            if stage.output_type is not None and not isinstance(output, stage.output_type):
+                raise TypeError(f"expected {stage.output_type.__name__}, got {type(output).__name__}")
+        except Exception as e:
+            if budget is not None:
+                budget.finish_stage(stage.name)
+            timings[stage.name] = StageTiming(started=started, finished=time.monotonic() - start,
+                                              status="failed", error=str(e))
+            print(f"Workflow stage '{stage.name}' failed: {e}")
+            emit(StageFinished(status="failed", seconds=timings[stage.name].finished - started, error=str(e)))
+            raise StageFailed(stage.name, e) from e
+
+        if budget is not None:
+            budget.finish_stage(stage.name)
+        outputs[stage.name] = output
+        timings[stage.name] = StageTiming(started=started, finished=time.monotonic() - start, status="completed")
+        print(f"Workflow stage '{stage.name}' completed in {timings[stage.name].finished - started:.1f}s")
+        if isinstance(output, BaseModel):
+            emit(PartialOutput(output_type=type(output).__name__, data=output.model_dump(), complete=True))
+        emit(StageFinished(status="completed", seconds=timings[stage.name].finished - started))
+
+    # Tasks are created in dependency order so every awaited task already exists
+    for stage in order:
+        tasks[stage.name] = asyncio.create_task(run_stage(stage))
+    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    for stage, result in zip(order, results):
+        if isinstance(result, StageFailed) and not stage.optional:
+            raise result
+        if isinstance(result, BaseException) and not isinstance(result, StageFailed):
+            raise result
+
+    return WorkflowResult(outputs=outputs, timings=timings, total_seconds=time.monotonic() - start)